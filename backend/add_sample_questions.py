@@ -1,4 +1,3 @@
-import json
 import random
 from app import create_app, db
 from app.models.question import Question
@@ -76,7 +75,7 @@ def generate_question(index):
         "category": category,
         "difficulty": difficulty,
         "correct_answer": correct,
-        "incorrect_answers": json.dumps(incorrect_answers)
+        "incorrect_answers": incorrect_answers
     }
 
 def add_sample_questions():
@@ -3,6 +3,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from app.config import Config
 import os
 
@@ -14,6 +15,10 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Client addresses from the trusted proxies' X-Forwarded-For
+    if app.config.get('PROXY_FIX_X_FOR'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+    
     db.init_app(app)
     migrate.init_app(app, db)
     
@@ -27,19 +32,36 @@ def create_app(config_class=Config):
     
     # Import models to ensure they are registered with SQLAlchemy
     with app.app_context():
-        from app.models import user, score, question
+        from app.models import user, score, question, quiz
+        # Registers the full-text index DDL that runs with create_all
+        from app.services import question_search
         
-        # Create all tables if they don't exist
-        db.create_all()
+        # Create missing tables only where there are no migrations to run (tests,
+        # throwaway databases); otherwise `flask db upgrade` owns the schema
+        if app.config.get('AUTO_CREATE_TABLES'):
+            db.create_all()
     
     # Initialize Marshmallow
     from app.schemas import init_ma
     init_ma(app)
     
-    from app.routes import auth_bp, questions_bp, scores_bp
+    from app.routes import auth_bp, questions_bp, scores_bp, quizzes_bp, leaderboard_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(questions_bp)
     app.register_blueprint(scores_bp)
+    app.register_blueprint(quizzes_bp)
+    app.register_blueprint(leaderboard_bp)
+    
+    # Request metrics first, so requests shed by admission control are counted too
+    from app.services.metrics import CONTENT_TYPE, get_request_metrics, init_request_metrics
+    init_request_metrics(app)
+    
+    # Concurrency and rate limits for the blueprints' routes
+    from app.services.admission import get_admission_control, init_admission_control
+    init_admission_control(app)
+    
+    from app.commands import register_commands
+    register_commands(app)
     
     # API information route
     @app.route('/api')
@@ -49,10 +71,26 @@ def create_app(config_class=Config):
             "endpoints": {
                 "auth": "/api/auth",
                 "questions": "/api/questions",
-                "scores": "/api/scores"
+                "scores": "/api/scores",
+                "quizzes": "/api/quizzes",
+                "leaderboard": "/api/leaderboard"
             }
         })
         
+    @app.route('/api/admission')
+    def admission_stats():
+        """Limits and admitted/rejected counters of this worker's admission control"""
+        admission = get_admission_control()
+        return jsonify({'enabled': True, **admission.stats()} if admission else {'enabled': False})
+        
+    @app.route('/api/metrics')
+    def metrics():
+        """Per-endpoint latency, response size and SQL metrics in Prometheus text format"""
+        request_metrics = get_request_metrics()
+        if request_metrics is None:
+            return jsonify({'message': 'Metrics are disabled'}), 404
+        return request_metrics.render(), 200, {'Content-Type': CONTENT_TYPE}
+        
     @app.route('/')
     def index():
         return jsonify({"message": "Trivia API is running", "status": "ok"})
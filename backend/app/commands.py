@@ -0,0 +1,92 @@
+import click
+
+def register_commands(app):
+    """Attach the app's `flask <command>` CLI commands"""
+    
+    @app.cli.command('import-questions')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']),
+                  help='Input format (defaults to the file extension)')
+    @click.option('--batch-size', default=5000, show_default=True,
+                  help='Rows inserted per transaction')
+    @click.option('--near-duplicates', 'near_duplicate_threshold', type=click.FloatRange(0, 1),
+                  help='Also skip questions this similar (0-1) to a stored one')
+    def import_questions_command(path, fmt, batch_size, near_duplicate_threshold):
+        """Bulk import questions from a JSONL or CSV file, skipping duplicates"""
+        from app.services.question_import import import_questions
+        
+        def progress(stats):
+            click.echo(f"{stats['read']} read, {stats['inserted']} inserted, "
+                       f"{stats['duplicates']} duplicates, {stats['invalid']} invalid")
+        
+        stats = import_questions(path, fmt=fmt, batch_size=batch_size, progress=progress,
+                                 near_duplicate_threshold=near_duplicate_threshold)
+        click.echo(f"Imported {stats['inserted']} of {stats['read']} questions in "
+                   f"{stats['seconds']:.2f}s ({stats['rows_per_sec']:.0f} rows/sec)")
+    
+    @app.cli.command('rebuild-player-stats')
+    def rebuild_player_stats_command():
+        """Recompute the player_stats rollup from the score table"""
+        from app import db
+        from app.services.player_stats import rebuild_player_stats
+        
+        with db.engine.begin() as connection:
+            rows = rebuild_player_stats(connection)
+        click.echo(f"Rebuilt {rows} player stats rows")
+    
+    @app.cli.command('check-player-stats')
+    def check_player_stats_command():
+        """Compare the player_stats rollup with the score table (exit 1 on drift)"""
+        from app import db
+        from app.services.player_stats import check_player_stats
+        
+        with db.engine.connect() as connection:
+            mismatches = check_player_stats(connection)
+        for column, value, expected, stored in mismatches:
+            click.echo(f"{column}={value!r}: expected {expected}, stored {stored}")
+        if mismatches:
+            click.echo(f"{len(mismatches)} player stats rows out of date; "
+                       f"run `flask rebuild-player-stats`")
+            raise SystemExit(1)
+        click.echo("Player stats are consistent")
+    
+    @app.cli.command('rebuild-leaderboard')
+    def rebuild_leaderboard_command():
+        """Recompute every player's best scores, all-time and per window, from the score table"""
+        from app import db
+        from app.services.leaderboard import rebuild_leaderboard, rebuild_leaderboard_buckets
+        
+        with db.engine.begin() as connection:
+            rows = rebuild_leaderboard(connection)
+            buckets = rebuild_leaderboard_buckets(connection)
+        click.echo(f"Rebuilt {rows} leaderboard entries and {buckets} window buckets")
+    
+    @app.cli.command('rebuild-score-histograms')
+    def rebuild_score_histograms_command():
+        """Recompute the percentile histograms from the score table"""
+        from app import db
+        from app.services.score_histogram import rebuild_score_histograms
+        
+        with db.engine.begin() as connection:
+            rows = rebuild_score_histograms(connection)
+        click.echo(f"Rebuilt {rows} score histogram buckets")
+    
+    @app.cli.command('prune-leaderboard')
+    def prune_leaderboard_command():
+        """Drop daily/weekly/monthly leaderboard periods past their retention (run daily)"""
+        from app import db
+        from app.services.leaderboard import prune_leaderboard_buckets
+        
+        with db.engine.begin() as connection:
+            rows = prune_leaderboard_buckets(connection)
+        click.echo(f"Pruned {rows} expired window buckets")
+    
+    @app.cli.command('prune-quiz-decks')
+    def prune_quiz_decks_command():
+        """Delete quiz decks older than QUIZ_DECK_TTL (run daily)"""
+        from app import db
+        from app.services.quiz_deck import prune_quiz_decks
+        
+        with db.engine.begin() as connection:
+            rows = prune_quiz_decks(connection)
+        click.echo(f"Pruned {rows} expired quiz decks")
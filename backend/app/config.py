@@ -1,12 +1,123 @@
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///trivia.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # db.create_all() at startup; off by default because it creates new
+    # tables (and seeds them) ahead of their migrations, which then fail,
+    # and never adds new columns. Run `flask db upgrade` instead.
+    AUTO_CREATE_TABLES = os.environ.get('AUTO_CREATE_TABLES', '').lower() in ('1', 'true', 'yes')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-change-in-production'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
+    # Max serialized questions held per worker by the questions cache
+    QUESTION_CACHE_MAX_ITEMS = int(os.environ.get('QUESTION_CACHE_MAX_ITEMS', 50000))
+    # Max compressed bank snapshots (one per category) held per worker
+    QUESTION_SNAPSHOT_MAX = int(os.environ.get('QUESTION_SNAPSHOT_MAX', 16))
+    # Quiz decks older than this answer 404; `flask prune-quiz-decks` deletes them
+    QUIZ_DECK_TTL = timedelta(hours=int(os.environ.get('QUIZ_DECK_TTL_HOURS', 24 * 7)))
+    # Max games accepted by one POST /api/scores/batch
+    SCORE_BATCH_MAX_ITEMS = int(os.environ.get('SCORE_BATCH_MAX_ITEMS', 100))
+    # Write-behind score ingestion: submissions are queued and committed in
+    # batches by a writer thread instead of one commit per request
+    SCORE_WRITE_BEHIND = os.environ.get('SCORE_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+    SCORE_QUEUE_MAX_SIZE = int(os.environ.get('SCORE_QUEUE_MAX_SIZE', 10000))
+    SCORE_QUEUE_BATCH_SIZE = int(os.environ.get('SCORE_QUEUE_BATCH_SIZE', 500))
+    SCORE_QUEUE_FLUSH_INTERVAL = float(os.environ.get('SCORE_QUEUE_FLUSH_INTERVAL', 0.005))
+    # Seconds a submission waits for room in a full queue before a 503
+    SCORE_QUEUE_PUT_TIMEOUT = float(os.environ.get('SCORE_QUEUE_PUT_TIMEOUT', 0.5))
+    # Wait for the commit before answering (override per request with ?wait=)
+    SCORE_READ_YOUR_WRITES = os.environ.get('SCORE_READ_YOUR_WRITES', '').lower() in ('1', 'true', 'yes')
+    SCORE_QUEUE_WAIT_TIMEOUT = float(os.environ.get('SCORE_QUEUE_WAIT_TIMEOUT', 10))
+    # Per-worker Bloom filter of taken nicknames, so most availability
+    # checks need no query; registrations in other workers reach it within
+    # the refresh interval (seconds)
+    NICKNAME_FILTER = os.environ.get('NICKNAME_FILTER', 'true').lower() in ('1', 'true', 'yes')
+    NICKNAME_FILTER_ERROR_RATE = float(os.environ.get('NICKNAME_FILTER_ERROR_RATE', 0.01))
+    NICKNAME_FILTER_REFRESH_INTERVAL = float(os.environ.get('NICKNAME_FILTER_REFRESH_INTERVAL', 5.0))
+    # Seconds a worker trusts a score read scope's change marker and cached
+    # responses for (other workers' writes show up after at most this; 0 disables)
+    SCORE_CACHE_TTL = float(os.environ.get('SCORE_CACHE_TTL', 2.0))
+    SCORE_CACHE_MAX_ITEMS = int(os.environ.get('SCORE_CACHE_MAX_ITEMS', 10000))
+    # Request threads per gunicorn worker; the Procfile passes the same
+    # variable to --threads, and the limits below are sized from it
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 4))
+    # Werkzeug password hash method with its cost, e.g. 'scrypt:32768:8:1' or
+    # 'pbkdf2:sha256:600000' (existing hashes keep verifying with their own)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # Processes per worker that hash passwords (0 hashes on the request thread)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 1))
+    # Hashes that may wait for a process; beyond that callers wait up to the
+    # admission timeout (seconds) for a slot, then get a 503 with Retry-After.
+    # Hashing plus waiting holds at most half the request threads (2 of 4),
+    # so a login storm leaves the others to the rest of the API.
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get(
+        'PASSWORD_HASH_MAX_PENDING', max(0, SERVER_THREADS // 2 - max(PASSWORD_HASH_WORKERS, 1))
+    ))
+    PASSWORD_HASH_ADMISSION_TIMEOUT = float(os.environ.get('PASSWORD_HASH_ADMISSION_TIMEOUT', 2.0))
+    # Seconds a worker trusts a cached JWT identity (id, username, email)
+    # for; users changed in other workers show up after at most this
+    IDENTITY_CACHE_TTL = float(os.environ.get('IDENTITY_CACHE_TTL', 300))
+    IDENTITY_CACHE_MAX_ITEMS = int(os.environ.get('IDENTITY_CACHE_MAX_ITEMS', 10000))
+    # Request latency, response size and SQL metrics at /api/metrics. Workers
+    # write theirs under METRICS_DIR every METRICS_FLUSH_INTERVAL seconds so
+    # a scrape of any gunicorn worker sums all of them; unset reports the
+    # answering worker only.
+    METRICS = os.environ.get('METRICS', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'trivia-metrics'))
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5.0))
+    # Names the server whose workers share a directory under METRICS_DIR;
+    # gunicorn.conf.py sets it to the master's pid. Unset, each process
+    # reports only itself.
+    METRICS_SERVER_ID = os.environ.get('METRICS_SERVER_ID')
+    # Per-worker admission control (SERVER_THREADS threads per worker): at
+    # most `concurrency` requests of a blueprint, or of an endpoint, which
+    # replaces its blueprint's entry, in flight, `queue` more waiting up to
+    # ADMISSION_QUEUE_TIMEOUT seconds; beyond that requests get a fast 503
+    # with Retry-After. Unlisted blueprints are not limited, and scores
+    # leave them a thread, so question reads always find one. Auth gets
+    # half the threads, like password hashing.
+    ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'true').lower() in ('1', 'true', 'yes')
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 1.0))
+    ADMISSION_LIMITS = {
+        'auth': {'concurrency': max(1, SERVER_THREADS // 2), 'queue': 1},
+        'scores': {'concurrency': max(1, SERVER_THREADS - 1), 'queue': SERVER_THREADS},
+        'auth.check_nickname_availability': {'concurrency': max(1, SERVER_THREADS - 1), 'queue': 1},
+    }
+    # Proxies in front of the app that append to X-Forwarded-For (1 for the
+    # platform router); request.remote_addr, and so the per-client rate
+    # limits, then use the address they saw. Set 0 when clients connect
+    # directly, as the header is theirs to forge.
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1))
+    # Token buckets per client address for abuse-prone endpoints: `burst`
+    # requests at once, then `rate` per second; excess requests get a 429
+    RATE_LIMITS = {
+        'auth.register_nickname': {'rate': 5 / 60, 'burst': 5},
+        'auth.register': {'rate': 5 / 60, 'burst': 5},
+        'auth.login': {'rate': 10 / 60, 'burst': 10},
+        'auth.check_nickname_availability': {'rate': 2, 'burst': 20},
+    }
+    RATE_LIMIT_MAX_CLIENTS = int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', 10000))
+    # Timezone whose midnight starts the daily/weekly/monthly leaderboards
+    # (rebuild them with `flask rebuild-leaderboard` after changing it)
+    LEADERBOARD_TIMEZONE = os.environ.get('LEADERBOARD_TIMEZONE', 'UTC')
+    # Periods of each leaderboard window kept, the current one included
+    LEADERBOARD_WINDOW_RETENTION = {
+        'day': int(os.environ.get('LEADERBOARD_DAYS_KEPT', 31)),
+        'week': int(os.environ.get('LEADERBOARD_WEEKS_KEPT', 26)),
+        'month': int(os.environ.get('LEADERBOARD_MONTHS_KEPT', 24)),
+    }
+    # Open Trivia DB compatible API to refill the bank from (e.g. https://opentdb.com);
+    # unset disables the mirror
+    OPENTDB_MIRROR_URL = os.environ.get('OPENTDB_MIRROR_URL')
+    # Refill a category/difficulty once fewer questions than this are stored
+    OPENTDB_MIRROR_MIN_POOL = int(os.environ.get('OPENTDB_MIRROR_MIN_POOL', 100))
+    OPENTDB_MIRROR_BATCH_SIZE = int(os.environ.get('OPENTDB_MIRROR_BATCH_SIZE', 50))
+    OPENTDB_MIRROR_WORKERS = int(os.environ.get('OPENTDB_MIRROR_WORKERS', 2))
+    # Seconds between upstream calls (Open Trivia DB allows one per 5s)
+    OPENTDB_MIRROR_MIN_INTERVAL = float(os.environ.get('OPENTDB_MIRROR_MIN_INTERVAL', 5.0))
     
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -19,6 +130,13 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    AUTO_CREATE_TABLES = True
+    OPENTDB_MIRROR_URL = None
+    SCORE_WRITE_BEHIND = False
+    NICKNAME_FILTER = False
+    PASSWORD_HASH_WORKERS = 0
+    ADMISSION_CONTROL = False
+    METRICS_DIR = None
 
 config = {
     'development': DevelopmentConfig,
@@ -1,2 +1,2 @@
 # Import models to ensure they are registered with SQLAlchemy
-from app.models import score, user, question
\ No newline at end of file
+from app.models import score, user, question, quiz
\ No newline at end of file
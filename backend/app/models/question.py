@@ -1,9 +1,95 @@
 from app import db
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import validates
+import hashlib
+import json
+import re
+import unicodedata
+
+def normalize_question_text(text):
+    """Case, punctuation and whitespace insensitive form of a question's text"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = re.sub(r'[^\w\s]', '', text)
+    return ' '.join(text.split())
+
+def question_text_hash(text):
+    return hashlib.sha1(normalize_question_text(text).encode('utf-8')).hexdigest()
+
+def decode_answer_list(value):
+    """Answer list from a list, a JSON array string or the legacy 'a|b|c' form"""
+    if isinstance(value, str):
+        if value.startswith('['):
+            return [str(answer) for answer in json.loads(value)]
+        return value.split('|')
+    return [str(answer) for answer in value]
 
 class Question(db.Model):
+    # Covers the per-filter ID scans used by the question sampler
+    __table_args__ = (
+        db.Index('ix_question_category_difficulty', 'category', 'difficulty'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.String(500), nullable=False)
     category = db.Column(db.String(100), nullable=False)
     difficulty = db.Column(db.Integer, nullable=False)
     correct_answer = db.Column(db.String(200), nullable=False)
-    incorrect_answers = db.Column(db.String(600), nullable=False)  # Stored as JSON string
+    # JSON array of strings, decoded once by the driver and never re-parsed
+    incorrect_answers = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=False)
+    # Hash of the normalized text, used to skip duplicates on import
+    text_hash = db.Column(db.String(40), index=True)
+    # Bank version of the last write to this row, for delta sync
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0', index=True)
+
+    @validates('text')
+    def _set_text_hash(self, key, text):
+        self.text_hash = question_text_hash(text)
+        return text
+
+    @validates('incorrect_answers')
+    def _decode_incorrect_answers(self, key, value):
+        return decode_answer_list(value)
+
+class QuestionBank(db.Model):
+    """
+    Single-row table holding the question bank version
+    Bumped in the same transaction as any question insert/update/delete so
+    every worker can tell when its cached questions are stale
+    """
+    __tablename__ = 'question_bank'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class QuestionTombstone(db.Model):
+    """
+    Question IDs that left a category (deleted, or moved to another one), so
+    delta sync clients can drop them too
+    """
+    __tablename__ = 'question_tombstone'
+
+    id = db.Column(db.Integer, primary_key=True)
+    question_id = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.Integer, nullable=False, index=True)
+    # Category the question left; NULL for tombstones that predate it
+    category = db.Column(db.String(100))
+
+class QuestionCount(db.Model):
+    """
+    Number of questions per (category, difficulty)
+    Adjusted in the same transaction as question inserts/updates/deletes, so
+    listing categories never has to GROUP BY the question table
+    """
+    __tablename__ = 'question_count'
+
+    category = db.Column(db.String(100), primary_key=True)
+    difficulty = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# Seed the version row whenever the table is created
+event.listen(
+    QuestionBank.__table__,
+    'after_create',
+    DDL("INSERT INTO question_bank (id, version) VALUES (1, 0)")
+)
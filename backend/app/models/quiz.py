@@ -0,0 +1,20 @@
+from app import db
+from datetime import datetime
+
+class QuizDeck(db.Model):
+    """
+    A server-side quiz deck: a seeded permutation of the questions matching
+    a filter. Only the seed and filter are stored; the order is recomputed
+    from them, so the deck never holds a materialized ID list.
+    """
+    __tablename__ = 'quiz_deck'
+
+    id = db.Column(db.Integer, primary_key=True)
+    seed = db.Column(db.BigInteger, nullable=False)
+    category = db.Column(db.String(100))
+    difficulty = db.Column(db.Integer)
+    # Number of matching questions when the deck was dealt
+    size = db.Column(db.Integer, nullable=False)
+    page_size = db.Column(db.Integer, nullable=False, default=10)
+    # Decks expire after QUIZ_DECK_TTL; `flask prune-quiz-decks` deletes them
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -1,7 +1,20 @@
 from app import db
 from datetime import datetime
 
+# Index column order matching ORDER BY date DESC NULLS LAST, id DESC
+NEWEST_FIRST = {'date': 'DESC NULLS LAST', 'id': 'DESC'}
+
 class Score(db.Model):
+    __table_args__ = (
+        # Per-player history and the global feed, newest first; id is the
+        # keyset tie-break (see select_score_rows). PostgreSQL stores them in
+        # that order, as a backward scan would put NULL dates first.
+        db.Index('ix_score_user_id_date', 'user_id', 'date', 'id', postgresql_ops=NEWEST_FIRST),
+        db.Index('ix_score_player_name_date', 'player_name', 'date', 'id', postgresql_ops=NEWEST_FIRST),
+        db.Index('ix_score_date', 'date', 'id', postgresql_ops=NEWEST_FIRST),
+        db.UniqueConstraint('idempotency_key', name='uq_score_idempotency_key'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     user = db.relationship('User', backref=db.backref('scores', lazy=True))
@@ -16,3 +29,107 @@ class Score(db.Model):
     questions_answered = db.Column(db.Integer)
     questions_correct = db.Column(db.Integer)
     date = db.Column(db.DateTime, default=datetime.utcnow)
+    # Client-generated key of a batch-submitted game; replays are skipped
+    idempotency_key = db.Column(db.String(64))
+
+class PlayerStats(db.Model):
+    """
+    Running totals of one player's scores, so per-player stats are a lookup
+    Keyed by user_id for authenticated players and by player_name for
+    nicknames; a signed-in player's score counts towards both rows, matching
+    how /api/scores/stats filters. Updated in the same transaction as the
+    score insert (see app/services/player_stats.py).
+    """
+    __tablename__ = 'player_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), unique=True)
+    player_name = db.Column(db.String(120), unique=True)
+    games = db.Column(db.Integer, nullable=False, default=0)
+    normal_score_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    normal_score_max = db.Column(db.Integer, nullable=False, default=0)
+    trivialer_score_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    trivialer_score_max = db.Column(db.Integer, nullable=False, default=0)
+    questions_answered = db.Column(db.BigInteger, nullable=False, default=0)
+    questions_correct = db.Column(db.BigInteger, nullable=False, default=0)
+
+class LeaderboardEntry(db.Model):
+    """
+    A player's best score in one leaderboard scope
+    One row per (mode, category, difficulty, player); category '' and
+    difficulty 0 stand for "all". The rank index matches the leaderboard's
+    ORDER BY, so reading the top K touches K index entries; the unique
+    constraint leads with player_key for the per-submission lookup.
+    """
+    __tablename__ = 'leaderboard_entry'
+    __table_args__ = (
+        db.UniqueConstraint('player_key', 'mode', 'category', 'difficulty',
+                            name='uq_leaderboard_entry_player'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    mode = db.Column(db.String(10), nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    difficulty = db.Column(db.Integer, nullable=False)
+    # 'user:<id>' for signed-in players, 'name:<player_name>' for guests
+    player_key = db.Column(db.String(140), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    player_name = db.Column(db.String(120))
+    score = db.Column(db.Integer, nullable=False)
+    score_id = db.Column(db.Integer, nullable=False)
+    achieved_at = db.Column(db.DateTime)
+
+db.Index(
+    'ix_leaderboard_entry_rank',
+    LeaderboardEntry.mode, LeaderboardEntry.category, LeaderboardEntry.difficulty,
+    LeaderboardEntry.score.desc(), LeaderboardEntry.achieved_at, LeaderboardEntry.score_id
+)
+
+class LeaderboardBucket(db.Model):
+    """
+    A player's best score in one time window (day, week or month)
+    One row per (period, period start, mode, category, player); category ''
+    stands for "all". Period starts are local dates in LEADERBOARD_TIMEZONE,
+    and periods older than LEADERBOARD_WINDOW_RETENTION are pruned, so the
+    table stays bounded however many scores exist.
+    """
+    __tablename__ = 'leaderboard_bucket'
+    __table_args__ = (
+        db.UniqueConstraint('player_key', 'period', 'period_start', 'mode', 'category',
+                            name='uq_leaderboard_bucket_player'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # 'day', 'week' or 'month'
+    period = db.Column(db.String(5), nullable=False)
+    period_start = db.Column(db.Date, nullable=False)
+    mode = db.Column(db.String(10), nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    player_key = db.Column(db.String(140), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    player_name = db.Column(db.String(120))
+    score = db.Column(db.Integer, nullable=False)
+    score_id = db.Column(db.Integer, nullable=False)
+    achieved_at = db.Column(db.DateTime)
+
+db.Index(
+    'ix_leaderboard_bucket_rank',
+    LeaderboardBucket.period, LeaderboardBucket.period_start, LeaderboardBucket.mode,
+    LeaderboardBucket.category, LeaderboardBucket.score.desc(), LeaderboardBucket.achieved_at,
+    LeaderboardBucket.score_id
+)
+
+class ScoreHistogram(db.Model):
+    """
+    Number of scores per histogram bucket, per (mode, category, difficulty)
+    category '' and difficulty 0 stand for "all". Buckets are exact for
+    small scores and logarithmic above (see app/services/score_histogram.py),
+    so a scope has a bounded number of rows however many scores exist.
+    """
+    __tablename__ = 'score_histogram'
+
+    mode = db.Column(db.String(10), primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)
+    difficulty = db.Column(db.Integer, primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
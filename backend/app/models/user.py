@@ -1,17 +1,37 @@
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import validates
+from app.services.password_hashing import get_password_hasher
+
+def normalize_username(username):
+    """Case-insensitive form of a username, as stored in username_lower"""
+    return username.lower() if username is not None else None
 
 class User(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('username_lower', name='uq_user_username_lower'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
+    # Lowercased username for indexed case-insensitive lookups (nicknames
+    # are unique ignoring case). NULL only for accounts that predate it and
+    # collide with an older one, which already holds the name.
+    username_lower = db.Column(db.String(80))
     email = db.Column(db.String(120), unique=True, nullable=True)  # Allow null for nickname-only users
-    password_hash = db.Column(db.String(128), nullable=True)  # Allow null for nickname-only users
+    # scrypt hashes run to 162 characters
+    password_hash = db.Column(db.String(256), nullable=True)  # Allow null for nickname-only users
+    
+    @validates('username')
+    def _set_username_lower(self, key, username):
+        self.username_lower = normalize_username(username)
+        return username
     
+    # Both hash in the app's process pool and may raise HashingBusy under load
     def set_password(self, password):
         if password:  # Only set if password provided
-            self.password_hash = generate_password_hash(password)
+            self.password_hash = get_password_hasher().hash(password)
         
     def check_password(self, password):
         if not self.password_hash:  # Nickname-only users have no password
             return False
-        return check_password_hash(self.password_hash, password)
\ No newline at end of file
+        return get_password_hasher().check(self.password_hash, password)
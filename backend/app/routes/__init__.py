@@ -3,6 +3,8 @@ from flask import Blueprint
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 questions_bp = Blueprint('questions', __name__, url_prefix='/api/questions')
 scores_bp = Blueprint('scores', __name__, url_prefix='/api/scores')
+quizzes_bp = Blueprint('quizzes', __name__, url_prefix='/api/quizzes')
+leaderboard_bp = Blueprint('leaderboard', __name__, url_prefix='/api/leaderboard')
 
 # Import routes to register them with blueprints
-from app.routes import auth, questions, scores
+from app.routes import auth, questions, scores, quizzes, leaderboard
@@ -1,14 +1,53 @@
 from flask import request, jsonify
 from app import db
 from app.routes import auth_bp
-from app.models.user import User
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from app.models.user import User, normalize_username
+from flask_jwt_extended import create_access_token, current_user, jwt_required, get_jwt_identity
 from marshmallow import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app.services.identity_cache import get_identity_cache, init_identity_cache
+from app.services.nickname_filter import get_nickname_filter, init_nickname_filter
+from app.services.password_hashing import HashingBusy, init_password_hasher
 
 # Import schema here instead of globally
-from app.schemas.user import UserSchema
+from app.schemas.user import UserSchema, user_serializer
 user_schema = UserSchema()
 
+@auth_bp.record_once
+def setup_auth_services(state):
+    init_nickname_filter(state.app)
+    # Backs current_user on every blueprint's authenticated routes
+    init_identity_cache(state.app)
+    init_password_hasher(state.app)
+
+@auth_bp.errorhandler(HashingBusy)
+def password_hashing_busy(err):
+    # Login/registration bursts are shed here; clients retry after a pause
+    response = jsonify({'message': str(err)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def username_taken(username):
+    """
+    Whether a username is taken, ignoring case
+    Answered by the nickname filter when it is definitely free, otherwise by
+    the unique username_lower index.
+    """
+    name = normalize_username(username)
+    nickname_filter = get_nickname_filter()
+    if nickname_filter is not None and nickname_filter.is_available(name):
+        return False
+    return db.session.execute(
+        select(User.id).where(User.username_lower == name).limit(1)
+    ).first() is not None
+
+def remember_username(user):
+    # Before the commit (a failed one only leaves a harmless false positive)
+    nickname_filter = get_nickname_filter()
+    if nickname_filter is not None:
+        nickname_filter.add(user.username_lower)
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Full registration with username, email, and password"""
@@ -18,8 +57,8 @@ def register():
         # Validate and deserialize input
         user = user_schema.load(data)
         
-        # Check for existing username/email
-        if User.query.filter_by(username=user.username).first():
+        # Check for existing username/email (usernames are unique ignoring case)
+        if username_taken(user.username):
             return jsonify({'message': 'Username already exists'}), 400
             
         if User.query.filter_by(email=user.email).first():
@@ -29,12 +68,21 @@ def register():
         user.set_password(data['password'])
         
         db.session.add(user)
+        remember_username(user)
         db.session.commit()
         
         return jsonify({'message': 'User registered successfully'}), 201
     
     except ValidationError as err:
         return jsonify(err.messages), 400
+    except IntegrityError:
+        # Registered concurrently, or taken in a worker whose filter is stale
+        db.session.rollback()
+        name_taken = db.session.execute(
+            select(User.id).where(User.username_lower == user.username_lower).limit(1)
+        ).first() is not None
+        message = 'Username already exists' if name_taken else 'Email already exists'
+        return jsonify({'message': message}), 400
 
 @auth_bp.route('/register-nickname', methods=['POST'])
 def register_nickname():
@@ -60,8 +108,7 @@ def register_nickname():
         return jsonify({'message': 'Nickname must be between 3 and 20 characters'}), 400
     
     # Check if nickname already exists (case-insensitive)
-    existing_user = User.query.filter(User.username.ilike(nickname)).first()
-    if existing_user:
+    if username_taken(nickname):
         return jsonify({'message': 'Nickname already taken'}), 400
     
     try:
@@ -73,6 +120,7 @@ def register_nickname():
         )
         
         db.session.add(user)
+        remember_username(user)
         db.session.commit()
         
         # Generate JWT token for immediate login
@@ -87,6 +135,10 @@ def register_nickname():
             }
         }), 201
         
+    except IntegrityError:
+        # Registered concurrently, maybe with different case
+        db.session.rollback()
+        return jsonify({'message': 'Nickname already taken'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Registration failed'}), 500
@@ -108,7 +160,7 @@ def login():
     
     return jsonify({
         'access_token': access_token,
-        'user': user_schema.dump(user)
+        'user': user_serializer.dump_obj(user)
     }), 200
 
 @auth_bp.route('/check-nickname', methods=['POST'])
@@ -123,24 +175,19 @@ def check_nickname_availability():
     if not nickname:
         return jsonify({'available': False, 'message': 'Nickname is required'}), 400
     
-    # Check if nickname exists (case-insensitive)
-    existing_user = User.query.filter(User.username.ilike(nickname)).first()
+    # Check if nickname exists (case-insensitive); usually no query at all
+    taken = username_taken(nickname)
     
     return jsonify({
-        'available': existing_user is None,
-        'message': 'Nickname available' if existing_user is None else 'Nickname already taken'
+        'available': not taken,
+        'message': 'Nickname already taken' if taken else 'Nickname available'
     }), 200
 
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-    
-    return jsonify(user_schema.dump(user)), 200
+    # From the identity cache; unknown users got a 404 from the JWT user lookup
+    return jsonify(current_user._asdict()), 200
 
 @auth_bp.route('/change-password', methods=['POST'])
 @jwt_required()
@@ -169,3 +216,8 @@ def change_password():
     db.session.commit()
     
     return jsonify({'message': 'Password changed successfully'}), 200
+
+@auth_bp.route('/identity-cache', methods=['GET'])
+def get_identity_cache_stats():
+    """Hit ratio and size of this worker's JWT identity cache"""
+    return jsonify(get_identity_cache().stats()), 200
@@ -0,0 +1,36 @@
+from flask import request, jsonify
+from app.routes import leaderboard_bp
+from app.services.leaderboard import DEFAULT_LIMIT, MODES, WINDOWS, top_scores
+
+@leaderboard_bp.route('', methods=['GET'])
+def get_leaderboard():
+    """
+    Each player's best score, ranked
+    
+    Query parameters: mode (normal or trivialer), category, difficulty,
+    window (day, week or month; omit for all time) and limit (max 100).
+    Served from the maintained leaderboard_entry and leaderboard_bucket
+    tables, so the cost depends on limit, not on how many scores exist.
+    Windows are per category only and start at midnight in
+    LEADERBOARD_TIMEZONE.
+    """
+    mode = request.args.get('mode', 'normal')
+    if mode not in MODES:
+        return jsonify({'message': f"mode must be one of {', '.join(MODES)}"}), 400
+    
+    category = request.args.get('category') or None
+    difficulty = request.args.get('difficulty', type=int)
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    window = request.args.get('window') or None
+    if window is not None and window not in WINDOWS:
+        return jsonify({'message': f"window must be one of {', '.join(WINDOWS)}"}), 400
+    if window is not None and difficulty:
+        return jsonify({'message': 'window leaderboards cannot be filtered by difficulty'}), 400
+    
+    return jsonify({
+        'mode': mode,
+        'category': category,
+        'difficulty': difficulty,
+        'window': window,
+        'leaderboard': top_scores(mode, category, difficulty, limit, window=window)
+    }), 200
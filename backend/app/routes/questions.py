@@ -1,32 +1,137 @@
-from flask import request, jsonify
+from flask import request, jsonify, make_response
 from app.routes import questions_bp
-from app.models.question import Question
-import random
+from app.services.opentdb_mirror import init_opentdb_mirror, get_opentdb_mirror
+from app.services.question_bank import get_bank_version, get_question_counts
+from app.services.question_cache import init_question_cache, get_question_cache
+from app.services.question_search import search_questions
+from app.services.question_snapshot import (
+    init_question_snapshots, get_question_snapshots, question_changes
+)
 
 # Import schema here instead of globally
-from app.schemas.question import QuestionSchema
+from app.schemas.question import QuestionSchema, question_serializer
 question_schema = QuestionSchema()
 questions_schema = QuestionSchema(many=True)
 
+@questions_bp.record_once
+def setup_question_cache(state):
+    # One cache per app, holding questions already serialized
+    init_question_cache(state.app, question_serializer)
+    init_question_snapshots(state.app, question_serializer)
+    init_opentdb_mirror(state.app)
+
 @questions_bp.route('', methods=['GET'])
 def get_questions():
     category = request.args.get('category')
     difficulty = request.args.get('difficulty')
-    amount = int(request.args.get('amount', 10))
+    amount = max(int(request.args.get('amount', 10)), 0)
+    
+    category = category or None
+    difficulty = int(difficulty) if difficulty else None
+    
+    # Served from pre-serialized questions; only cache misses hit the database
+    cache = get_question_cache()
+    questions = cache.sample(amount, category=category, difficulty=difficulty)
+    
+    # Top the pool up from the upstream in the background; never waited on here
+    mirror = get_opentdb_mirror()
+    if mirror is not None:
+        mirror.request_refill(category, difficulty, len(cache.sampler.pool(category, difficulty)))
+    
+    return jsonify({
+        'questions': questions
+    }), 200
+
+@questions_bp.route('/cache', methods=['GET'])
+def get_question_cache_stats():
+    """Hit/miss counters and size of this worker's question cache"""
+    return jsonify(get_question_cache().stats()), 200
+
+@questions_bp.route('/categories', methods=['GET'])
+def get_categories():
+    """
+    Categories with question counts per difficulty
     
-    query = Question.query
+    Counts come from the maintained question_count aggregate. They only move
+    with the bank version, so that is the ETag and a 304 costs one lookup.
+    """
+    version = get_bank_version()
+    etag = f"categories-{version}"
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        categories = {}
+        for category, difficulty, count in get_question_counts():
+            entry = categories.setdefault(category, {'name': category, 'total': 0, 'difficulties': {}})
+            entry['difficulties'][str(difficulty)] = count
+            entry['total'] += count
+        response = jsonify({
+            'version': version,
+            'categories': list(categories.values())
+        })
     
-    if category:
-        query = query.filter_by(category=category)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@questions_bp.route('/snapshot', methods=['GET'])
+def get_question_snapshot():
+    """
+    Whole question bank (or one category) for offline play
+    
+    Built once per bank version and served pre-compressed (br/gzip) with a
+    strong ETag; send it back in If-None-Match to get a 304 when unchanged.
+    Follow up with /changes?since=<version> to stay in sync.
+    """
+    snapshot = get_question_snapshots().get(request.args.get('category') or None)
+    
+    encoding = 'identity'
+    for candidate in ('br', 'gzip'):
+        if candidate in snapshot.bodies and candidate in request.accept_encodings:
+            encoding = candidate
+            break
+    etag = snapshot.etag(encoding)
+    
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(snapshot.bodies[encoding])
+        response.content_type = 'application/json'
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
     
-    if difficulty:
-        query = query.filter_by(difficulty=int(difficulty))
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@questions_bp.route('/changes', methods=['GET'])
+def get_question_changes():
+    """Questions changed and IDs deleted since a bank version from /snapshot"""
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({'message': 'since must be a bank version'}), 400
+    
+    version = get_bank_version()
+    questions, deleted = question_changes(
+        question_serializer, since, request.args.get('category') or None
+    )
     
-    questions = query.all()
+    return jsonify({
+        'version': version,
+        'questions': questions,
+        'deleted': deleted
+    }), 200
+
+@questions_bp.route('/search', methods=['GET'])
+def search_question_text():
+    """Full-text search over question text, best matches first"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'message': 'q is required'}), 400
     
-    if len(questions) > amount:
-        questions = random.sample(questions, amount)
+    results = search_questions(query, limit=request.args.get('limit', 20, type=int))
     
     return jsonify({
-        'questions': questions_schema.dump(questions)
-    }), 200
\ No newline at end of file
+        'results': results
+    }), 200
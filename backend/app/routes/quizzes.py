@@ -0,0 +1,59 @@
+from flask import request, jsonify
+from app import db
+from app.routes import quizzes_bp
+from app.models.quiz import QuizDeck
+from app.services.cursors import InvalidCursor
+from app.services.quiz_deck import create_deck, deck_expired, deck_page, decode_cursor
+
+def deck_response(deck, questions, next_cursor):
+    return {
+        'quiz': {
+            'id': deck.id,
+            'category': deck.category,
+            'difficulty': deck.difficulty,
+            'size': deck.size,
+            'page_size': deck.page_size
+        },
+        'questions': questions,
+        'next_cursor': next_cursor
+    }
+
+@quizzes_bp.route('', methods=['POST'])
+def create_quiz():
+    """
+    Create a quiz deck for a filter and return its first page
+    
+    The deck is a seeded shuffle of every matching question, so paging
+    through it with next_cursor does not repeat a question (unless matching
+    questions are deleted meanwhile). Decks expire after QUIZ_DECK_TTL.
+    """
+    data = request.get_json(silent=True) or {}
+    difficulty = data.get('difficulty')
+    
+    try:
+        deck = create_deck(
+            category=data.get('category') or None,
+            difficulty=int(difficulty) if difficulty else None,
+            page_size=int(data.get('page_size', 10))
+        )
+    except (TypeError, ValueError):
+        return jsonify({'message': 'difficulty and page_size must be integers'}), 400
+    
+    questions, next_cursor = deck_page(deck)
+    return jsonify(deck_response(deck, questions, next_cursor)), 201
+
+@quizzes_bp.route('/<int:quiz_id>/questions', methods=['GET'])
+def get_quiz_questions(quiz_id):
+    """Next page of a deck; pass the next_cursor from the previous page"""
+    deck = db.session.get(QuizDeck, quiz_id)
+    if not deck or deck_expired(deck):
+        return jsonify({'message': 'Quiz not found'}), 404
+    
+    cursor = request.args.get('cursor')
+    try:
+        offset = decode_cursor(deck, cursor) if cursor else 0
+    except InvalidCursor as err:
+        return jsonify({'message': str(err)}), 400
+    
+    questions, next_cursor = deck_page(deck, offset)
+    return jsonify(deck_response(deck, questions, next_cursor)), 200
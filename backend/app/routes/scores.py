@@ -1,15 +1,193 @@
-from flask import request, jsonify
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+from flask import current_app, request, jsonify, make_response
 from app import db
 from app.routes import scores_bp
-from app.models.score import Score
+from app.models.score import PlayerStats, Score
 from app.models.user import User
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import current_user, jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import UserLookupError
 from marshmallow import ValidationError
+from sqlalchemy import func, select, tuple_
+from app.services.cursors import InvalidCursor
+from app.services.identity_cache import get_identity_cache
+from app.services.leaderboard import MODES
+from app.services.player_stats import ROLLUP_COLUMNS, effective_score
+from app.services.score_batch import insert_scores, stored_score_ids
+from app.services.score_cache import (
+    GLOBAL_SCOPE, get_score_read_cache, init_score_read_cache, name_scope, note_score_writes,
+    user_scope
+)
+from app.services.score_histogram import score_percentile
+from app.services.score_queue import QueueFull, get_score_queue, init_score_queue
+from app.services.score_history import (
+    SCORE_PAGE_DEFAULT, SCORE_PAGE_MAX, decode_score_cursor, encode_score_cursor
+)
 
 # Import schema here instead of globally
-from app.schemas.score import ScoreSchema
+from app.schemas.score import ScoreSchema, score_serializer
 score_schema = ScoreSchema()
 scores_schema = ScoreSchema(many=True)
+# Loads plain dicts for set-based inserts
+score_row_schema = ScoreSchema(load_instance=False)
+
+@scores_bp.record_once
+def setup_score_services(state):
+    # The queue only when SCORE_WRITE_BEHIND is on; otherwise scores commit per request
+    init_score_queue(state.app)
+    init_score_read_cache(state.app)
+
+def enqueue_score(row, message):
+    """
+    Hand a validated score row to the write-behind queue
+    
+    Answers 202 once queued, or 201 with the stored id when the caller asked
+    to read its own write (?wait=1, default SCORE_READ_YOUR_WRITES). A full
+    queue answers 503 with Retry-After so clients back off.
+    """
+    row.pop('id', None)
+    row['date'] = row.get('date') or datetime.utcnow()
+    try:
+        future = get_score_queue().submit(row)
+    except QueueFull as err:
+        response = jsonify({'message': str(err)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    
+    wait = request.args.get('wait')
+    if wait is None:
+        wait = current_app.config.get('SCORE_READ_YOUR_WRITES', False)
+    else:
+        wait = wait.lower() in ('1', 'true', 'yes')
+    
+    score_id = None
+    if wait:
+        try:
+            score_id = future.result(timeout=current_app.config.get('SCORE_QUEUE_WAIT_TIMEOUT', 10))
+        except FutureTimeoutError:
+            pass
+    
+    result = score_serializer.dump_obj(Score(id=score_id, **row))
+    result['username'] = row['player_name']
+    return jsonify(with_percentiles({
+        'message': message,
+        'score': result,
+        'queued': score_id is None
+    }, row)), 202 if score_id is None else 201
+
+def with_percentiles(body, row):
+    """
+    Add the score's percentiles to a submission response on ?percentile=1
+    Opt-in: they read the histograms, and submissions otherwise only write
+    """
+    if request.args.get('percentile', '').lower() in ('1', 'true', 'yes'):
+        body['percentile'] = submission_percentiles(row)
+    return body
+
+def submission_percentiles(row):
+    """Share of games in the score's category each of its scores beats ("you beat 73%")"""
+    category = row.get('category') or None
+    result = {'category': category}
+    for mode in MODES:
+        value = row.get(f'{mode}_score') or row.get('score') or 0
+        result[mode] = score_percentile(db.session, mode, value, category)['percentile']
+    return result
+
+def with_score_fields(data):
+    """Fill normal/trivialer scores and the legacy score field (= normal_score)"""
+    normal_score = data.get('normal_score', 0)
+    trivialer_score = data.get('trivialer_score', 0)
+    
+    # Set legacy score field to normal_score for backward compatibility
+    data['score'] = normal_score
+    data['normal_score'] = normal_score
+    data['trivialer_score'] = trivialer_score
+    return data
+
+def score_rows_query(*criteria, limit=None, after=None):
+    """
+    SELECT of score rows (plus joined username) newest first, for score_serializer
+    `after` is a (date, id) keyset position; only older rows are returned,
+    so a page costs the same however deep it is. Served by the score
+    (user_id|player_name, date, id) and (date, id) indexes. Legacy scores
+    without a date come last on every database; a position among them has
+    date None.
+    """
+    stmt = (
+        select(*score_serializer.columns)
+        .select_from(Score)
+        .outerjoin(User, Score.user_id == User.id)
+        .where(*criteria)
+        .order_by(Score.date.desc().nulls_last(), Score.id.desc())
+    )
+    if after is not None:
+        date, score_id = after
+        if date is None:
+            stmt = stmt.where(Score.date.is_(None), Score.id < score_id)
+        else:
+            # Stops short of the undated rows; select_score_rows continues into them
+            stmt = stmt.where(tuple_(Score.date, Score.id) < tuple_(date, score_id))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def select_score_rows(*criteria, limit=None, after=None):
+    """
+    Score rows from score_rows_query (username comes from the join)
+    One query, plus one for the undated rows on the page where the dated
+    ones run out after a cursor
+    """
+    rows = db.session.execute(score_rows_query(*criteria, limit=limit, after=after)).all()
+    if after is not None and after[0] is not None and (limit is None or len(rows) < limit):
+        rest = None if limit is None else limit - len(rows)
+        rows += db.session.execute(score_rows_query(*criteria, Score.date.is_(None), limit=rest)).all()
+    return rows
+
+def format_stats(games, normal_score_sum, normal_score_max, trivialer_score_sum,
+                 trivialer_score_max, questions_answered, questions_correct):
+    """The ten /stats fields from running totals"""
+    # SUM comes back as Decimal on PostgreSQL
+    total_questions = int(questions_answered)
+    correct_answers = int(questions_correct)
+    average_normal_score = int(normal_score_sum) / games
+    return {
+        'total_games': games,
+        'average_normal_score': average_normal_score,
+        'average_trivialer_score': int(trivialer_score_sum) / games,
+        'highest_normal_score': normal_score_max,
+        'highest_trivialer_score': trivialer_score_max,
+        # Legacy fields for backward compatibility
+        'average_score': average_normal_score,
+        'highest_score': normal_score_max,
+        'total_questions': total_questions,
+        'correct_answers': correct_answers,
+        'accuracy': (correct_answers / total_questions * 100) if total_questions > 0 else 0
+    }
+
+def score_stats(*criteria):
+    """
+    /stats fields for the matching scores, from one aggregate query
+    Memory use does not depend on how many scores match
+    """
+    normal = effective_score(Score.normal_score)
+    trivialer = effective_score(Score.trivialer_score)
+    row = db.session.execute(select(
+        func.count(Score.id),
+        func.sum(normal),
+        func.max(normal),
+        func.sum(trivialer),
+        func.max(trivialer),
+        func.sum(func.coalesce(Score.questions_answered, 0)),
+        func.sum(func.coalesce(Score.questions_correct, 0)),
+    ).where(*criteria)).one()
+    return format_stats(*row) if row[0] else None
+
+def player_stats(**key):
+    """/stats fields for one player from the player_stats rollup (one indexed lookup)"""
+    row = db.session.execute(
+        select(*(PlayerStats.__table__.c[name] for name in ROLLUP_COLUMNS)).filter_by(**key)
+    ).first()
+    return format_stats(*row) if row and row[0] else None
 
 @scores_bp.route('', methods=['POST'])
 @jwt_required()
@@ -29,24 +207,18 @@ def add_score():
     - Scores are linked to the correct user
     - No one can submit fake scores for other users
     """
-    # Get authenticated user ID from JWT token
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
+    # Authenticated user from the JWT, via the identity cache (unknown users get a 404)
+    user = current_user
     
     data = request.get_json() or {}
     
     try:
-        # Extract scores
-        normal_score = data.get('normal_score', 0)
-        trivialer_score = data.get('trivialer_score', 0)
-        
-        # Set legacy score field to normal_score for backward compatibility
-        data['score'] = normal_score
-        data['normal_score'] = normal_score
-        data['trivialer_score'] = trivialer_score
+        data = with_score_fields(data)
+        if get_score_queue() is not None:
+            row = score_row_schema.load(data)
+            row['user_id'] = user.id
+            row['player_name'] = user.username
+            return enqueue_score(row, 'Score added successfully')
         
         # Validate and deserialize input
         score = score_schema.load(data)
@@ -56,16 +228,16 @@ def add_score():
         score.player_name = user.username  # Use authenticated user's nickname
         
         db.session.add(score)
+        # Serialize before the commit expires the score, saving a reload
+        db.session.flush()
+        result = score_serializer.dump_obj(score)
+        result['username'] = score.player_name
         db.session.commit()
         
-        result = score_schema.dump(score)
-        if isinstance(result, dict):
-            result['username'] = score.player_name
-        
-        return jsonify({
+        return jsonify(with_percentiles({
             'message': 'Score added successfully',
             'score': result
-        }), 201
+        }, result)), 201
         
     except ValidationError as err:
         return jsonify(err.messages), 400
@@ -80,14 +252,12 @@ def add_score_legacy():
     player_name = data.pop('player_name', None) or data.pop('username', None) or 'Guest'
     
     try:
-        # Extract scores
-        normal_score = data.get('normal_score', 0)
-        trivialer_score = data.get('trivialer_score', 0)
-        
-        # Set legacy score field to normal_score for backward compatibility
-        data['score'] = normal_score
-        data['normal_score'] = normal_score
-        data['trivialer_score'] = trivialer_score
+        data = with_score_fields(data)
+        if get_score_queue() is not None:
+            row = score_row_schema.load(data)
+            row['user_id'] = None
+            row['player_name'] = player_name
+            return enqueue_score(row, 'Score added successfully (legacy)')
         
         # Validate and deserialize input
         score = score_schema.load(data)
@@ -97,18 +267,142 @@ def add_score_legacy():
         db.session.add(score)
         db.session.commit()
         
-        result = score_schema.dump(score)
-        if isinstance(result, dict):
-            result['username'] = score.player_name
+        result = score_serializer.dump_obj(score)
+        result['username'] = score.player_name
         
-        return jsonify({
+        return jsonify(with_percentiles({
             'message': 'Score added successfully (legacy)',
             'score': result
-        }), 201
+        }, result)), 201
         
     except ValidationError as err:
         return jsonify(err.messages), 400
 
+@scores_bp.route('/batch', methods=['POST'])
+def add_scores_batch():
+    """
+    Submit several games at once, e.g. an offline queue or a retried request
+    
+    Body: {"games": [{...score fields..., "idempotency_key": "<client id>"}],
+    "player_name": "<nickname for guests>"}. With a JWT the games are linked
+    to the signed-in user, otherwise to player_name as in /legacy.
+    
+    Valid games are inserted with one statement; a game whose key was
+    already stored (a replay) is skipped. Each game gets a result with
+    status created, duplicate (with the stored score_id) or invalid.
+    """
+    data = request.get_json(silent=True) or {}
+    games = data.get('games')
+    max_items = current_app.config.get('SCORE_BATCH_MAX_ITEMS', 100)
+    if not isinstance(games, list) or not games:
+        return jsonify({'message': 'games must be a non-empty list'}), 400
+    if len(games) > max_items:
+        return jsonify({'message': f'At most {max_items} games per batch'}), 400
+    
+    # Loads the signed-in user's identity (a 404 if it no longer exists)
+    verify_jwt_in_request(optional=True)
+    user = current_user if get_jwt_identity() else None
+    default_name = data.get('player_name') or data.get('username') or 'Guest'
+    
+    results = []
+    rows = []
+    first_index = {}
+    for index, game in enumerate(games):
+        result = {'index': index}
+        results.append(result)
+        if not isinstance(game, dict):
+            result.update(status='invalid', errors={'_schema': ['Invalid input type.']})
+            continue
+        game = dict(game)
+        key = game.pop('idempotency_key', None)
+        result['idempotency_key'] = key
+        if not isinstance(key, str) or not 1 <= len(key) <= 64:
+            result.update(status='invalid',
+                          errors={'idempotency_key': ['A string of 1 to 64 characters is required.']})
+            continue
+        player_name = game.pop('player_name', None) or game.pop('username', None) or default_name
+        if key in first_index:
+            continue
+        
+        try:
+            row = score_row_schema.load(with_score_fields(game))
+        except ValidationError as err:
+            result.update(status='invalid', errors=err.messages)
+            continue
+        row.pop('id', None)
+        row['user_id'] = user.id if user else None
+        row['player_name'] = user.username if user else player_name
+        row['idempotency_key'] = key
+        rows.append(row)
+        first_index[key] = index
+    
+    connection = db.session.connection()
+    inserted = insert_scores(connection, rows)
+    stored = stored_score_ids(connection, first_index.keys() - inserted.keys())
+    note_score_writes(db.session, [row for row in rows if row['idempotency_key'] in inserted])
+    db.session.commit()
+    
+    for result in results:
+        if 'status' in result:
+            continue
+        key = result['idempotency_key']
+        if key in inserted and first_index[key] == result['index']:
+            result.update(status='created', score_id=inserted[key])
+        else:
+            result.update(status='duplicate', score_id=inserted.get(key) or stored.get(key))
+    
+    return jsonify({
+        'created': sum(1 for result in results if result['status'] == 'created'),
+        'results': results
+    }), 200
+
+def request_score_scope():
+    """
+    Whose scores a read is about: the signed-in user, else ?nickname=,
+    else everyone. An invalid token falls back to public access.
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except UserLookupError as err:
+        # A valid token of a deleted user reads that user's (empty) scores
+        user_id = err.jwt_data['sub']
+    except Exception:
+        user_id = None
+    if user_id:
+        return user_scope(user_id)
+    nickname = request.args.get('nickname')
+    return name_scope(nickname) if nickname else GLOBAL_SCOPE
+
+def cached_score_read(scope, build):
+    """
+    Serve a score read with an ETag from the scope's change marker
+    
+    If-None-Match with the current ETag gets a 304, and a repeat read
+    gets the cached body; within SCORE_CACHE_TTL neither touches the
+    database. Otherwise `build` makes the (jsonify response, status).
+    """
+    cache = get_score_read_cache()
+    etag = cache.etag(scope, request.full_path)
+    if request.if_none_match.contains(etag):
+        cache.count_not_modified()
+        response = make_response('', 304)
+    else:
+        body = cache.get(etag)
+        if body is None:
+            response, status = build()
+            if status != 200:
+                return response, status
+            body = response.get_data()
+            cache.put(etag, body)
+        response = current_app.response_class(body, mimetype='application/json')
+    
+    response.set_etag(etag)
+    # The scope depends on the token, so shared caches must key on it too
+    response.headers['Vary'] = 'Authorization'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @scores_bp.route('', methods=['GET'])
 def get_user_scores():
     """
@@ -120,51 +414,95 @@ def get_user_scores():
     Public access (no token):
     - Can specify nickname parameter to get specific user's scores
     - Or get general leaderboard if no nickname specified
+    
+    Paging: pass `limit` and/or `cursor` to get one page, newest first, plus
+    a `next_cursor` for the following page. Without them the full history
+    (or the 50 most recent scores globally) is returned as before.
+    
+    Responses carry an ETag; see cached_score_read.
     """
-    # Check if user is authenticated
-    try:
-        verify_jwt_in_request(optional=True)
-        user_id = get_jwt_identity()
-        
-        if user_id:
+    paged = 'limit' in request.args or 'cursor' in request.args
+    after = None
+    if paged:
+        limit = min(max(request.args.get('limit', SCORE_PAGE_DEFAULT, type=int), 1), SCORE_PAGE_MAX)
+        cursor = request.args.get('cursor')
+        try:
+            after = decode_score_cursor(cursor) if cursor else None
+        except InvalidCursor as err:
+            return jsonify({'message': str(err)}), 400
+    
+    scope = request_score_scope()
+    
+    def build():
+        kind, _, value = scope.partition(':')
+        if kind == 'user':
             # Authenticated user - get their scores
-            user = User.query.get(user_id)
+            user = get_identity_cache().get(value)
             if user:
-                scores = Score.query.filter_by(user_id=user.id).order_by(Score.date.desc()).all()
+                criteria = [Score.user_id == user.id]
                 print(f"Fetching authenticated user's scores: {user.username}")
             else:
-                scores = []
+                criteria = None
         else:
-            # Public access - use nickname parameter or get leaderboard
-            nickname = request.args.get('nickname')
-            print(f"Fetching scores for nickname: {nickname}")
-            
-            if nickname:
-                # Get scores for specific nickname
-                scores = Score.query.filter_by(player_name=nickname).order_by(Score.date.desc()).all()
-            else:
-                # Get all scores (for general leaderboard)
-                scores = Score.query.order_by(Score.date.desc()).limit(50).all()
-                
-    except Exception:
-        # Fallback to public access
-        nickname = request.args.get('nickname')
-        print(f"Fetching scores for nickname (fallback): {nickname}")
+            # Public access - scores for a specific nickname, or all scores (general leaderboard)
+            print(f"Fetching scores for nickname: {value or None}")
+            criteria = [Score.player_name == value] if kind == 'name' else []
         
-        if nickname:
-            scores = Score.query.filter_by(player_name=nickname).order_by(Score.date.desc()).all()
+        if criteria is None:
+            scores = []
+        elif paged:
+            # One extra row tells whether there is a next page
+            scores = select_score_rows(*criteria, limit=limit + 1, after=after)
         else:
-            scores = Score.query.order_by(Score.date.desc()).limit(50).all()
+            scores = select_score_rows(*criteria, limit=None if criteria else 50)
+        
+        next_cursor = None
+        if paged and len(scores) > limit:
+            scores = scores[:limit]
+            next_cursor = encode_score_cursor(scores[-1])
+        
+        # Rows already carry username (player_name or linked user)
+        result = score_serializer.dump_rows(scores)
+        
+        print(f"Returning {len(result)} scores")
+        
+        if paged:
+            return jsonify({
+                'scores': result,
+                'next_cursor': next_cursor
+            }), 200
+        return jsonify({
+            'scores': result
+        }), 200
     
-    # Add username to each score (player_name or linked user)
-    result = scores_schema.dump(scores)
-    for score_data, score_obj in zip(result, scores):
-        score_data['username'] = score_obj.player_name or (score_obj.user.username if score_obj.user else None)
-
-    print(f"Returning {len(result)} scores")
+    return cached_score_read(scope, build)
 
+@scores_bp.route('/percentile', methods=['GET'])
+def get_score_percentile():
+    """
+    Percentage of stored games a score beats
+    
+    Query parameters: score (required), mode (normal or trivialer),
+    category and difficulty. Served from the per-scope score histograms,
+    so a lookup reads a bounded number of rows however many scores exist;
+    max_error bounds how far percentile can be below the exact share.
+    """
+    score = request.args.get('score', type=int)
+    if score is None:
+        return jsonify({'message': 'score must be an integer'}), 400
+    mode = request.args.get('mode', 'normal')
+    if mode not in MODES:
+        return jsonify({'message': f"mode must be one of {', '.join(MODES)}"}), 400
+    category = request.args.get('category') or None
+    difficulty = request.args.get('difficulty', type=int)
+    
+    result = score_percentile(db.session, mode, score, category, difficulty)
     return jsonify({
-        'scores': result
+        'score': score,
+        'mode': mode,
+        'category': category,
+        'difficulty': difficulty,
+        **result
     }), 200
 
 @scores_bp.route('/stats', methods=['GET'])
@@ -178,87 +516,51 @@ def get_user_stats():
     Public access (no token):
     - Can specify nickname parameter to get specific user's stats
     - Or get global stats if no nickname specified
+    
+    Responses carry an ETag; see cached_score_read.
     """
-    # Check if user is authenticated
-    try:
-        verify_jwt_in_request(optional=True)
-        user_id = get_jwt_identity()
-        
-        if user_id:
+    scope = request_score_scope()
+    
+    def build():
+        kind, _, value = scope.partition(':')
+        if kind == 'user':
             # Authenticated user - get their stats
-            user = User.query.get(user_id)
+            user = get_identity_cache().get(value)
             if user:
-                scores = Score.query.filter_by(user_id=user.id).all()
+                stats = player_stats(user_id=user.id)
                 print(f"Fetching authenticated user's stats: {user.username}")
             else:
-                scores = []
+                stats = None
+        elif kind == 'name':
+            # Get stats for specific nickname
+            print(f"Fetching stats for nickname: {value}")
+            stats = player_stats(player_name=value)
         else:
-            # Public access - use nickname parameter or get global stats
-            nickname = request.args.get('nickname')
-            print(f"Fetching stats for nickname: {nickname}")
-            
-            if nickname:
-                # Get stats for specific nickname
-                scores = Score.query.filter_by(player_name=nickname).all()
-            else:
-                # Get global stats
-                scores = Score.query.all()
-                
-    except Exception:
-        # Fallback to public access
-        nickname = request.args.get('nickname')
-        print(f"Fetching stats for nickname (fallback): {nickname}")
+            # Get global stats
+            stats = score_stats()
         
-        if nickname:
-            scores = Score.query.filter_by(player_name=nickname).all()
-        else:
-            scores = Score.query.all()
-    
-    if not scores:
-        print("No scores found, returning zeroed stats")
-        return jsonify({
-            'total_games': 0,
-            'average_normal_score': 0,
-            'average_trivialer_score': 0,
-            'highest_normal_score': 0,
-            'highest_trivialer_score': 0,
-            'average_score': 0,
-            'highest_score': 0,
-            'total_questions': 0,
-            'correct_answers': 0,
-            'accuracy': 0
-        }), 200
-    
-    total_games = len(scores)
-    
-    # Calculate stats for both score types
-    normal_scores = [s.normal_score or s.score or 0 for s in scores]
-    trivialer_scores = [s.trivialer_score or s.score or 0 for s in scores]
-    
-    average_normal_score = sum(normal_scores) / total_games
-    average_trivialer_score = sum(trivialer_scores) / total_games
-    highest_normal_score = max(normal_scores)
-    highest_trivialer_score = max(trivialer_scores)
-    
-    # Legacy fields for backward compatibility
-    average_score = average_normal_score
-    highest_score = highest_normal_score
+        if stats is None:
+            print("No scores found, returning zeroed stats")
+            return jsonify({
+                'total_games': 0,
+                'average_normal_score': 0,
+                'average_trivialer_score': 0,
+                'highest_normal_score': 0,
+                'highest_trivialer_score': 0,
+                'average_score': 0,
+                'highest_score': 0,
+                'total_questions': 0,
+                'correct_answers': 0,
+                'accuracy': 0
+            }), 200
+        
+        print(f"Returning stats: {stats}")
+        
+        return jsonify(stats), 200
     
-    total_questions = sum(s.questions_answered or 0 for s in scores)
-    correct_answers = sum(s.questions_correct or 0 for s in scores)
-    accuracy = (correct_answers / total_questions * 100) if total_questions > 0 else 0
+    return cached_score_read(scope, build)
 
-    print(f"Returning stats: total_games={total_games}, average_normal_score={average_normal_score}, average_trivialer_score={average_trivialer_score}, highest_normal_score={highest_normal_score}, highest_trivialer_score={highest_trivialer_score}, average_score={average_score}, highest_score={highest_score}, total_questions={total_questions}, correct_answers={correct_answers}, accuracy={accuracy}")
-    
-    return jsonify({
-        'total_games': total_games,
-        'average_normal_score': average_normal_score,
-        'average_trivialer_score': average_trivialer_score,
-        'highest_normal_score': highest_normal_score,
-        'highest_trivialer_score': highest_trivialer_score,
-        'average_score': average_score,
-        'highest_score': highest_score,
-        'total_questions': total_questions,
-        'correct_answers': correct_answers,
-        'accuracy': accuracy
-    }), 200
+@scores_bp.route('/cache', methods=['GET'])
+def get_score_cache_stats():
+    """Hit/miss counters and size of this worker's score read cache"""
+    return jsonify(get_score_read_cache().stats()), 200
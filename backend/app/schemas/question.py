@@ -1,19 +1,21 @@
 from app.schemas import ma
-from app.models.question import Question
-from marshmallow import fields, post_dump
+from app.schemas.compiled import CompiledSerializer
+from app.models.question import Question, decode_answer_list
+from marshmallow import fields
+
+class AnswerList(fields.Raw):
+    """Stored as a JSON list, so dumping is a pass-through; loads also accept 'a|b|c'"""
+    
+    def _deserialize(self, value, attr, data, **kwargs):
+        return decode_answer_list(value)
 
 class QuestionSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Question
         load_instance = True
+        exclude = ('text_hash', 'version')
     
-    # Custom field for incorrect_answers to convert from string to list
-    incorrect_answers = fields.Method("get_incorrect_answers", "set_incorrect_answers")
-    
-    def get_incorrect_answers(self, obj):
-        return obj.incorrect_answers.split('|')
-    
-    def set_incorrect_answers(self, value):
-        if isinstance(value, list):
-            return '|'.join(value)
-        return value
\ No newline at end of file
+    incorrect_answers = AnswerList(required=True)
+
+# Generated equivalent of QuestionSchema().dump for hot paths
+question_serializer = CompiledSerializer(QuestionSchema(), Question)
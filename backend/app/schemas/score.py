@@ -1,15 +1,27 @@
 from app.schemas import ma
+from app.schemas.compiled import CompiledSerializer
 from app.models.score import Score
+from app.models.user import User
 from marshmallow import fields
+from sqlalchemy import func
 
 class ScoreSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Score
         load_instance = True
         include_fk = True
+        exclude = ('idempotency_key',)
     
     # Format date as ISO string
     date = fields.DateTime(format="%Y-%m-%dT%H:%M:%S")
     
     # Include username in serialized output
-    username = fields.String(dump_only=True)
\ No newline at end of file
+    username = fields.String(dump_only=True)
+
+# Generated equivalent of ScoreSchema().dump for hot paths
+# Rows must be selected from Score outer-joined to User so that username
+# matches `player_name or user.username`
+score_serializer = CompiledSerializer(
+    ScoreSchema(), Score,
+    extra_columns={'username': func.coalesce(func.nullif(Score.player_name, ''), User.username)}
+)
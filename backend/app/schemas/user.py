@@ -1,4 +1,5 @@
 from app.schemas import ma
+from app.schemas.compiled import CompiledSerializer
 from app.models.user import User
 from marshmallow import fields, ValidationError
 import re
@@ -6,7 +7,7 @@ import re
 class UserSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = User
-        exclude = ('password_hash',)
+        exclude = ('password_hash', 'username_lower')
         load_instance = True
     
     # Add fields that aren't in the model
@@ -18,4 +19,7 @@ class UserSchema(ma.SQLAlchemyAutoSchema):
     def validate_password(self, value):
         if len(value) < 8:
             raise ValidationError('Password must be at least 8 characters long')
-        return value
\ No newline at end of file
+        return value
+
+# Generated equivalent of UserSchema().dump for hot paths
+user_serializer = CompiledSerializer(UserSchema(), User)
@@ -0,0 +1 @@
+# Helpers shared by the route modules (sampling, caching, bulk loading)
@@ -0,0 +1,198 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, jsonify, request
+
+DEFAULT_QUEUE_TIMEOUT = 1.0
+DEFAULT_MAX_CLIENTS = 10000
+
+
+class ConcurrencyLimit:
+    """
+    At most `limit` requests of a blueprint or route in flight per worker
+
+    Up to `queue` more wait for a slot, for at most `timeout` seconds; a
+    request finding the queue full is rejected at once, so slow endpoints
+    cannot take every gunicorn thread while cheap ones time out behind them.
+    """
+
+    def __init__(self, name, limit, queue=0, timeout=DEFAULT_QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self._slots = threading.Semaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if there is room; False if the request should be shed"""
+        admitted = self._slots.acquire(blocking=False)
+        if not admitted:
+            with self._lock:
+                if self.waiting >= self.queue:
+                    self.rejected += 1
+                    return False
+                self.waiting += 1
+            try:
+                admitted = self._slots.acquire(timeout=self.timeout)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+                    if not admitted:
+                        self.timed_out += 1
+            if not admitted:
+                return False
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'queue': self.queue,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+            }
+
+
+class RateLimit:
+    """
+    Token buckets per client address: `burst` requests at once, refilled at
+    `rate` per second. Buckets of the least recently seen clients beyond
+    `max_clients` are dropped (a dropped client starts with a full bucket).
+    """
+
+    def __init__(self, name, rate, burst, max_clients=DEFAULT_MAX_CLIENTS):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def take(self, client):
+        """Spend a token of `client`; 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.rejected += 1
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'clients': len(self._buckets),
+                'allowed': self.allowed,
+                'rejected': self.rejected,
+            }
+
+
+class AdmissionControl:
+    """
+    Per-worker concurrency limits and rate limits, checked before each request
+
+    `limits` and `rate_limits` are keyed by blueprint name ('auth') or
+    endpoint ('auth.register_nickname'); an endpoint's own entry replaces
+    its blueprint's. Rate-limited requests get a 429 and shed ones a 503,
+    both with Retry-After.
+    """
+
+    def __init__(self, limits=None, rate_limits=None, queue_timeout=DEFAULT_QUEUE_TIMEOUT,
+                 max_clients=DEFAULT_MAX_CLIENTS):
+        self.limits = {
+            name: ConcurrencyLimit(name, options['concurrency'], options.get('queue', 0),
+                                   options.get('timeout', queue_timeout))
+            for name, options in (limits or {}).items()
+        }
+        self.rate_limits = {
+            name: RateLimit(name, options['rate'], options['burst'], max_clients)
+            for name, options in (rate_limits or {}).items()
+        }
+
+    def _lookup(self, entries):
+        return entries.get(request.endpoint) or entries.get(request.blueprint)
+
+    def admit(self):
+        """before_request hook: a 429/503 response, or None to go ahead"""
+        if request.endpoint is None or request.method == 'OPTIONS':
+            return None
+        rate_limit = self._lookup(self.rate_limits)
+        if rate_limit is not None:
+            wait = rate_limit.take(request.remote_addr or '')
+            if wait:
+                return retry_later('Too many requests, slow down', 429, wait)
+        limit = self._lookup(self.limits)
+        if limit is not None:
+            if not limit.acquire():
+                return retry_later('Server busy, try again shortly', 503, limit.timeout)
+            g.admission_limit = limit
+        return None
+
+    def finish(self, exc=None):
+        """teardown_request hook: free the request's slot"""
+        limit = g.pop('admission_limit', None)
+        if limit is not None:
+            limit.release()
+
+    def stats(self):
+        return {
+            'limits': {name: limit.stats() for name, limit in self.limits.items()},
+            'rate_limits': {name: rate_limit.stats() for name, rate_limit in self.rate_limits.items()},
+        }
+
+
+def retry_later(message, status, seconds):
+    response = jsonify({'message': message})
+    response.headers['Retry-After'] = str(max(1, math.ceil(seconds)))
+    return response, status
+
+
+def init_admission_control(app):
+    """Install admission control on the app (after its blueprints) when ADMISSION_CONTROL is on"""
+    if not app.config.get('ADMISSION_CONTROL'):
+        app.extensions['admission_control'] = None
+        return
+    admission = AdmissionControl(
+        limits=app.config.get('ADMISSION_LIMITS'),
+        rate_limits=app.config.get('RATE_LIMITS'),
+        queue_timeout=app.config.get('ADMISSION_QUEUE_TIMEOUT', DEFAULT_QUEUE_TIMEOUT),
+        max_clients=app.config.get('RATE_LIMIT_MAX_CLIENTS', DEFAULT_MAX_CLIENTS),
+    )
+    app.extensions['admission_control'] = admission
+    app.before_request(admission.admit)
+    app.teardown_request(admission.finish)
+
+
+def get_admission_control():
+    return current_app.extensions.get('admission_control')
@@ -0,0 +1,11 @@
+from flask import current_app
+from itsdangerous import URLSafeSerializer
+
+
+class InvalidCursor(ValueError):
+    """A paging cursor that was tampered with or made for another listing"""
+
+
+def cursor_serializer(salt):
+    """Signs opaque paging cursors; `salt` keeps one listing's cursors out of another"""
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=salt)
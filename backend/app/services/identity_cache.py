@@ -0,0 +1,127 @@
+import time
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from flask import current_app, has_app_context, jsonify
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import db, jwt
+from app.models.user import User
+
+DEFAULT_TTL = 300.0
+DEFAULT_MAX_ITEMS = 10000
+
+# What authenticated routes need of a user; `/me` returns it as is
+Identity = namedtuple('Identity', ['id', 'username', 'email'])
+
+
+class IdentityCache:
+    """
+    Per-worker cache of JWT identities (user id -> Identity)
+
+    Flask-JWT-Extended loads `current_user` through it, so authenticated
+    requests stop reading the user row every time. Entries expire after
+    `ttl` seconds and the least recently used go once there are more than
+    `max_items`. Users changed or deleted through the ORM in this worker
+    are dropped when the change commits; changes made elsewhere show up
+    within `ttl`. Missing users are not cached.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_items=DEFAULT_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id):
+        """The Identity of a user id (int or JWT sub string), or None if there is no such user"""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        row = db.session.execute(
+            select(User.id, User.username, User.email).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        identity = Identity(*row)
+        with self._lock:
+            self._entries[user_id] = (identity, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return identity
+
+    def invalidate(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_items': self.max_items,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def init_identity_cache(app):
+    app.extensions['identity_cache'] = IdentityCache(
+        ttl=app.config.get('IDENTITY_CACHE_TTL', DEFAULT_TTL),
+        max_items=app.config.get('IDENTITY_CACHE_MAX_ITEMS', DEFAULT_MAX_ITEMS),
+    )
+
+
+def get_identity_cache():
+    return current_app.extensions['identity_cache']
+
+
+@jwt.user_lookup_loader
+def _load_identity(jwt_header, jwt_data):
+    return get_identity_cache().get(jwt_data['sub'])
+
+
+@jwt.user_lookup_error_loader
+def _identity_not_found(jwt_header, jwt_data):
+    return jsonify({'message': 'User not found'}), 404
+
+
+@event.listens_for(Session, 'before_flush')
+def _note_changed_users(session, flush_context, instances):
+    user_ids = {obj.id for obj in (*session.dirty, *session.deleted)
+                if isinstance(obj, User) and obj.id is not None}
+    if user_ids:
+        session.info.setdefault('changed_user_ids', set()).update(user_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    user_ids = session.info.pop('changed_user_ids', None)
+    if user_ids and has_app_context():
+        cache = current_app.extensions.get('identity_cache')
+        if cache is not None:
+            cache.invalidate(user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,403 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from flask import current_app
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, and_, bindparam, case, cast, delete,
+    event, func, literal, select
+)
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.score import LeaderboardBucket, LeaderboardEntry, Score
+from app.models.user import User
+from app.services.player_stats import effective_score, score_getter
+from app.services.upsert import upsert_insert
+
+entry_table = LeaderboardEntry.__table__
+bucket_table = LeaderboardBucket.__table__
+
+MODES = ('normal', 'trivialer')
+ALL_CATEGORIES = ''
+ALL_DIFFICULTIES = 0
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+WINDOWS = ('day', 'week', 'month')
+# Periods kept per window, current one included (LEADERBOARD_WINDOW_RETENTION)
+DEFAULT_WINDOW_RETENTION = {'day': 31, 'week': 26, 'month': 24}
+ENTRY_IDENTITY = ('mode', 'category', 'difficulty', 'player_key')
+BUCKET_IDENTITY = ('period', 'period_start', 'mode', 'category', 'player_key')
+# Replaced together when a player beats their stored best
+BEST_COLUMNS = ('score', 'score_id', 'achieved_at', 'user_id', 'player_name')
+# Keep IN (...) lists well below SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+REBUILD_CHUNK_SIZE = 10000
+
+
+def player_key(user_id, player_name):
+    """Leaderboard identity: the account if signed in, else the nickname"""
+    if user_id is not None:
+        return f'user:{user_id}'
+    if player_name is not None:
+        return f'name:{player_name}'
+    return None
+
+
+def scopes(category, difficulty):
+    """Every (category, difficulty) leaderboard a score with these values belongs to"""
+    result = [(ALL_CATEGORIES, ALL_DIFFICULTIES)]
+    if category:
+        result.append((category, ALL_DIFFICULTIES))
+    if difficulty:
+        result.append((ALL_CATEGORIES, difficulty))
+    if category and difficulty:
+        result.append((category, difficulty))
+    return result
+
+
+def _local_date(moment, tz):
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(tz).date()
+
+
+def _period_start(window, day):
+    if window == 'day':
+        return day
+    if window == 'week':
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def window_start(window, moment, tz):
+    """Local date the `window` period holding `moment` (naive UTC) starts on; weeks start Monday"""
+    return _period_start(window, _local_date(moment, tz))
+
+
+def _periods_before(window, start, count):
+    """Start of the period `count` periods before the one starting on `start`"""
+    if window == 'day':
+        return start - timedelta(days=count)
+    if window == 'week':
+        return start - timedelta(weeks=count)
+    months = start.year * 12 + start.month - 1 - count
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def window_settings():
+    """(timezone, {window: periods kept}) from the app config"""
+    retention = dict(DEFAULT_WINDOW_RETENTION)
+    retention.update(current_app.config.get('LEADERBOARD_WINDOW_RETENTION') or {})
+    return ZoneInfo(current_app.config.get('LEADERBOARD_TIMEZONE') or 'UTC'), retention
+
+
+def oldest_kept_periods(tz, retention, now=None):
+    """{window: start of the oldest period still kept}"""
+    now = now or datetime.utcnow()
+    return {
+        window: _periods_before(window, window_start(window, now, tz), max(retention[window], 1) - 1)
+        for window in WINDOWS
+    }
+
+
+def _entry_bests(scores):
+    """{(mode, category, difficulty, player_key): best entry} for new scores"""
+    best = {}
+    for score in scores:
+        get = score_getter(score)
+        key = player_key(get('user_id'), get('player_name'))
+        if key is None:
+            continue
+        for mode in MODES:
+            value = get(f'{mode}_score') or get('score') or 0
+            for category, difficulty in scopes(get('category'), get('difficulty')):
+                entry_key = (mode, category, difficulty, key)
+                # Ties keep the earlier score
+                if entry_key not in best or value > best[entry_key]['score']:
+                    best[entry_key] = {
+                        'mode': mode, 'category': category, 'difficulty': difficulty,
+                        'player_key': key, 'user_id': get('user_id'),
+                        'player_name': get('player_name'), 'score': value,
+                        'score_id': get('id'), 'achieved_at': get('date'),
+                    }
+    return best
+
+
+def _bucket_bests(scores, tz, oldest, best=None):
+    """
+    {(period, period_start, mode, category, player_key): best bucket row}
+    Scores dated before the oldest kept period of a window are left out of
+    it. Pass `best` to fold more scores into an earlier result.
+    """
+    best = {} if best is None else best
+    for score in scores:
+        get = score_getter(score)
+        user_id, player_name, moment = get('user_id'), get('player_name'), get('date')
+        key = player_key(user_id, player_name)
+        if key is None or moment is None:
+            continue
+        category = get('category')
+        categories = (ALL_CATEGORIES, category) if category else (ALL_CATEGORIES,)
+        legacy = get('score')
+        values = [(mode, get(f'{mode}_score') or legacy or 0) for mode in MODES]
+        day = _local_date(moment, tz)
+        for window in WINDOWS:
+            start = _period_start(window, day)
+            if start < oldest[window]:
+                continue
+            for mode, value in values:
+                for scope in categories:
+                    entry_key = (window, start, mode, scope, key)
+                    current = best.get(entry_key)
+                    # Ties keep the earlier score
+                    if current is None or value > current['score']:
+                        best[entry_key] = {
+                            'period': window, 'period_start': start, 'mode': mode,
+                            'category': scope, 'player_key': key, 'user_id': user_id,
+                            'player_name': player_name, 'score': value,
+                            'score_id': get('id'), 'achieved_at': moment,
+                        }
+    return best
+
+
+def _raise_bests(connection, table, identity, best, *criteria):
+    """
+    Store `best` ({identity values: row}) in `table` where it beats what is stored
+    `identity` ends with player_key; `criteria` narrow the lookup of stored rows
+    on dialects without ON CONFLICT.
+    """
+    if not best:
+        return
+    insert = upsert_insert(connection, table)
+    if insert is not None:
+        # The score guard keeps a concurrent higher score from being overwritten
+        connection.execute(insert.on_conflict_do_update(
+            index_elements=list(identity),
+            set_={name: insert.excluded[name] for name in BEST_COLUMNS},
+            where=table.c.score < insert.excluded.score
+        ), list(best.values()))
+        return
+    columns = [table.c[name] for name in identity]
+
+    # No ON CONFLICT: current bests of these players, in one query per chunk of players
+    players = sorted({entry_key[-1] for entry_key in best})
+    current = {}
+    for start in range(0, len(players), LOOKUP_CHUNK_SIZE):
+        rows = connection.execute(
+            select(*columns, table.c.score)
+            .where(table.c.player_key.in_(players[start:start + LOOKUP_CHUNK_SIZE]), *criteria)
+        )
+        current.update((tuple(row[:-1]), row[-1]) for row in rows)
+
+    inserts = [entry for entry_key, entry in best.items() if entry_key not in current]
+    updates = [
+        {f'b_{name}': value for name, value in entry.items()}
+        for entry_key, entry in best.items()
+        if entry_key in current and entry['score'] > current[entry_key]
+    ]
+    if inserts:
+        connection.execute(table.insert(), inserts)
+    if updates:
+        # The score guard keeps a concurrent higher score from being overwritten
+        connection.execute(
+            table.update()
+            .where(*(column == bindparam(f'b_{column.name}') for column in columns),
+                   table.c.score < bindparam('b_score'))
+            .values(
+                score=bindparam('b_score'), score_id=bindparam('b_score_id'),
+                achieved_at=bindparam('b_achieved_at'), user_id=bindparam('b_user_id'),
+                player_name=bindparam('b_player_name'),
+            ),
+            updates
+        )
+
+
+def update_leaderboard(connection, scores):
+    """
+    Raise players' best scores, all-time and per time window, for new scores
+    (Score objects or row dicts with their id and date set). Must run in the
+    transaction that inserts them; ORM inserts do this through the
+    after_flush hook below.
+    """
+    _raise_bests(connection, entry_table, ENTRY_IDENTITY, _entry_bests(scores))
+
+    tz, retention = window_settings()
+    oldest = oldest_kept_periods(tz, retention)
+    best = _bucket_bests(scores, tz, oldest)
+    if best:
+        since = min(entry_key[1] for entry_key in best)
+        _raise_bests(connection, bucket_table, BUCKET_IDENTITY, best,
+                     bucket_table.c.period_start >= since)
+
+
+@event.listens_for(Session, 'after_flush')
+def _rank_new_scores(session, flush_context):
+    # After the flush so score IDs and default dates are assigned
+    scores = [obj for obj in session.new if isinstance(obj, Score)]
+    if scores:
+        update_leaderboard(session.connection(), scores)
+
+
+def top_scores(mode='normal', category=None, difficulty=None, limit=DEFAULT_LIMIT, connection=None,
+               window=None, now=None):
+    """
+    Best score per player in a scope, ranked (score, then earliest first)
+    With `window` ('day', 'week' or 'month') only scores from the current
+    period count (the one holding `now`); windows are per category only, so
+    `difficulty` is ignored for them. Reads `limit` entries off a rank index.
+    """
+    if window is None:
+        table = entry_table
+        scope = (entry_table.c.difficulty == (difficulty or ALL_DIFFICULTIES),)
+    else:
+        tz, _ = window_settings()
+        table = bucket_table
+        scope = (
+            bucket_table.c.period == window,
+            bucket_table.c.period_start == window_start(window, now or datetime.utcnow(), tz),
+        )
+    stmt = (
+        select(
+            func.coalesce(table.c.player_name, User.username).label('username'),
+            table.c.user_id,
+            table.c.score,
+            table.c.score_id,
+            table.c.achieved_at,
+        )
+        .select_from(table)
+        .outerjoin(User, table.c.user_id == User.id)
+        .where(
+            *scope,
+            table.c.mode == mode,
+            table.c.category == (category or ALL_CATEGORIES),
+        )
+        .order_by(table.c.score.desc(), table.c.achieved_at, table.c.score_id)
+        .limit(min(max(limit, 1), MAX_LIMIT))
+    )
+    rows = (connection or db.session).execute(stmt)
+    return [
+        {'rank': rank, 'username': row.username, 'user_id': row.user_id, 'score': row.score,
+         'score_id': row.score_id,
+         'date': row.achieved_at.isoformat() if row.achieved_at else None}
+        for rank, row in enumerate(rows, start=1)
+    ]
+
+
+def prune_leaderboard_buckets(connection, now=None):
+    """Delete window buckets older than LEADERBOARD_WINDOW_RETENTION; returns rows deleted"""
+    tz, retention = window_settings()
+    oldest = oldest_kept_periods(tz, retention, now)
+    deleted = 0
+    for window in WINDOWS:
+        deleted += connection.execute(
+            delete(bucket_table).where(bucket_table.c.period == window,
+                                       bucket_table.c.period_start < oldest[window])
+        ).rowcount
+    return deleted
+
+
+def rebuild_leaderboard_buckets(connection, now=None):
+    """
+    Recompute leaderboard_bucket from the score table; returns rows written
+
+    Period boundaries depend on LEADERBOARD_TIMEZONE, which SQL cannot
+    apply portably, so the scores of the kept periods are streamed in
+    (date, id) order off the date index and bucketed here. Run it after
+    changing the timezone.
+    """
+    tz, retention = window_settings()
+    oldest = oldest_kept_periods(tz, retention, now)
+    # Earliest instant any kept period can start, with a day of slack for the UTC offset
+    since = datetime.combine(min(oldest.values()), datetime.min.time()) - timedelta(days=1)
+    rows = connection.execute(
+        select(Score.id, Score.user_id, Score.player_name, Score.normal_score,
+               Score.trivialer_score, Score.score, Score.category, Score.date)
+        .where(Score.date >= since)
+        .order_by(Score.date, Score.id)
+        .execution_options(yield_per=REBUILD_CHUNK_SIZE)
+    )
+    best = {}
+    for chunk in rows.partitions():
+        _bucket_bests(chunk, tz, oldest, best)
+
+    connection.execute(delete(bucket_table))
+    entries = list(best.values())
+    for start in range(0, len(entries), REBUILD_CHUNK_SIZE):
+        connection.execute(bucket_table.insert(), entries[start:start + REBUILD_CHUNK_SIZE])
+    return len(entries)
+
+
+def _best_per_player(source, partition):
+    """Rows of `source` ranked 1 within each partition by score, then date, then id"""
+    row_number = func.row_number().over(
+        partition_by=partition,
+        order_by=(source.c.score.desc(), source.c.achieved_at, source.c.score_id),
+    ).label('position')
+    ranked = select(*source.c, row_number).subquery()
+    return select(*(ranked.c[name] for name in source.c.keys())).where(ranked.c.position == 1)
+
+
+def rebuild_leaderboard(connection):
+    """
+    Recompute leaderboard_entry from the score table; returns rows written
+
+    The score table is scanned once per mode into per-(player, category,
+    difficulty) bests; the coarser scopes are then derived from those,
+    which are far fewer than the scores.
+    """
+    connection.execute(delete(entry_table))
+    staging = Table(
+        'leaderboard_staging', MetaData(),
+        Column('mode', String(10)), Column('category', String(100)),
+        Column('difficulty', Integer), Column('player_key', String(140)),
+        Column('user_id', Integer), Column('player_name', String(120)),
+        Column('score', Integer), Column('score_id', Integer), Column('achieved_at', DateTime),
+        prefixes=['TEMPORARY'],
+    )
+    staging.create(connection)
+    try:
+        key = case(
+            (Score.user_id.isnot(None), literal('user:').concat(cast(Score.user_id, String))),
+            else_=literal('name:').concat(Score.player_name),
+        )
+        for mode in MODES:
+            scores = select(
+                literal(mode).label('mode'),
+                func.coalesce(Score.category, ALL_CATEGORIES).label('category'),
+                func.coalesce(Score.difficulty, ALL_DIFFICULTIES).label('difficulty'),
+                key.label('player_key'),
+                Score.user_id.label('user_id'),
+                Score.player_name.label('player_name'),
+                effective_score(getattr(Score, f'{mode}_score')).label('score'),
+                Score.id.label('score_id'),
+                Score.date.label('achieved_at'),
+            ).where(
+                (Score.user_id.isnot(None)) | (Score.player_name.isnot(None))
+            ).subquery()
+            best = _best_per_player(
+                scores, (scores.c.player_key, scores.c.category, scores.c.difficulty)
+            )
+            connection.execute(staging.insert().from_select(list(staging.c.keys()), best))
+
+        s = staging.c
+        has_category = s.category != ALL_CATEGORIES
+        has_difficulty = s.difficulty != ALL_DIFFICULTIES
+        scope_rules = [
+            # (category expression, difficulty expression, rows included)
+            (s.category, s.difficulty, and_(has_category, has_difficulty)),
+            (s.category, literal(ALL_DIFFICULTIES), has_category),
+            (literal(ALL_CATEGORIES), s.difficulty, has_difficulty),
+            (literal(ALL_CATEGORIES), literal(ALL_DIFFICULTIES), literal(True)),
+        ]
+        for category, difficulty, included in scope_rules:
+            scoped = select(
+                s.mode, category.label('category'), difficulty.label('difficulty'),
+                s.player_key, s.user_id, s.player_name, s.score, s.score_id, s.achieved_at,
+            ).where(included).subquery()
+            best = _best_per_player(
+                scoped, (scoped.c.mode, scoped.c.player_key, scoped.c.category, scoped.c.difficulty)
+            )
+            connection.execute(entry_table.insert().from_select(list(staging.c.keys()), best))
+    finally:
+        staging.drop(connection)
+    return connection.execute(select(func.count()).select_from(entry_table)).scalar()
@@ -0,0 +1,261 @@
+import json
+import os
+import shutil
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from flask import current_app, request
+from sqlalchemy import event
+
+from app import db
+
+# Upper bounds (Prometheus `le`) of the histogram buckets; +Inf is implied
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+HISTOGRAMS = {
+    'latency': LATENCY_BUCKETS,
+    'size': SIZE_BUCKETS,
+    'queries': QUERY_BUCKETS,
+}
+DEFAULT_FLUSH_INTERVAL = 5.0
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def new_series():
+    series = {name: [0] * (len(bounds) + 2) for name, bounds in HISTOGRAMS.items()}
+    series['statuses'] = {}
+    series['db_seconds'] = 0.0
+    return series
+
+
+def merge_series(into, series):
+    for name in HISTOGRAMS:
+        into[name] = [a + b for a, b in zip(into[name], series[name])]
+    for status, count in series['statuses'].items():
+        into['statuses'][status] = into['statuses'].get(status, 0) + count
+    into['db_seconds'] += series['db_seconds']
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request metrics of one worker, rendered for Prometheus
+
+    Each (endpoint, method) series keeps the request count by status,
+    latency, response size and SQL statements per request as histograms
+    (bucket counts, then the +Inf bucket, then the sum), and the time spent
+    in SQL. With a `directory` the worker writes its series to a file there
+    every `flush_interval` seconds and on every scrape, and `render` sums
+    the files of all workers, so whichever gunicorn worker answers a scrape
+    reports totals for the whole server. Files of exited workers are kept,
+    which keeps counters monotonic across worker restarts.
+    """
+
+    def __init__(self, directory=None, flush_interval=DEFAULT_FLUSH_INTERVAL, worker=None):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.worker = worker
+        self._series = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._flusher = None
+
+    def observe(self, endpoint, method, status, seconds, size, queries, db_seconds):
+        key = (endpoint, method)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = new_series()
+            for name, value in (('latency', seconds), ('size', size), ('queries', queries)):
+                if value is None:
+                    continue
+                counts = series[name]
+                counts[bisect_left(HISTOGRAMS[name], value)] += 1
+                counts[-1] += value
+            series['statuses'][status] = series['statuses'].get(status, 0) + 1
+            series['db_seconds'] += db_seconds
+            self._dirty = True
+        if self.directory and self._flusher is None:
+            self._start_flusher()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                f'{endpoint}\t{method}': {
+                    **series,
+                    **{name: list(series[name]) for name in HISTOGRAMS},
+                    'statuses': dict(series['statuses']),
+                }
+                for (endpoint, method), series in self._series.items()
+            }
+
+    def _path(self, worker):
+        return os.path.join(self.directory, f'worker-{worker}.json')
+
+    def flush(self):
+        """Write this worker's series for the others to aggregate"""
+        with self._lock:
+            self._dirty = False
+        path = self._path(self.worker or os.getpid())
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(f'{path}.tmp', path)
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='metrics-flusher', daemon=True)
+        self._flusher.start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                self.flush()
+
+    def collect(self):
+        """Series of all workers sharing the directory (or just this one), summed"""
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        totals = {}
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for key, series in snapshot.items():
+                merge_series(totals.setdefault(key, new_series()), series)
+        return totals
+
+    def render(self):
+        """Prometheus text exposition of `collect()`"""
+        lines = {
+            'requests': ['# HELP trivia_http_requests_total Requests by endpoint, method and status',
+                         '# TYPE trivia_http_requests_total counter'],
+            'latency': ['# HELP trivia_http_request_duration_seconds Request latency',
+                        '# TYPE trivia_http_request_duration_seconds histogram'],
+            'size': ['# HELP trivia_http_response_size_bytes Response body size',
+                     '# TYPE trivia_http_response_size_bytes histogram'],
+            'queries': ['# HELP trivia_db_queries_per_request SQL statements executed per request',
+                        '# TYPE trivia_db_queries_per_request histogram'],
+            'db_seconds': ['# HELP trivia_db_query_duration_seconds_total Time spent executing SQL',
+                           '# TYPE trivia_db_query_duration_seconds_total counter'],
+        }
+        names = {
+            'latency': 'trivia_http_request_duration_seconds',
+            'size': 'trivia_http_response_size_bytes',
+            'queries': 'trivia_db_queries_per_request',
+        }
+        for key, series in sorted(self.collect().items()):
+            endpoint, method = key.split('\t')
+            labels = f'endpoint="{escape_label(endpoint)}",method="{method}"'
+            for status, count in sorted(series['statuses'].items()):
+                lines['requests'].append(f'trivia_http_requests_total{{{labels},status="{status}"}} {count}')
+            for name, bounds in HISTOGRAMS.items():
+                counts = series[name]
+                cumulative = 0
+                for bound, count in zip((*bounds, '+Inf'), counts):
+                    cumulative += count
+                    lines[name].append(f'{names[name]}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines[name].append(f'{names[name]}_sum{{{labels}}} {format_value(counts[-1])}')
+                lines[name].append(f'{names[name]}_count{{{labels}}} {cumulative}')
+            lines['db_seconds'].append(
+                f'trivia_db_query_duration_seconds_total{{{labels}}} {format_value(series["db_seconds"])}')
+        return '\n'.join(line for group in lines.values() for line in group) + '\n'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def server_metrics_dir(root, server_id=None):
+    """
+    Directory shared by the workers of one server: `root`/<server id>
+
+    The id is METRICS_SERVER_ID, which gunicorn.conf.py sets to the master's
+    pid before forking workers. Without one each process gets its own
+    directory, named after its pid, so unrelated processes never add up.
+    Directories named after pids that have exited are removed.
+    """
+    if not root:
+        return None
+    server_id = str(server_id or os.getpid())
+    for name in os.listdir(root) if os.path.isdir(root) else ():
+        if name.isdigit() and name != server_id and not pid_alive(int(name)):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return os.path.join(root, server_id)
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# The current request's tally; a context variable, not flask.g, because the
+# engine hooks run for every statement and proxies cost more than the work
+_request_tally = ContextVar('request_metrics', default=None)
+
+
+def _start_request():
+    # [start, SQL statements, SQL seconds], filled in by the engine hooks below
+    _request_tally.set([time.perf_counter(), 0, 0.0])
+
+
+def _record_request(response):
+    tally = _request_tally.get()
+    if tally is not None:
+        _request_tally.set(None)
+        current_app.extensions['request_metrics'].observe(
+            request.endpoint or 'unmatched', request.method, str(response.status_code),
+            time.perf_counter() - tally[0], response.calculate_content_length(), tally[1], tally[2],
+        )
+    return response
+
+
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_started = time.perf_counter()
+
+
+def _end_query(conn, cursor, statement, parameters, context, executemany):
+    tally = _request_tally.get()
+    if tally is not None and context is not None:
+        tally[1] += 1
+        tally[2] += time.perf_counter() - context.metrics_started
+
+
+def init_request_metrics(app):
+    """Record every request's metrics when METRICS is on"""
+    if not app.config.get('METRICS'):
+        app.extensions['request_metrics'] = None
+        return
+    app.extensions['request_metrics'] = RequestMetrics(
+        directory=server_metrics_dir(app.config.get('METRICS_DIR'), app.config.get('METRICS_SERVER_ID')),
+        flush_interval=app.config.get('METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+    )
+    app.before_request(_start_request)
+    app.after_request(_record_request)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _start_query)
+        event.listen(db.engine, 'after_cursor_execute', _end_query)
+
+
+def get_request_metrics():
+    return current_app.extensions.get('request_metrics')
@@ -0,0 +1,186 @@
+import hashlib
+import math
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app import db
+from app.models.user import User
+
+DEFAULT_ERROR_RATE = 0.01
+DEFAULT_REFRESH_INTERVAL = 5.0
+# Room for this many names at least, and twice the users found at build time
+MIN_CAPACITY = 100000
+LOAD_CHUNK_SIZE = 50000
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings
+    Sized for `capacity` items at `error_rate` false positives; never gives
+    a false negative. Positions come from one blake2b digest (double hashing).
+    """
+
+    def __init__(self, capacity, error_rate=DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+
+class NicknameFilter:
+    """
+    Per-worker membership filter of taken nicknames (normalized usernames)
+
+    `is_available` answers "definitely available" from the Bloom filter with
+    no query; a possible match still needs the indexed username_lower
+    lookup. The filter is loaded from the user table by a background
+    thread on first use (until then every check queries), is topped up with
+    users added since (id > the last one seen) at most every
+    `refresh_interval` seconds, and is rebuilt larger once it outgrows its
+    capacity. Registrations in other workers can therefore look available
+    for up to `refresh_interval`; registration itself is checked by the
+    database, so the filter only ever advises.
+    """
+
+    def __init__(self, app, error_rate=DEFAULT_ERROR_RATE, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.app = app
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self._bloom = None
+        self._last_id = 0
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._loading = False
+        self._build_started_at = None
+        self.definitely_available = 0
+        self.lookups = 0
+
+    def _load(self, bloom, last_id, connection):
+        rows = connection.execute(
+            select(User.id, User.username_lower)
+            .where(User.id > last_id)
+            .order_by(User.id)
+            .execution_options(yield_per=LOAD_CHUNK_SIZE)
+        )
+        for chunk in rows.partitions():
+            names = [name for _, name in chunk if name is not None]
+            # The bit array is read under the lock by is_available
+            with self._lock:
+                for name in names:
+                    bloom.add(name)
+            last_id = chunk[-1][0]
+        return last_id
+
+    def build(self):
+        """Load every username into a new filter (blocking); returns the names loaded"""
+        try:
+            with self.app.app_context(), db.engine.connect() as connection:
+                users = connection.execute(select(func.count()).select_from(User)).scalar()
+                bloom = BloomFilter(max(MIN_CAPACITY, 2 * users), self.error_rate)
+                last_id = self._load(bloom, 0, connection)
+            with self._lock:
+                self._bloom, self._last_id = bloom, last_id
+                self._refreshed_at = time.monotonic()
+            return bloom.count
+        finally:
+            self._loading = False
+
+    def _build_in_background(self):
+        try:
+            self.build()
+        except Exception:
+            self.app.logger.exception('Loading the nickname filter failed')
+
+    def _start_build(self):
+        with self._lock:
+            now = time.monotonic()
+            # One build at a time, and a failed one is not retried on every request
+            if self._loading or (self._build_started_at is not None
+                                 and now - self._build_started_at < self.refresh_interval):
+                return
+            self._loading = True
+            self._build_started_at = now
+        threading.Thread(target=self._build_in_background, name='nickname-filter', daemon=True).start()
+
+    def refresh(self):
+        """Add users registered since the last load (e.g. by other workers)"""
+        with self._lock:
+            bloom, last_id = self._bloom, self._last_id
+            self._refreshed_at = time.monotonic()
+        with db.engine.connect() as connection:
+            last_id = self._load(bloom, last_id, connection)
+        with self._lock:
+            self._last_id = max(self._last_id, last_id)
+        if bloom.count > bloom.capacity:
+            self._start_build()
+
+    def add(self, username):
+        """Record a nickname registered by this worker"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(username)
+
+    def is_available(self, username):
+        """True when `username` (normalized) is definitely not taken, None when unsure"""
+        bloom = self._bloom
+        if bloom is None:
+            self._start_build()
+            return None
+        if time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self.refresh()
+        with self._lock:
+            self.lookups += 1
+            if username in bloom:
+                return None
+            self.definitely_available += 1
+            return True
+
+    def stats(self):
+        bloom = self._bloom
+        with self._lock:
+            return {
+                'loaded': bloom is not None,
+                'names': bloom.count if bloom else 0,
+                'capacity': bloom.capacity if bloom else 0,
+                'bytes': bloom.nbytes if bloom else 0,
+                'hashes': bloom.hashes if bloom else 0,
+                'lookups': self.lookups,
+                'definitely_available': self.definitely_available,
+            }
+
+
+def init_nickname_filter(app):
+    """Attach a nickname filter to the app unless NICKNAME_FILTER is off"""
+    app.extensions['nickname_filter'] = NicknameFilter(
+        app,
+        error_rate=app.config.get('NICKNAME_FILTER_ERROR_RATE', DEFAULT_ERROR_RATE),
+        refresh_interval=app.config.get('NICKNAME_FILTER_REFRESH_INTERVAL', DEFAULT_REFRESH_INTERVAL),
+    ) if app.config.get('NICKNAME_FILTER', True) else None
+
+
+def get_nickname_filter():
+    return current_app.extensions.get('nickname_filter')
@@ -0,0 +1,264 @@
+import base64
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from flask import current_app
+
+from app.services.question_import import InvalidRecord, insert_batch, normalize_record
+
+DEFAULT_BATCH_SIZE = 50  # Open Trivia DB's per-call maximum
+DEFAULT_MIN_POOL = 100
+DEFAULT_WORKERS = 2
+DEFAULT_MIN_INTERVAL = 5.0  # Open Trivia DB allows one call per IP every 5 seconds
+DEFAULT_TIMEOUT = 10.0
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 600.0
+
+DIFFICULTY_NAMES = {1: 'easy', 2: 'medium', 3: 'hard'}
+
+# response_code values from the Open Trivia DB API
+RESPONSE_OK = 0
+RESPONSE_NO_RESULTS = 1
+RESPONSE_TOKEN_NOT_FOUND = 3
+RESPONSE_TOKEN_EMPTY = 4
+RESPONSE_RATE_LIMIT = 5
+
+
+class UpstreamError(Exception):
+    """The upstream could not be reached or refused the request"""
+
+
+class OpenTDBMirror:
+    """
+    Keeps the question bank topped up from an Open Trivia DB compatible API
+
+    GET /api/questions only ever reads local rows. When a filter's pool runs
+    below `min_pool`, `request_refill` queues a fetch on a small thread pool
+    and returns immediately; fetched questions go through the importer, so
+    they are deduplicated and bump the bank version like any other write.
+    At most `max_workers` fetches run at once, one per filter, calls to the
+    upstream are spaced `min_interval` seconds apart, and a filter whose
+    fetch failed or added no new questions is not retried until its
+    exponential backoff has passed.
+    """
+
+    def __init__(self, app, base_url, batch_size=DEFAULT_BATCH_SIZE, min_pool=DEFAULT_MIN_POOL,
+                 max_workers=DEFAULT_WORKERS, min_interval=DEFAULT_MIN_INTERVAL,
+                 timeout=DEFAULT_TIMEOUT):
+        self.app = app
+        self.base_url = base_url.rstrip('/')
+        self.batch_size = batch_size
+        self.min_pool = min_pool
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='opentdb-refill')
+        self._lock = Lock()
+        self._pending = {}
+        self._failures = {}
+        self._retry_at = {}
+        self._upstream_lock = Lock()
+        self._last_call = 0.0
+        # Guards the session token and category map shared by refills; taken
+        # before (never inside) the upstream lock
+        self._session_lock = Lock()
+        self._token = None
+        # Bumped whenever the token is reset or dropped
+        self._token_epoch = 0
+        self._category_ids = None
+        self.fetched = 0
+        self.inserted = 0
+        self.errors = 0
+        self.exhausted = 0
+
+    def request_refill(self, category=None, difficulty=None, available=0):
+        """
+        Queue a background refill for the filter if its pool is low
+        Never blocks; returns True if a refill was queued
+        """
+        if available >= self.min_pool:
+            return False
+        key = (category, difficulty)
+        with self._lock:
+            if key in self._pending or time.monotonic() < self._retry_at.get(key, 0):
+                return False
+            self._pending[key] = self._executor.submit(self._refill, key)
+        return True
+
+    def wait(self, timeout=None):
+        """Wait for queued refills to finish (tests and CLI use)"""
+        with self._lock:
+            futures = list(self._pending.values())
+        wait(futures, timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'backing_off': sum(1 for at in self._retry_at.values() if at > time.monotonic()),
+                'fetched': self.fetched,
+                'inserted': self.inserted,
+                'errors': self.errors,
+                'exhausted': self.exhausted,
+            }
+
+    def _refill(self, key):
+        category, difficulty = key
+        try:
+            with self.app.app_context():
+                records = self.fetch_batch(category, difficulty)
+                rows = []
+                for record in records:
+                    try:
+                        rows.append(normalize_record(record))
+                    except InvalidRecord:
+                        continue
+                inserted = insert_batch(rows) if rows else 0
+            with self._lock:
+                self.fetched += len(records)
+                self.inserted += inserted
+                if inserted:
+                    self._failures.pop(key, None)
+                    self._retry_at.pop(key, None)
+                else:
+                    # Nothing new upstream (or only duplicates): the pool
+                    # stays low, so back off instead of refetching at once
+                    self.exhausted += 1
+                    self._back_off(key)
+        except Exception as error:
+            with self._lock:
+                self.errors += 1
+                self._back_off(key)
+            self.app.logger.warning('Open Trivia DB refill for %r failed: %s', key, error)
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def _back_off(self, key):
+        # Called with self._lock held
+        failures = self._failures.get(key, 0) + 1
+        self._failures[key] = failures
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (failures - 1))
+        # Jitter so workers that failed together do not retry together
+        self._retry_at[key] = time.monotonic() + delay * random.uniform(0.5, 1.0)
+
+    def fetch_batch(self, category=None, difficulty=None):
+        """
+        One batch of decoded Open Trivia DB records for the filter
+        Raises UpstreamError if the upstream fails or rate limits us
+        """
+        params = {'amount': self.batch_size, 'encode': 'base64'}
+        if category:
+            category_id = self.category_ids().get(category)
+            if category_id is None:
+                raise UpstreamError(f'Unknown upstream category {category!r}')
+            params['category'] = category_id
+        if difficulty is not None:
+            params['difficulty'] = DIFFICULTY_NAMES.get(difficulty, difficulty)
+
+        for attempt in range(2):
+            token, epoch = self._session_token()
+            data = self._get_json('/api.php', dict(params, token=token) if token else params)
+            code = data.get('response_code')
+            if code == RESPONSE_OK:
+                return [_decode_record(record) for record in data.get('results', [])]
+            if code == RESPONSE_NO_RESULTS:
+                return []
+            if code == RESPONSE_TOKEN_NOT_FOUND:
+                self._renew_token(epoch, reset=False)
+            elif code == RESPONSE_TOKEN_EMPTY:
+                # Every question for the token was served; start over
+                self._renew_token(epoch, reset=True)
+            elif code == RESPONSE_RATE_LIMIT:
+                raise UpstreamError('Rate limited by upstream')
+            else:
+                raise UpstreamError(f'Upstream response_code {code}')
+        raise UpstreamError('Upstream session token could not be renewed')
+
+    def _session_token(self):
+        """The shared session token and its epoch, requested by the first refill that needs one"""
+        with self._session_lock:
+            if self._token is None:
+                self._token = self._get_json('/api_token.php', {'command': 'request'}).get('token')
+            return self._token, self._token_epoch
+
+    def _renew_token(self, epoch, reset):
+        """
+        Reset or drop a token the upstream rejected
+        A no-op if another refill already renewed it, so concurrent refills
+        rejected together reset it once
+        """
+        with self._session_lock:
+            if self._token_epoch != epoch:
+                return
+            if reset and self._token:
+                self._get_json('/api_token.php', {'command': 'reset', 'token': self._token})
+            else:
+                self._token = None
+            self._token_epoch += 1
+
+    def category_ids(self):
+        """Upstream category name -> ID, fetched once"""
+        with self._session_lock:
+            if self._category_ids is None:
+                data = self._get_json('/api_category.php')
+                self._category_ids = {
+                    category['name']: category['id'] for category in data.get('trivia_categories', [])
+                }
+            return self._category_ids
+
+    def _get_json(self, path, params=None):
+        url = self.base_url + path
+        if params:
+            url += '?' + urlencode(params)
+        with self._upstream_lock:
+            delay = self._last_call + self.min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                with urlopen(url, timeout=self.timeout) as response:
+                    return json.load(response)
+            except (URLError, OSError, ValueError) as error:
+                raise UpstreamError(str(error)) from error
+            finally:
+                self._last_call = time.monotonic()
+
+
+def _decode(value):
+    return base64.b64decode(value).decode('utf-8')
+
+
+def _decode_record(record):
+    """Undo encode=base64 on every text field of an upstream record"""
+    return {
+        'question': _decode(record['question']),
+        'category': _decode(record['category']),
+        'difficulty': _decode(record['difficulty']),
+        'correct_answer': _decode(record['correct_answer']),
+        'incorrect_answers': [_decode(answer) for answer in record['incorrect_answers']],
+    }
+
+
+def init_opentdb_mirror(app):
+    """Attach a mirror to the app when OPENTDB_MIRROR_URL is set"""
+    base_url = app.config.get('OPENTDB_MIRROR_URL')
+    app.extensions['opentdb_mirror'] = OpenTDBMirror(
+        app,
+        base_url,
+        batch_size=app.config.get('OPENTDB_MIRROR_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+        min_pool=app.config.get('OPENTDB_MIRROR_MIN_POOL', DEFAULT_MIN_POOL),
+        max_workers=app.config.get('OPENTDB_MIRROR_WORKERS', DEFAULT_WORKERS),
+        min_interval=app.config.get('OPENTDB_MIRROR_MIN_INTERVAL', DEFAULT_MIN_INTERVAL),
+    ) if base_url else None
+
+
+def get_opentdb_mirror():
+    return current_app.extensions.get('opentdb_mirror')
@@ -0,0 +1,109 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Werkzeug's method string, cost parameters included: 'scrypt:N:r:p' or
+# 'pbkdf2:sha256:iterations'. Existing hashes keep verifying with their own.
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+DEFAULT_WORKERS = 1
+DEFAULT_MAX_PENDING = 1
+DEFAULT_ADMISSION_TIMEOUT = 2.0
+
+
+class HashingBusy(Exception):
+    """No password hashing slot freed up within the admission timeout"""
+
+
+class PasswordHasher:
+    """
+    Password hashing and checking off the request threads
+
+    Key derivation runs in a process pool of `workers`, so a burst of logins
+    or registrations does not hold the worker's GIL while cheap requests
+    wait. At most `workers + max_pending` hashes are admitted at once;
+    further callers wait up to `admission_timeout` seconds for a slot and
+    then get HashingBusy, so a login storm queues briefly and is then shed
+    instead of tying up every request thread. With `workers` 0 hashing runs
+    inline (admission limits still apply). The pool starts on first use,
+    after gunicorn has forked its workers.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING,
+                 admission_timeout=DEFAULT_ADMISSION_TIMEOUT):
+        self.method = method
+        self.workers = workers
+        self.admission_timeout = admission_timeout
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_pending)
+        self._pool = None
+        self._lock = threading.Lock()
+        self.hashed = 0
+        self.checked = 0
+        self.rejected = 0
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(timeout=self.admission_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy('Too many password checks in progress, try again shortly')
+        try:
+            if not self.workers:
+                return function(*args)
+            return self._executor().submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a threaded server process is not safe
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def hash(self, password):
+        result = self._run(generate_password_hash, password, self.method)
+        with self._lock:
+            self.hashed += 1
+        return result
+
+    def check(self, password_hash, password):
+        result = self._run(check_password_hash, password_hash, password)
+        with self._lock:
+            self.checked += 1
+        return result
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': self.method.split(':')[0],
+                'workers': self.workers,
+                'hashed': self.hashed,
+                'checked': self.checked,
+                'rejected': self.rejected,
+            }
+
+
+def init_password_hasher(app):
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS),
+        max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', DEFAULT_MAX_PENDING),
+        admission_timeout=app.config.get('PASSWORD_HASH_ADMISSION_TIMEOUT', DEFAULT_ADMISSION_TIMEOUT),
+    )
+
+
+def get_password_hasher():
+    """The app's hasher; outside an app (scripts, shells) hashing runs inline"""
+    if has_app_context():
+        hasher = current_app.extensions.get('password_hasher')
+        if hasher is not None:
+            return hasher
+    return PasswordHasher(workers=0)
@@ -0,0 +1,154 @@
+from sqlalchemy import case, delete, event, func, select
+from sqlalchemy.orm import Session
+
+from app.models.score import PlayerStats, Score
+from app.services.upsert import upsert_insert
+
+stats_table = PlayerStats.__table__
+
+# (column on player_stats, column on score) per rollup key
+KEYS = (('user_id', Score.user_id), ('player_name', Score.player_name))
+SUMS = ('games', 'normal_score_sum', 'trivialer_score_sum', 'questions_answered', 'questions_correct')
+MAXIMA = ('normal_score_max', 'trivialer_score_max')
+ROLLUP_COLUMNS = ('games', 'normal_score_sum', 'normal_score_max', 'trivialer_score_sum',
+                  'trivialer_score_max', 'questions_answered', 'questions_correct')
+
+
+def effective_score(column):
+    """SQL for Python's `column or score or 0` (0 and NULL both fall through)"""
+    return func.coalesce(func.nullif(column, 0), func.nullif(Score.score, 0), 0)
+
+
+def score_getter(score):
+    """Attribute access for Score objects and row dicts alike"""
+    if isinstance(score, dict):
+        return score.get
+    return lambda name: getattr(score, name)
+
+
+def _score_totals(get):
+    """One score's contribution to a rollup row"""
+    normal = get('normal_score') or get('score') or 0
+    trivialer = get('trivialer_score') or get('score') or 0
+    return {
+        'games': 1,
+        'normal_score_sum': normal,
+        'normal_score_max': normal,
+        'trivialer_score_sum': trivialer,
+        'trivialer_score_max': trivialer,
+        'questions_answered': get('questions_answered') or 0,
+        'questions_correct': get('questions_correct') or 0,
+    }
+
+
+def update_player_stats(connection, scores):
+    """
+    Fold new scores (Score objects or row dicts) into player_stats
+    Must run in the transaction that inserts them; ORM inserts do this
+    through the before_flush hook below, Core inserts call it directly
+    """
+    deltas = {}
+    for score in scores:
+        get = score_getter(score)
+        totals = _score_totals(get)
+        for column, _ in KEYS:
+            value = get(column)
+            if value is None:
+                continue
+            delta = deltas.get((column, value))
+            if delta is None:
+                deltas[(column, value)] = dict(totals)
+                continue
+            for name in SUMS:
+                delta[name] += totals[name]
+            for name in MAXIMA:
+                delta[name] = max(delta[name], totals[name])
+
+    insert = upsert_insert(connection, stats_table)
+    if insert is not None:
+        values = {name: stats_table.c[name] + insert.excluded[name] for name in SUMS}
+        values.update({
+            name: case((stats_table.c[name] < insert.excluded[name], insert.excluded[name]),
+                       else_=stats_table.c[name])
+            for name in MAXIMA
+        })
+        for column, _ in KEYS:
+            rows = [{column: value, **delta} for (key, value), delta in deltas.items() if key == column]
+            if rows:
+                connection.execute(insert.on_conflict_do_update(index_elements=[column], set_=values), rows)
+        return
+
+    # No ON CONFLICT: update, then insert the keys that matched no row
+    for (column, value), delta in deltas.items():
+        values = {name: stats_table.c[name] + delta[name] for name in SUMS}
+        values.update({
+            name: case((stats_table.c[name] < delta[name], delta[name]), else_=stats_table.c[name])
+            for name in MAXIMA
+        })
+        result = connection.execute(
+            stats_table.update().where(stats_table.c[column] == value).values(values)
+        )
+        if result.rowcount == 0:
+            connection.execute(stats_table.insert().values({column: value, **delta}))
+
+
+@event.listens_for(Session, 'before_flush')
+def _roll_up_new_scores(session, flush_context, instances):
+    scores = [obj for obj in session.new if isinstance(obj, Score)]
+    if scores:
+        update_player_stats(session.connection(), scores)
+
+
+def _grouped_totals(key):
+    """SELECT of the rollup columns computed from the score table, per `key`"""
+    normal = effective_score(Score.normal_score)
+    trivialer = effective_score(Score.trivialer_score)
+    return (
+        select(
+            key,
+            func.count(Score.id),
+            func.sum(normal),
+            func.max(normal),
+            func.sum(trivialer),
+            func.max(trivialer),
+            func.sum(func.coalesce(Score.questions_answered, 0)),
+            func.sum(func.coalesce(Score.questions_correct, 0)),
+        )
+        .where(key.isnot(None))
+        .group_by(key)
+    )
+
+
+def rebuild_player_stats(connection):
+    """Recompute player_stats from the score table; returns the rows written"""
+    connection.execute(delete(stats_table))
+    for column, key in KEYS:
+        connection.execute(stats_table.insert().from_select(
+            [column, *ROLLUP_COLUMNS], _grouped_totals(key)
+        ))
+    return connection.execute(select(func.count()).select_from(stats_table)).scalar()
+
+
+def check_player_stats(connection):
+    """
+    Compare player_stats with totals recomputed from the score table
+    Returns (key column, key value, expected, stored) for every mismatch,
+    with None for a row that is missing on either side
+    """
+    mismatches = []
+    for column, key in KEYS:
+        expected = {
+            row[0]: tuple(int(value) for value in row[1:])
+            for row in connection.execute(_grouped_totals(key))
+        }
+        stored = {
+            row[0]: tuple(row[1:])
+            for row in connection.execute(
+                select(stats_table.c[column], *(stats_table.c[name] for name in ROLLUP_COLUMNS))
+                .where(stats_table.c[column].isnot(None))
+            )
+        }
+        for value in sorted(expected.keys() | stored.keys(), key=str):
+            if expected.get(value) != stored.get(value):
+                mismatches.append((column, value, expected.get(value), stored.get(value)))
+    return mismatches
@@ -0,0 +1,129 @@
+from collections import Counter
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.question import Question, QuestionBank, QuestionCount, QuestionTombstone
+from app.services.upsert import upsert_insert
+
+bank_table = QuestionBank.__table__
+count_table = QuestionCount.__table__
+tombstone_table = QuestionTombstone.__table__
+question_table = Question.__table__
+
+
+def get_bank_version(connection=None):
+    """Current question bank version (a single primary-key lookup)"""
+    stmt = select(bank_table.c.version).where(bank_table.c.id == 1)
+    if connection is None:
+        version = db.session.execute(stmt).scalar()
+    else:
+        version = connection.execute(stmt).scalar()
+    return version or 0
+
+
+def bump_bank_version(connection):
+    """
+    Increment the bank version on `connection` and return the new value
+    Callers writing to the question table outside the ORM (bulk imports)
+    must call this in the same transaction as their inserts
+    """
+    result = connection.execute(
+        bank_table.update()
+        .where(bank_table.c.id == 1)
+        .values(version=bank_table.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(bank_table.insert().values(id=1, version=1))
+    return get_bank_version(connection)
+
+
+def adjust_question_counts(connection, deltas):
+    """
+    Apply {(category, difficulty): delta} to the question_count aggregate
+    Like bump_bank_version, callers writing outside the ORM must call this
+    in the same transaction as their inserts
+    """
+    rows = [{'category': category, 'difficulty': difficulty, 'count': delta}
+            for (category, difficulty), delta in deltas.items() if delta]
+    if not rows:
+        return
+    insert = upsert_insert(connection, count_table)
+    if insert is not None:
+        connection.execute(insert.on_conflict_do_update(
+            index_elements=['category', 'difficulty'],
+            set_={'count': count_table.c.count + insert.excluded['count']}
+        ), rows)
+        return
+
+    # No ON CONFLICT: update, then insert the keys that matched no row
+    for row in rows:
+        result = connection.execute(
+            count_table.update()
+            .where(count_table.c.category == row['category'], count_table.c.difficulty == row['difficulty'])
+            .values(count=count_table.c.count + row['count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(count_table.insert().values(row))
+
+
+def get_question_counts(connection=None):
+    """(category, difficulty, count) rows with at least one question, by category"""
+    stmt = (
+        select(count_table.c.category, count_table.c.difficulty, count_table.c.count)
+        .where(count_table.c.count > 0)
+        .order_by(count_table.c.category, count_table.c.difficulty)
+    )
+    if connection is None:
+        return db.session.execute(stmt).all()
+    return connection.execute(stmt).all()
+
+
+def _stored_count_keys(connection, ids):
+    """{id: (category, difficulty)} as stored for the given question IDs"""
+    stmt = select(question_table.c.id, question_table.c.category, question_table.c.difficulty).where(
+        question_table.c.id.in_(ids)
+    )
+    return {row.id: (row.category, row.difficulty) for row in connection.execute(stmt)}
+
+
+def _moves_between_counts(question):
+    state = inspect(question)
+    return state.attrs.category.history.has_changes() or state.attrs.difficulty.history.has_changes()
+
+
+@event.listens_for(Session, 'before_flush')
+def _version_question_writes(session, flush_context, instances):
+    """
+    Bump the bank version and stamp it on every question this flush writes,
+    then move the per-category counts to match
+    """
+    written = [obj for obj in session.new if isinstance(obj, Question)]
+    written += [obj for obj in session.dirty
+                if isinstance(obj, Question) and session.is_modified(obj)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Question)]
+    if not written and not deleted:
+        return
+
+    connection = session.connection()
+    version = bump_bank_version(connection)
+    for question in written:
+        question.version = version
+
+    # Old category/difficulty are read back from the database: attribute
+    # history is empty when the value was never loaded before being changed
+    deltas = Counter((q.category, q.difficulty) for q in session.new if isinstance(q, Question))
+    moved = [q for q in written if q not in session.new and _moves_between_counts(q)]
+    for question in moved:
+        deltas[(question.category, question.difficulty)] += 1
+    stored = _stored_count_keys(connection, [q.id for q in moved + deleted]) if moved or deleted else {}
+    deltas.subtract(stored.values())
+    adjust_question_counts(connection, deltas)
+
+    # Deleted questions, and moved ones for syncs of the category they left
+    left = [(q.id, stored.get(q.id, (None,))[0]) for q in deleted]
+    left += [(q.id, stored[q.id][0]) for q in moved if q.id in stored and q.category != stored[q.id][0]]
+    tombstones = [{'question_id': id_, 'version': version, 'category': category} for id_, category in left]
+    if tombstones:
+        connection.execute(tombstone_table.insert(), tombstones)
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app
+
+from app.services.question_bank import get_bank_version
+from app.services.question_sampler import QuestionSampler
+
+DEFAULT_MAX_ITEMS = 50000
+
+
+class QuestionCache:
+    """
+    In-process cache of serialized questions for GET /api/questions
+
+    The bank is grouped by (category, difficulty) through the sampler's ID
+    pools, and every question is kept already serialized so a cache hit
+    skips both the database and serialization. Payloads live in an LRU
+    bounded by `max_items`. Everything is tied to the bank version read at
+    the start of each draw, so a write from any worker invalidates it.
+    """
+
+    def __init__(self, serializer, max_items=DEFAULT_MAX_ITEMS):
+        self.sampler = QuestionSampler()
+        self.max_items = max_items
+        self._serializer = serializer
+        self._payloads = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def sync(self):
+        version = get_bank_version()
+        if version != self.sampler.version:
+            with self._lock:
+                self._payloads.clear()
+            self.sampler.sync(version)
+
+    def sample(self, amount, category=None, difficulty=None):
+        """Return up to `amount` random serialized questions for the filter"""
+        self.sync()
+        return self.get_many(self.sampler.sample_ids(amount, category, difficulty))
+
+    def get_many(self, ids):
+        found = {}
+        missing = []
+        with self._lock:
+            for question_id in ids:
+                payload = self._payloads.get(question_id)
+                if payload is None:
+                    missing.append(question_id)
+                else:
+                    self._payloads.move_to_end(question_id)
+                    found[question_id] = payload
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            rows = self.sampler.fetch_rows(missing, self._serializer.columns)
+            loaded = self._serializer.dump_rows(rows)
+            with self._lock:
+                for payload in loaded:
+                    found[payload['id']] = payload
+                    self._store(payload['id'], payload)
+
+        return [found[i] for i in ids if i in found]
+
+    def _store(self, question_id, payload):
+        if self.max_items <= 0:
+            return
+        self._payloads[question_id] = payload
+        self._payloads.move_to_end(question_id)
+        while len(self._payloads) > self.max_items:
+            self._payloads.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'version': self.sampler.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0,
+            'evictions': self.evictions,
+            'size': len(self._payloads),
+            'max_items': self.max_items,
+            'pools': self.sampler.pool_count()
+        }
+
+
+def init_question_cache(app, serializer):
+    max_items = app.config.get('QUESTION_CACHE_MAX_ITEMS', DEFAULT_MAX_ITEMS)
+    app.extensions['question_cache'] = QuestionCache(serializer, max_items)
+
+
+def get_question_cache():
+    return current_app.extensions['question_cache']
@@ -0,0 +1,207 @@
+import csv
+import io
+import json
+import time
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.models.question import Question, decode_answer_list, question_text_hash
+from app.services.question_bank import adjust_question_counts, bump_bank_version
+from app.services.question_search import find_near_duplicates
+
+question_table = Question.__table__
+
+DEFAULT_BATCH_SIZE = 5000
+# Keep IN (...) lists well below SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+DIFFICULTIES = {'easy': 1, 'medium': 2, 'hard': 3}
+INSERT_COLUMNS = ('text', 'category', 'difficulty', 'correct_answer', 'incorrect_answers', 'text_hash', 'version')
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def iter_records(path, fmt=None):
+    """
+    Stream raw records from a JSONL or CSV file one at a time
+    A JSONL line that does not parse is yielded as an InvalidRecord, which
+    normalize_record raises, so one bad line does not end the stream
+    """
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8') as handle:
+        if fmt == 'csv':
+            yield from csv.DictReader(handle)
+        else:
+            for number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as error:
+                    yield InvalidRecord(f'Line {number} is not valid JSON: {error}')
+
+
+def normalize_record(raw):
+    """
+    Turn one input record into a row for the question table
+    Accepts both our column names and Open Trivia DB style keys
+    ('question', 'easy'/'medium'/'hard'). Raises InvalidRecord for anything
+    that does not make a question.
+    """
+    if isinstance(raw, InvalidRecord):
+        raise raw
+    if not isinstance(raw, dict):
+        raise InvalidRecord(f'Expected an object, got {type(raw).__name__}')
+    try:
+        return _normalize_record(raw)
+    except InvalidRecord:
+        raise
+    except (AttributeError, TypeError, ValueError) as error:
+        # e.g. a malformed JSON answer list or a number where text belongs
+        raise InvalidRecord(f'Malformed record: {error}') from error
+
+
+def _normalize_record(raw):
+    text = (raw.get('text') or raw.get('question') or '').strip()
+    category = (raw.get('category') or '').strip()
+    correct_answer = str(raw.get('correct_answer') or '').strip()
+    incorrect_answers = decode_answer_list(raw.get('incorrect_answers') or [])
+
+    difficulty = raw.get('difficulty')
+    if isinstance(difficulty, str):
+        difficulty = DIFFICULTIES.get(difficulty.strip().lower(), difficulty)
+    try:
+        difficulty = int(difficulty)
+    except (TypeError, ValueError):
+        raise InvalidRecord(f"Invalid difficulty: {raw.get('difficulty')!r}")
+
+    if not text or not category or not correct_answer or not any(incorrect_answers):
+        raise InvalidRecord('text, category, correct_answer and incorrect_answers are required')
+
+    row = {
+        'text': text,
+        'category': category,
+        'difficulty': difficulty,
+        'correct_answer': correct_answer,
+        'incorrect_answers': incorrect_answers,
+    }
+    for name, value in row.items():
+        length = getattr(question_table.c[name].type, 'length', None)
+        if length and len(value) > length:
+            raise InvalidRecord(f'{name} is longer than {length} characters')
+
+    row['text_hash'] = question_text_hash(text)
+    return row
+
+
+def _existing_hashes(connection, hashes):
+    found = set()
+    hashes = list(hashes)
+    for start in range(0, len(hashes), LOOKUP_CHUNK_SIZE):
+        chunk = hashes[start:start + LOOKUP_CHUNK_SIZE]
+        found.update(connection.execute(
+            select(question_table.c.text_hash).where(question_table.c.text_hash.in_(chunk))
+        ).scalars())
+    return found
+
+
+def _copy_rows(connection, rows):
+    """PostgreSQL: stream the batch through COPY instead of INSERT"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[column]) if column == 'incorrect_answers' else row[column]
+            for column in INSERT_COLUMNS
+        ])
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY question ({', '.join(INSERT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def insert_batch(rows, near_duplicate_threshold=None):
+    """
+    Insert one batch in its own transaction, skipping duplicates
+    With `near_duplicate_threshold`, rows whose wording is that similar to a
+    stored question are skipped as well (one full-text lookup per row).
+    Returns the number of rows written
+    """
+    # Drop duplicates inside the batch first, then those already stored
+    unique = {}
+    for row in rows:
+        unique.setdefault(row['text_hash'], row)
+
+    with db.engine.begin() as connection:
+        existing = _existing_hashes(connection, unique)
+        new_rows = [row for text_hash, row in unique.items() if text_hash not in existing]
+        if near_duplicate_threshold is not None:
+            new_rows = [row for row in new_rows if not find_near_duplicates(
+                row['text'], near_duplicate_threshold, connection=connection
+            )]
+        if not new_rows:
+            return 0
+
+        version = bump_bank_version(connection)
+        for row in new_rows:
+            row['version'] = version
+
+        if connection.dialect.name == 'postgresql':
+            _copy_rows(connection, new_rows)
+        else:
+            # executemany on SQLite and anything else
+            connection.execute(question_table.insert(), new_rows)
+        adjust_question_counts(connection, Counter(
+            (row['category'], row['difficulty']) for row in new_rows
+        ))
+    return len(new_rows)
+
+
+def import_questions(path, fmt=None, batch_size=DEFAULT_BATCH_SIZE, progress=None,
+                     near_duplicate_threshold=None):
+    """
+    Stream questions from `path` into the question table in batches
+
+    Memory use is bounded by `batch_size` regardless of file size.
+    Returns counters: read, inserted, duplicates, invalid, seconds, rows_per_sec
+    """
+    stats = {'read': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0}
+    started = time.perf_counter()
+    batch = []
+
+    def flush():
+        inserted = insert_batch(batch, near_duplicate_threshold)
+        stats['inserted'] += inserted
+        stats['duplicates'] += len(batch) - inserted
+        batch.clear()
+        if progress:
+            progress(stats)
+
+    for raw in iter_records(path, fmt):
+        stats['read'] += 1
+        try:
+            batch.append(normalize_record(raw))
+        except InvalidRecord as error:
+            stats['invalid'] += 1
+            current_app.logger.warning('Skipped record %d: %s', stats['read'], error)
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_sec'] = stats['read'] / stats['seconds'] if stats['seconds'] else 0
+    return stats
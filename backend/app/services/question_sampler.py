@@ -0,0 +1,78 @@
+import random
+from array import array
+from threading import Lock
+
+from sqlalchemy import select
+
+from app import db
+from app.models.question import Question
+
+# Keep IN (...) lists well below SQLite's bound parameter limit
+FETCH_CHUNK_SIZE = 500
+
+
+class QuestionSampler:
+    """
+    Draws random questions for a (category, difficulty) filter
+
+    The IDs matching each filter are loaded once into a compact pool, so a
+    quiz start only picks `amount` IDs from memory and fetches those rows
+    by primary key instead of loading every matching question.
+    Pools belong to one bank version and are dropped when it changes.
+    """
+
+    def __init__(self):
+        self._pools = {}
+        self._version = None
+        self._lock = Lock()
+
+    @property
+    def version(self):
+        return self._version
+
+    def sync(self, version):
+        """Drop every pool if the bank moved past the version they were built for"""
+        if version != self._version:
+            with self._lock:
+                self._pools.clear()
+                self._version = version
+
+    def invalidate(self):
+        self.sync(None)
+
+    def pool(self, category=None, difficulty=None):
+        key = (category, difficulty)
+        ids = self._pools.get(key)
+        if ids is None:
+            ids = self._load_pool(category, difficulty)
+            with self._lock:
+                self._pools[key] = ids
+        return ids
+
+    def pool_count(self):
+        return len(self._pools)
+
+    def sample_ids(self, amount, category=None, difficulty=None):
+        ids = self.pool(category, difficulty)
+        if len(ids) <= amount:
+            return list(ids)
+        return random.sample(ids, amount)
+
+    def fetch_rows(self, ids, columns):
+        """Select `columns` for the given question IDs (unordered)"""
+        rows = []
+        for start in range(0, len(ids), FETCH_CHUNK_SIZE):
+            chunk = ids[start:start + FETCH_CHUNK_SIZE]
+            rows.extend(db.session.execute(
+                select(*columns).where(Question.id.in_(chunk))
+            ))
+        return rows
+
+    def _load_pool(self, category, difficulty):
+        query = db.session.query(Question.id)
+        if category:
+            query = query.filter(Question.category == category)
+        if difficulty is not None:
+            query = query.filter(Question.difficulty == difficulty)
+        return array('q', (row[0] for row in query.order_by(Question.id)))
+
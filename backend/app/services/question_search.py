@@ -0,0 +1,222 @@
+import math
+import re
+
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models.question import Question, normalize_question_text
+
+DEFAULT_LIMIT = 20
+NEAR_DUPLICATE_THRESHOLD = 0.8
+NEAR_DUPLICATE_CANDIDATES = 20
+NEAR_DUPLICATE_AND_TERMS = 3
+DOCUMENT_COUNT_CAP = 5000
+MAX_LIMIT = 100
+
+# Left out of match-any queries, where they would match most of the bank
+STOPWORDS = frozenset(
+    'a an and are as at be by did do does for from how in is it of on or the '
+    'to was what when where which who whom whose why with'.split()
+)
+
+# SQLite: external-content FTS5 table kept in sync by triggers, so every
+# writer (ORM, bulk import, raw SQL) updates the index in the same transaction
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS question_fts USING fts5("
+    "text, content='question', content_rowid='id', tokenize='unicode61 remove_diacritics 0')",
+    "CREATE TRIGGER IF NOT EXISTS question_fts_ai AFTER INSERT ON question BEGIN "
+    "INSERT INTO question_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS question_fts_ad AFTER DELETE ON question BEGIN "
+    "INSERT INTO question_fts(question_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS question_fts_au AFTER UPDATE OF text ON question BEGIN "
+    "INSERT INTO question_fts(question_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+    "INSERT INTO question_fts(rowid, text) VALUES (new.id, new.text); END",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS question_fts_au",
+    "DROP TRIGGER IF EXISTS question_fts_ad",
+    "DROP TRIGGER IF EXISTS question_fts_ai",
+    "DROP TABLE IF EXISTS question_fts",
+]
+
+# PostgreSQL: a generated tsvector column is maintained by the database itself
+POSTGRES_FTS_DDL = [
+    "ALTER TABLE question ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_question_search_vector ON question USING GIN (search_vector)",
+]
+
+
+def create_search_index(connection):
+    """Create the dialect's full-text index; a no-op where it is unsupported"""
+    if connection.dialect.name == 'sqlite':
+        try:
+            for statement in SQLITE_FTS_DDL:
+                connection.exec_driver_sql(statement)
+        except OperationalError:
+            # SQLite built without FTS5, searches fall back to LIKE
+            pass
+    elif connection.dialect.name == 'postgresql':
+        for statement in POSTGRES_FTS_DDL:
+            connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Question.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(Question.__table__, 'before_drop')
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for statement in SQLITE_FTS_DROP:
+            connection.exec_driver_sql(statement)
+
+
+def search_backend(connection):
+    """'fts5', 'tsvector' or 'like', detected once per app"""
+    backend = current_app.extensions.get('question_search_backend')
+    if backend is None:
+        if connection.dialect.name == 'sqlite':
+            found = connection.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE name = 'question_fts'"
+            ).scalar()
+            backend = 'fts5' if found else 'like'
+        elif connection.dialect.name == 'postgresql':
+            found = connection.exec_driver_sql(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'question' AND column_name = 'search_vector'"
+            ).scalar()
+            backend = 'tsvector' if found else 'like'
+        else:
+            backend = 'like'
+        current_app.extensions['question_search_backend'] = backend
+    return backend
+
+
+def _tokens(query):
+    return re.findall(r'\w+', normalize_question_text(query))
+
+
+def search_questions(query, limit=DEFAULT_LIMIT, match_any=False, connection=None):
+    """
+    Ranked full-text search over question text
+
+    All words must match unless `match_any` is set. Returns dicts with id,
+    text, category, difficulty and score (higher is better), best first.
+    """
+    tokens = _tokens(query)
+    if match_any:
+        tokens = [token for token in tokens if token not in STOPWORDS] or tokens
+    if not tokens:
+        return []
+    connection = connection or db.session.connection()
+    return _search_tokens(connection, tokens, min(max(limit, 1), MAX_LIMIT), match_any)
+
+
+def _search_tokens(connection, tokens, limit, match_any):
+    backend = search_backend(connection)
+    params = {'limit': limit}
+
+    if backend == 'fts5':
+        return _fts5_search(connection, _fts5_terms(tokens, ' OR ' if match_any else ' '), limit)
+    elif backend == 'tsvector':
+        params['tsquery'] = (' | ' if match_any else ' & ').join(tokens)
+        stmt = text(
+            "SELECT id, text, category, difficulty, "
+            "ts_rank(search_vector, to_tsquery('english', :tsquery)) AS score "
+            "FROM question WHERE search_vector @@ to_tsquery('english', :tsquery) "
+            "ORDER BY score DESC LIMIT :limit"
+        )
+    else:
+        # Unindexed fallback: a LIKE per word, with its wildcards escaped
+        joiner = ' OR ' if match_any else ' AND '
+        clauses = []
+        for i, token in enumerate(tokens):
+            params[f't{i}'] = f'%{_escape_like(token)}%'
+            clauses.append(f"lower(text) LIKE :t{i} ESCAPE '\\'")
+        stmt = text(
+            "SELECT id, text, category, difficulty, 0 AS score FROM question "
+            f"WHERE {joiner.join(clauses)} ORDER BY id LIMIT :limit"
+        )
+
+    return [dict(row._mapping) for row in connection.execute(stmt, params)]
+
+
+def _escape_like(token):
+    return token.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fts5_terms(tokens, joiner):
+    # Quoting each token keeps user input out of the FTS5 query syntax
+    return joiner.join(f'"{token}"' for token in tokens)
+
+
+def _fts5_search(connection, match, limit):
+    stmt = text(
+        "SELECT q.id, q.text, q.category, q.difficulty, -question_fts.rank AS score "
+        "FROM question_fts JOIN question q ON q.id = question_fts.rowid "
+        "WHERE question_fts MATCH :match ORDER BY question_fts.rank LIMIT :limit"
+    )
+    return [dict(row._mapping) for row in connection.execute(stmt, {'match': match, 'limit': limit})]
+
+
+def _document_counts(connection, tokens):
+    """
+    Document count per token, capped at DOCUMENT_COUNT_CAP
+    Counting stops at the cap, so common words cost no more than rare ones
+    """
+    stmt = text(
+        "SELECT count(*) FROM (SELECT 1 FROM question_fts "
+        "WHERE question_fts MATCH :match LIMIT :cap)"
+    )
+    return {
+        token: connection.execute(stmt, {'match': _fts5_terms([token], ''), 'cap': DOCUMENT_COUNT_CAP}).scalar()
+        for token in tokens
+    }
+
+
+def similarity(a, b):
+    """Jaccard similarity of the normalized word sets of two questions"""
+    words_a, words_b = set(_tokens(a)), set(_tokens(b))
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def find_near_duplicates(question_text, threshold=NEAR_DUPLICATE_THRESHOLD, connection=None):
+    """
+    Stored questions whose word sets are at least `threshold` similar (Jaccard)
+
+    A match shares at least ceil(threshold * n) of the n words, so it misses
+    at most k = n - ceil(threshold * n) of them: it either contains one of the
+    k rarest words (by capped document count) or all of the others. Querying
+    that, then ranking and verifying the top candidates, keeps the check
+    small however large the bank is.
+    """
+    tokens = sorted(set(_tokens(question_text)))
+    if not tokens:
+        return []
+    connection = connection or db.session.connection()
+
+    if search_backend(connection) == 'fts5':
+        counts = _document_counts(connection, tokens)
+        # Ties (often at the cap) go to non-stopwords, then longer words
+        tokens = sorted(tokens, key=lambda token: (counts[token], token in STOPWORDS, -len(token)))
+        misses = min(len(tokens) - math.ceil(threshold * len(tokens)), len(tokens) - 1)
+        groups = [_fts5_terms([token], '') for token in tokens[:misses]]
+        # Any subset of "all of the others" is still implied; the rarest few suffice
+        groups.append(f"({_fts5_terms(tokens[misses:misses + NEAR_DUPLICATE_AND_TERMS], ' ')})")
+        candidates = _fts5_search(connection, ' OR '.join(groups), NEAR_DUPLICATE_CANDIDATES)
+    else:
+        candidate_tokens = [token for token in tokens if token not in STOPWORDS] or tokens
+        candidates = _search_tokens(connection, candidate_tokens, NEAR_DUPLICATE_CANDIDATES, match_any=True)
+
+    matches = []
+    for candidate in candidates:
+        score = similarity(question_text, candidate['text'])
+        if score >= threshold:
+            matches.append(dict(candidate, similarity=score))
+    return sorted(matches, key=lambda match: match['similarity'], reverse=True)
@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import or_, select
+
+from app import db
+from app.models.question import Question, QuestionTombstone
+from app.services.question_bank import get_bank_version
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip is always available
+    brotli = None
+
+DEFAULT_MAX_SNAPSHOTS = 16
+
+
+class Snapshot:
+    """One serialized, compressed copy of the bank (or one category) at a version"""
+
+    def __init__(self, version, category, body):
+        self.version = version
+        self.category = category
+        self.content_hash = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=6)}
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(body, quality=9)
+
+    def etag(self, encoding):
+        # Strong validators are per representation, so the encoding is part of it
+        return f"{self.content_hash}-{encoding}"
+
+
+class QuestionSnapshots:
+    """
+    Per-app store of question bank snapshots for offline play
+
+    A snapshot is built the first time it is requested for a bank version and
+    then served as-is, already compressed, until the version moves. At most
+    `max_snapshots` categories are kept, least recently used first out.
+    """
+
+    def __init__(self, serializer, max_snapshots=DEFAULT_MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._serializer = serializer
+        self._snapshots = OrderedDict()
+        self._lock = Lock()
+        self.builds = 0
+
+    def get(self, category=None):
+        version = get_bank_version()
+        # Building is rare and expensive, so concurrent callers wait for one build
+        with self._lock:
+            snapshot = self._snapshots.get(category)
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._build(version, category)
+                self._snapshots[category] = snapshot
+                self.builds += 1
+            self._snapshots.move_to_end(category)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+            return snapshot
+
+    def _build(self, version, category):
+        stmt = select(*self._serializer.columns).order_by(Question.id)
+        if category:
+            stmt = stmt.where(Question.category == category)
+        questions = self._serializer.dump_rows(db.session.execute(stmt))
+        body = json.dumps(
+            {'version': version, 'category': category, 'questions': questions},
+            separators=(',', ':')
+        ).encode('utf-8')
+        return Snapshot(version, category, body)
+
+
+def question_changes(serializer, since, category=None):
+    """
+    Questions written and IDs deleted after bank version `since`
+    Clients apply `deleted` first, then upsert `questions`. With a category,
+    `deleted` also lists questions moved out of it; without one, a moved
+    question is in both lists and so ends up upserted.
+    """
+    stmt = select(*serializer.columns).where(Question.version > since).order_by(Question.id)
+    deleted_stmt = (
+        select(QuestionTombstone.question_id)
+        .where(QuestionTombstone.version > since)
+        .order_by(QuestionTombstone.id)
+    )
+    if category:
+        stmt = stmt.where(Question.category == category)
+        deleted_stmt = deleted_stmt.where(or_(
+            QuestionTombstone.category == category, QuestionTombstone.category.is_(None)
+        ))
+    questions = serializer.dump_rows(db.session.execute(stmt))
+    deleted = db.session.execute(deleted_stmt).scalars().all()
+    return questions, deleted
+
+
+def init_question_snapshots(app, serializer):
+    max_snapshots = app.config.get('QUESTION_SNAPSHOT_MAX', DEFAULT_MAX_SNAPSHOTS)
+    app.extensions['question_snapshots'] = QuestionSnapshots(serializer, max_snapshots)
+
+
+def get_question_snapshots():
+    return current_app.extensions['question_snapshots']
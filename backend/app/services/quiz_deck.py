@@ -0,0 +1,123 @@
+import hashlib
+import random
+from datetime import datetime
+
+from flask import current_app
+from itsdangerous import BadSignature
+
+from app import db
+from app.models.quiz import QuizDeck
+from app.services.cursors import InvalidCursor, cursor_serializer
+from app.services.question_cache import get_question_cache
+
+FEISTEL_ROUNDS = 4
+MAX_PAGE_SIZE = 50
+
+
+class SeededPermutation:
+    """
+    Bijection of range(size) derived from a seed, evaluated one index at a time
+
+    A small Feistel network shuffles the bits of an index over the next even
+    power of two, and cycle-walking skips values outside range(size). Looking
+    up position i is O(1) no matter how large the deck is, and nothing but the
+    seed has to be stored.
+    """
+
+    def __init__(self, seed, size):
+        self.seed = seed
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        self.half_bits = (bits + 1) // 2
+        self.mask = (1 << self.half_bits) - 1
+
+    def _round(self, round_number, value):
+        digest = hashlib.blake2b(
+            f"{self.seed}:{round_number}:{value}".encode(), digest_size=8
+        ).digest()
+        return int.from_bytes(digest, 'big') & self.mask
+
+    def _encrypt(self, value):
+        left, right = value >> self.half_bits, value & self.mask
+        for round_number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ self._round(round_number, right)
+        return (left << self.half_bits) | right
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        value = self._encrypt(index)
+        # The domain is at most 4x size, so this loop is short on average
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+def encode_cursor(deck, offset):
+    return cursor_serializer('quiz-deck-cursor').dumps([deck.id, offset])
+
+
+def decode_cursor(deck, cursor):
+    """Offset encoded in an opaque cursor, which must belong to `deck`"""
+    try:
+        deck_id, offset = cursor_serializer('quiz-deck-cursor').loads(cursor)
+    except (BadSignature, TypeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+    if deck_id != deck.id or not isinstance(offset, int) or offset < 0:
+        raise InvalidCursor('Invalid cursor')
+    return offset
+
+
+def create_deck(category=None, difficulty=None, page_size=10):
+    """Deal a new deck over the questions currently matching the filter"""
+    cache = get_question_cache()
+    cache.sync()
+    deck = QuizDeck(
+        seed=random.getrandbits(62),
+        category=category,
+        difficulty=difficulty,
+        size=len(cache.sampler.pool(category, difficulty)),
+        page_size=min(max(page_size, 1), MAX_PAGE_SIZE)
+    )
+    db.session.add(deck)
+    db.session.commit()
+    return deck
+
+
+def deck_page(deck, offset=0):
+    """
+    Serialized questions for one page of the deck and the cursor of the next
+
+    Positions map through the seeded permutation into the filter's ID pool,
+    which is ordered by ID. Questions added later get higher IDs and stay
+    out of the deck, but deleting a matching question shifts every later
+    pool index, so pages not yet read may then repeat or skip a question.
+    """
+    cache = get_question_cache()
+    cache.sync()
+    pool = cache.sampler.pool(deck.category, deck.difficulty)
+    size = min(deck.size, len(pool))
+    permutation = SeededPermutation(deck.seed, deck.size)
+
+    end = min(offset + deck.page_size, size)
+    positions = [permutation[position] for position in range(offset, end)]
+    ids = [pool[index] for index in positions if index < size]
+    next_cursor = encode_cursor(deck, end) if end < size else None
+    return cache.get_many(ids), next_cursor
+
+
+def deck_expired(deck, now=None):
+    """Whether the deck is older than QUIZ_DECK_TTL (decks without created_at never expire)"""
+    if deck.created_at is None:
+        return False
+    return deck.created_at < (now or datetime.utcnow()) - current_app.config['QUIZ_DECK_TTL']
+
+
+def prune_quiz_decks(connection, now=None):
+    """Delete decks older than QUIZ_DECK_TTL; returns how many"""
+    cutoff = (now or datetime.utcnow()) - current_app.config['QUIZ_DECK_TTL']
+    table = QuizDeck.__table__
+    return connection.execute(table.delete().where(table.c.created_at < cutoff)).rowcount
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app.models.score import Score
+from app.services.leaderboard import update_leaderboard
+from app.services.player_stats import update_player_stats
+from app.services.score_histogram import update_score_histograms
+from app.services.upsert import upsert_insert
+
+score_table = Score.__table__
+
+INSERT_COLUMNS = ('user_id', 'player_name', 'normal_score', 'trivialer_score', 'score',
+                  'category', 'difficulty', 'questions_answered', 'questions_correct', 'date',
+                  'idempotency_key')
+
+
+def _complete_rows(rows):
+    """Every insert column in every row (multi-row VALUES needs that), dated now if unset"""
+    now = datetime.utcnow()
+    rows = [{column: row.get(column) for column in INSERT_COLUMNS} for row in rows]
+    for row in rows:
+        if row['date'] is None:
+            row['date'] = now
+    return rows
+
+
+def _update_rollups(connection, rows):
+    # Core inserts bypass the ORM flush hooks, so update the rollups here
+    update_player_stats(connection, rows)
+    update_score_histograms(connection, rows)
+    update_leaderboard(connection, rows)
+
+
+def insert_score_rows(connection, rows):
+    """
+    Insert score rows (dicts) with one executemany and return their IDs in order
+    player_stats and the leaderboard are updated in the same transaction
+    """
+    if not rows:
+        return []
+    rows = _complete_rows(rows)
+    if connection.dialect.insert_returning:
+        result = connection.execute(
+            score_table.insert().returning(score_table.c.id, sort_by_parameter_order=True), rows
+        )
+        ids = list(result.scalars())
+    else:
+        ids = [connection.execute(score_table.insert(), row).inserted_primary_key[0] for row in rows]
+    _update_rollups(connection, [dict(row, id=score_id) for row, score_id in zip(rows, ids)])
+    return ids
+
+
+def insert_scores(connection, rows):
+    """
+    Insert score rows (dicts, each with an idempotency_key) in one statement
+    Rows whose key is already stored are skipped by the unique index.
+    Returns {idempotency_key: score id} for the rows inserted; player_stats
+    and the leaderboard are updated for them in the same transaction.
+    """
+    if not rows:
+        return {}
+    rows = _complete_rows(rows)
+
+    insert = upsert_insert(connection, score_table)
+    if insert is not None:
+        stmt = (
+            insert
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=['idempotency_key'])
+            .returning(score_table.c.idempotency_key, score_table.c.id)
+        )
+        inserted = dict(connection.execute(stmt).all())
+    else:
+        # No ON CONFLICT: skip the keys already stored, then look the IDs up
+        keys = [row['idempotency_key'] for row in rows]
+        existing = set(connection.execute(
+            select(score_table.c.idempotency_key).where(score_table.c.idempotency_key.in_(keys))
+        ).scalars())
+        new_rows = [row for row in rows if row['idempotency_key'] not in existing]
+        if not new_rows:
+            return {}
+        connection.execute(score_table.insert(), new_rows)
+        inserted = dict(connection.execute(
+            select(score_table.c.idempotency_key, score_table.c.id)
+            .where(score_table.c.idempotency_key.in_([row['idempotency_key'] for row in new_rows]))
+        ).all())
+
+    new_rows = [dict(row, id=inserted[row['idempotency_key']])
+                for row in rows if row['idempotency_key'] in inserted]
+    _update_rollups(connection, new_rows)
+    return inserted
+
+
+def stored_score_ids(connection, keys):
+    """{idempotency_key: score id} for keys already stored"""
+    if not keys:
+        return {}
+    return dict(connection.execute(
+        select(score_table.c.idempotency_key, score_table.c.id)
+        .where(score_table.c.idempotency_key.in_(list(keys)))
+    ).all())
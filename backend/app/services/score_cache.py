@@ -0,0 +1,179 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.score import PlayerStats, Score
+from app.services.player_stats import score_getter
+
+GLOBAL_SCOPE = 'all'
+DEFAULT_TTL = 2.0
+DEFAULT_MAX_ITEMS = 10000
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def name_scope(player_name):
+    return f'name:{player_name}'
+
+
+def score_scopes(scores):
+    """Read scopes whose responses change when these scores (objects or row dicts) are stored"""
+    scopes = {GLOBAL_SCOPE}
+    for score in scores:
+        get = score_getter(score)
+        if get('user_id') is not None:
+            scopes.add(user_scope(get('user_id')))
+        if get('player_name') is not None:
+            scopes.add(name_scope(get('player_name')))
+    return scopes
+
+
+def read_marker(scope, connection=None):
+    """
+    Current change marker of a read scope, from data the writes maintain anyway
+    The newest score id globally, a player's game count from player_stats;
+    both only move when a score in the scope is stored (one indexed lookup).
+    """
+    if scope == GLOBAL_SCOPE:
+        stmt = select(func.max(Score.id))
+    else:
+        kind, _, value = scope.partition(':')
+        key = PlayerStats.user_id == int(value) if kind == 'user' else PlayerStats.player_name == value
+        stmt = select(PlayerStats.games).where(key)
+    return (connection or db.session).execute(stmt).scalar() or 0
+
+
+class ScoreReadCache:
+    """
+    Per-worker change markers and responses for score reads
+
+    A scope's marker is read from the database at most once per `ttl`
+    seconds; within that window an If-None-Match check or a repeat read
+    of a cached response issues no SQL at all. Writes in this worker drop
+    the markers of the scopes they touch once committed, so its own reads
+    see them at once; writes in other workers show up within `ttl`.
+    Markers and responses live in LRUs bounded by `max_items` each.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_items=DEFAULT_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._markers = OrderedDict()
+        self._responses = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def _get(self, entries, key):
+        with self._lock:
+            entry = entries.get(key)
+            if entry is None or time.monotonic() - entry[1] >= self.ttl:
+                return None
+            entries.move_to_end(key)
+            return entry[0]
+
+    def _put(self, entries, key, value):
+        with self._lock:
+            entries[key] = (value, time.monotonic())
+            entries.move_to_end(key)
+            while len(entries) > self.max_items:
+                entries.popitem(last=False)
+
+    def marker(self, scope):
+        marker = self._get(self._markers, scope)
+        if marker is None:
+            marker = read_marker(scope)
+            self._put(self._markers, scope, marker)
+        return marker
+
+    def etag(self, scope, path):
+        """ETag of the response for `path` (with its query string) in `scope`"""
+        key = f'{scope}\0{self.marker(scope)}\0{path}'
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def get(self, etag):
+        body = self._get(self._responses, etag)
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return body
+
+    def put(self, etag, body):
+        self._put(self._responses, etag, body)
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def invalidate(self, scopes):
+        with self._lock:
+            for scope in scopes:
+                self._markers.pop(scope, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'markers': len(self._markers),
+                'responses': len(self._responses),
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'ttl': self.ttl,
+            }
+
+
+def init_score_read_cache(app):
+    app.extensions['score_read_cache'] = ScoreReadCache(
+        ttl=app.config.get('SCORE_CACHE_TTL', DEFAULT_TTL),
+        max_items=app.config.get('SCORE_CACHE_MAX_ITEMS', DEFAULT_MAX_ITEMS),
+    )
+
+
+def get_score_read_cache():
+    return current_app.extensions['score_read_cache']
+
+
+def scores_written(scopes, app=None):
+    """Drop the markers of `scopes` after a commit that stored scores in them"""
+    if app is None:
+        if not has_app_context():
+            return
+        app = current_app
+    cache = app.extensions.get('score_read_cache')
+    if cache is not None:
+        cache.invalidate(scopes)
+
+
+def note_score_writes(session, scores):
+    """Have the session drop these scores' read scopes once it commits"""
+    session.info.setdefault('score_scopes', set()).update(score_scopes(scores))
+
+
+@event.listens_for(Session, 'before_flush')
+def _note_new_scores(session, flush_context, instances):
+    scores = [obj for obj in session.new if isinstance(obj, Score)]
+    if scores:
+        note_score_writes(session, scores)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_written_scopes(session):
+    scopes = session.info.pop('score_scopes', None)
+    if scopes:
+        scores_written(scopes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_written_scopes(session):
+    session.info.pop('score_scopes', None)
@@ -0,0 +1,162 @@
+"""
+Per-scope score histograms for percentile lookups
+
+Scores 0..EXACT_LIMIT-1 get one bucket each, so their percentiles are
+exact. Each doubling above that is split into SUB_BUCKETS equal buckets,
+so a bucket spans values within 1 / SUB_BUCKETS (6.25%) of its lowest
+value. A scope (mode, category, difficulty) therefore never has more
+than MAX_BUCKETS rows (624 for the 31-bit score column), which bounds
+both memory and the cost of a lookup regardless of how many scores exist.
+
+The percentile of a score is the share of stored scores in lower buckets.
+For exact buckets that is precisely the share of lower scores; above
+EXACT_LIMIT, scores in the same bucket (within 6.25% of the value) are
+counted as not beaten, so the result can be low by at most that bucket's
+share, which score_percentile reports as `max_error`.
+"""
+from sqlalchemy import case, delete, event, func, select
+from sqlalchemy.orm import Session
+
+from app.models.score import Score, ScoreHistogram
+from app.services.leaderboard import MODES, scopes
+from app.services.player_stats import effective_score, score_getter
+from app.services.upsert import upsert_insert
+
+histogram_table = ScoreHistogram.__table__
+
+EXACT_LIMIT = 256
+SUB_BUCKETS = 16
+# Score columns are signed 32-bit integers
+SCORE_BITS = 31
+MAX_BUCKETS = EXACT_LIMIT + (SCORE_BITS - EXACT_LIMIT.bit_length() + 1) * SUB_BUCKETS
+
+
+def histogram_bucket(value):
+    """Bucket number of a score; negative scores share bucket 0 with 0"""
+    value = max(int(value or 0), 0)
+    if value < EXACT_LIMIT:
+        return value
+    # Octave above EXACT_LIMIT, then the position within it in SUB_BUCKETS steps
+    octave = value.bit_length() - EXACT_LIMIT.bit_length()
+    low = EXACT_LIMIT << octave
+    return EXACT_LIMIT + octave * SUB_BUCKETS + (value - low) * SUB_BUCKETS // low
+
+
+def bucket_bounds(bucket):
+    """(lowest, highest) score stored in a bucket"""
+    if bucket < EXACT_LIMIT:
+        return bucket, bucket
+    octave, step = divmod(bucket - EXACT_LIMIT, SUB_BUCKETS)
+    low = EXACT_LIMIT << octave
+    return low + -(-step * low // SUB_BUCKETS), low + -(-(step + 1) * low // SUB_BUCKETS) - 1
+
+
+def adjust_score_histograms(connection, deltas):
+    """Apply {(mode, category, difficulty, bucket): delta} to score_histogram"""
+    rows = [{'mode': mode, 'category': category, 'difficulty': difficulty, 'bucket': bucket, 'count': delta}
+            for (mode, category, difficulty, bucket), delta in deltas.items()]
+    if not rows:
+        return
+    insert = upsert_insert(connection, histogram_table)
+    if insert is not None:
+        connection.execute(insert.on_conflict_do_update(
+            index_elements=['mode', 'category', 'difficulty', 'bucket'],
+            set_={'count': histogram_table.c.count + insert.excluded['count']}
+        ), rows)
+        return
+
+    # No ON CONFLICT: update, then insert the keys that matched no row
+    for row in rows:
+        key = (
+            histogram_table.c.mode == row['mode'], histogram_table.c.category == row['category'],
+            histogram_table.c.difficulty == row['difficulty'], histogram_table.c.bucket == row['bucket'],
+        )
+        result = connection.execute(
+            histogram_table.update().where(*key).values(count=histogram_table.c.count + row['count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(histogram_table.insert().values(row))
+
+
+def update_score_histograms(connection, scores):
+    """
+    Count new scores (Score objects or row dicts) into their histograms
+    Must run in the transaction that inserts them; ORM inserts do this
+    through the before_flush hook below, Core inserts call it directly
+    """
+    deltas = {}
+    for score in scores:
+        get = score_getter(score)
+        for mode in MODES:
+            bucket = histogram_bucket(get(f'{mode}_score') or get('score') or 0)
+            for category, difficulty in scopes(get('category'), get('difficulty')):
+                key = (mode, category, difficulty, bucket)
+                deltas[key] = deltas.get(key, 0) + 1
+    adjust_score_histograms(connection, deltas)
+
+
+@event.listens_for(Session, 'before_flush')
+def _count_new_scores(session, flush_context, instances):
+    scores = [obj for obj in session.new if isinstance(obj, Score)]
+    if scores:
+        update_score_histograms(session.connection(), scores)
+
+
+def score_percentile(connection, mode, value, category=None, difficulty=None):
+    """
+    Share of stored scores a score beats in a scope, as a percentage
+    Reads at most MAX_BUCKETS rows of one scope off the primary key.
+    Returns {'percentile', 'below', 'total', 'max_error'}; percentile is
+    None while the scope has no scores.
+    """
+    bucket = histogram_bucket(value)
+    below, same, total = connection.execute(
+        select(
+            func.coalesce(func.sum(case((histogram_table.c.bucket < bucket, histogram_table.c.count),
+                                        else_=0)), 0),
+            func.coalesce(func.sum(case((histogram_table.c.bucket == bucket, histogram_table.c.count),
+                                        else_=0)), 0),
+            func.coalesce(func.sum(histogram_table.c.count), 0),
+        ).where(
+            histogram_table.c.mode == mode,
+            histogram_table.c.category == (category or ''),
+            histogram_table.c.difficulty == (difficulty or 0),
+        )
+    ).one()
+    if not total:
+        return {'percentile': None, 'below': 0, 'total': 0, 'max_error': 0.0}
+    # Only same-bucket scores below `value` are miscounted, and exact buckets hold one value
+    exact = bucket < EXACT_LIMIT
+    return {
+        'percentile': round(100.0 * below / total, 2),
+        'below': int(below),
+        'total': int(total),
+        'max_error': 0.0 if exact else round(100.0 * same / total, 2),
+    }
+
+
+def rebuild_score_histograms(connection):
+    """
+    Recompute score_histogram from the score table; returns rows written
+    Scores are grouped by value in SQL (few distinct values) and bucketed here.
+    """
+    connection.execute(delete(histogram_table))
+    deltas = {}
+    for mode in MODES:
+        value = effective_score(getattr(Score, f'{mode}_score'))
+        rows = connection.execute(
+            select(Score.category, Score.difficulty, value, func.count())
+            .group_by(Score.category, Score.difficulty, value)
+        )
+        for category, difficulty, score, count in rows:
+            bucket = histogram_bucket(score)
+            for scope in scopes(category, difficulty):
+                key = (mode, *scope, bucket)
+                deltas[key] = deltas.get(key, 0) + count
+    if deltas:
+        connection.execute(histogram_table.insert(), [
+            {'mode': mode, 'category': category, 'difficulty': difficulty, 'bucket': bucket,
+             'count': count}
+            for (mode, category, difficulty, bucket), count in deltas.items()
+        ])
+    return len(deltas)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from itsdangerous import BadSignature
+
+from app.services.cursors import InvalidCursor, cursor_serializer
+
+SCORE_PAGE_DEFAULT = 50
+SCORE_PAGE_MAX = 200
+CURSOR_SALT = 'score-history-cursor'
+
+
+def encode_score_cursor(row):
+    """Opaque cursor for the keyset position just after `row` (newest first)"""
+    date = row.date.isoformat() if row.date is not None else None
+    return cursor_serializer(CURSOR_SALT).dumps([date, row.id])
+
+
+def decode_score_cursor(cursor):
+    """
+    (date, id) keyset position from a cursor made by encode_score_cursor
+    date is None for legacy scores without one, which sort after the rest
+    """
+    try:
+        date, score_id = cursor_serializer(CURSOR_SALT).loads(cursor)
+        return (datetime.fromisoformat(date) if date is not None else None), int(score_id)
+    except (BadSignature, TypeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
@@ -0,0 +1,170 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import current_app
+
+from app import db
+from app.services.score_batch import insert_score_rows
+from app.services.score_cache import score_scopes, scores_written
+
+DEFAULT_MAX_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.005
+DEFAULT_PUT_TIMEOUT = 0.5
+
+
+class QueueFull(Exception):
+    """The write-behind queue stayed full for the whole put timeout"""
+
+
+class ScoreWriteQueue:
+    """
+    Write-behind ingestion for submitted scores
+
+    Request threads put validated score rows on a bounded queue and return;
+    one writer thread inserts them in batches of up to `batch_size`, or
+    whatever arrived within `flush_interval` of the first row, with one
+    commit per batch (see insert_score_rows). When the queue is full,
+    `submit` blocks for up to `put_timeout` and then raises QueueFull, so
+    callers can shed load. Every row gets a Future resolved with its score
+    id once committed, which is how read-your-writes callers wait. `close`
+    drains what is queued, including puts already in progress; it is
+    registered to run at interpreter exit.
+    """
+
+    def __init__(self, app, max_size=DEFAULT_MAX_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, put_timeout=DEFAULT_PUT_TIMEOUT):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(max_size)
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        # submit() calls past the closed check whose put has not returned yet
+        self._submitting = 0
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        self._thread = threading.Thread(target=self._run, name='score-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, row):
+        """Queue a score row (dict) and return a Future of its id"""
+        # Checked under the lock close() sets it with, so the writer keeps
+        # draining until every put that got past this check has landed
+        with self._lock:
+            if self._closed.is_set():
+                raise QueueFull('Score queue is shut down')
+            self._submitting += 1
+        future = Future()
+        try:
+            self._queue.put((row, future), timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFull('Score queue is full')
+        finally:
+            with self._lock:
+                self._submitting -= 1
+        return future
+
+    def close(self, timeout=30):
+        """Stop accepting scores and wait for the queued ones to be written"""
+        with self._lock:
+            if self._closed.is_set():
+                return
+            self._closed.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Out of time: fail what the writer has not picked up yet
+            while True:
+                try:
+                    _, future = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                future.set_exception(QueueFull('Score queue shut down before the score was written'))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'batches': self.batches,
+                'written': self.written,
+                'failed': self.failed,
+                'rejected': self.rejected,
+            }
+
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _drained(self):
+        with self._lock:
+            return self._closed.is_set() and not self._submitting and self._queue.empty()
+
+    def _run(self):
+        # Keep going after close() until the queue is drained
+        while not self._drained():
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        with self.app.app_context():
+            try:
+                self._write([row for row, _ in batch], [future for _, future in batch])
+            except Exception:
+                # One bad row must not lose the rest of the batch
+                for row, future in batch:
+                    try:
+                        self._write([row], [future])
+                    except Exception as error:
+                        with self._lock:
+                            self.failed += 1
+                        self.app.logger.exception('Dropped queued score %r', row)
+                        future.set_exception(error)
+            finally:
+                db.session.remove()
+
+    def _write(self, rows, futures):
+        with db.engine.begin() as connection:
+            ids = insert_score_rows(connection, rows)
+        scores_written(score_scopes(rows), self.app)
+        with self._lock:
+            self.batches += 1
+            self.written += len(rows)
+        for future, score_id in zip(futures, ids):
+            future.set_result(score_id)
+
+
+def init_score_queue(app):
+    """Attach a write-behind queue to the app when SCORE_WRITE_BEHIND is on"""
+    app.extensions['score_queue'] = ScoreWriteQueue(
+        app,
+        max_size=app.config.get('SCORE_QUEUE_MAX_SIZE', DEFAULT_MAX_SIZE),
+        batch_size=app.config.get('SCORE_QUEUE_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+        flush_interval=app.config.get('SCORE_QUEUE_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+        put_timeout=app.config.get('SCORE_QUEUE_PUT_TIMEOUT', DEFAULT_PUT_TIMEOUT),
+    ) if app.config.get('SCORE_WRITE_BEHIND') else None
+
+
+def get_score_queue():
+    return current_app.extensions.get('score_queue')
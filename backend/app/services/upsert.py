@@ -0,0 +1,12 @@
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# Dialects with INSERT ... ON CONFLICT, which settles concurrent writers to
+# the same key inside the database instead of failing one of them
+UPSERT_INSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+
+def upsert_insert(connection, table):
+    """INSERT into `table` with ON CONFLICT support, or None on other dialects"""
+    make_insert = UPSERT_INSERTS.get(connection.dialect.name)
+    return make_insert(table) if make_insert is not None else None
@@ -0,0 +1,99 @@
+"""
+Serialize a question bank with the old '|' string storage and the JSON list
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_answer_storage
+    python -m benchmarks.bench_answer_storage --size 100000
+
+"before" reproduces the old path: a VARCHAR column dumped by a marshmallow
+schema whose Method field splits the string on every read. "after" reads the
+JSON column, which the driver decodes once per row, through the compiled
+question serializer.
+"""
+import argparse
+import time
+
+import sqlalchemy as sa
+from marshmallow import Schema, fields
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.question import Question
+from app.schemas.question import question_serializer
+
+INSERT_BATCH = 50000
+
+legacy_question = sa.Table(
+    'legacy_question', sa.MetaData(),
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('text', sa.String(500)),
+    sa.Column('category', sa.String(100)),
+    sa.Column('difficulty', sa.Integer),
+    sa.Column('correct_answer', sa.String(200)),
+    sa.Column('incorrect_answers', sa.String(600)),
+)
+
+
+class LegacyQuestionSchema(Schema):
+    id = fields.Integer()
+    text = fields.String()
+    category = fields.String()
+    difficulty = fields.Integer()
+    correct_answer = fields.String()
+    incorrect_answers = fields.Method("get_incorrect_answers")
+
+    def get_incorrect_answers(self, obj):
+        return obj.incorrect_answers.split('|')
+
+
+def populate(size):
+    legacy_question.create(db.session.connection())
+    answers = ["Wrong answer one", "Wrong answer two", "Wrong answer three"]
+    for start in range(0, size, INSERT_BATCH):
+        rows = [{
+            "text": f"Benchmark question #{i}",
+            "category": "Science",
+            "difficulty": 1 + i % 3,
+            "correct_answer": f"Answer {i}",
+            "incorrect_answers": answers,
+        } for i in range(start, min(size, start + INSERT_BATCH))]
+        db.session.execute(Question.__table__.insert(), rows)
+        for row in rows:
+            row["incorrect_answers"] = '|'.join(answers)
+        db.session.execute(legacy_question.insert(), rows)
+    db.session.commit()
+
+
+def timed(label, size, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    assert len(result) == size
+    print(f"{label:<42} | {elapsed * 1000:>9.1f} | {size / elapsed:>12,.0f}")
+    return result
+
+
+def main(size):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        populate(size)
+        legacy_columns = [legacy_question.c[name] for name in
+                          ('id', 'text', 'category', 'difficulty', 'correct_answer', 'incorrect_answers')]
+
+        print(f"{'path':<42} | {'ms':>9} | {'questions/s':>12}")
+        before = timed("before: VARCHAR + marshmallow split", size, lambda: LegacyQuestionSchema(many=True).dump(
+            db.session.execute(sa.select(*legacy_columns)).all()))
+        timed("before: VARCHAR + plain split", size, lambda: [
+            dict(row._mapping, incorrect_answers=row.incorrect_answers.split('|'))
+            for row in db.session.execute(sa.select(*legacy_columns))])
+        after = timed("after: JSON column + compiled serializer", size, lambda: question_serializer.dump_rows(
+            db.session.execute(sa.select(*question_serializer.columns))))
+
+        assert before[0]['incorrect_answers'] == after[0]['incorrect_answers']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=100000)
+    args = parser.parse_args()
+    main(args.size)
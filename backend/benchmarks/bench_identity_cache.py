@@ -0,0 +1,75 @@
+"""
+Time authenticated requests with and without the JWT identity cache
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_identity_cache
+    python -m benchmarks.bench_identity_cache --users 100000 --requests 500
+
+Nickname users are bulk inserted into the in-memory test database and one
+of them signs in. "uncached" sets the identity cache TTL to 0, so every
+request loads the user as before; SQL counts the statements per request.
+"""
+import argparse
+import statistics
+import time
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, insert
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.user import User
+
+REQUESTS = {
+    'GET /api/auth/me': lambda client, headers: client.get('/api/auth/me', headers=headers),
+    'POST /api/scores': lambda client, headers: client.post(
+        '/api/scores', json={'normal_score': 70, 'trivialer_score': 30}, headers=headers),
+}
+
+
+def timed(call, repeat):
+    statements = []
+    def count(*args):
+        statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', count)
+    timings = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return statistics.median(timings), len(statements) / repeat
+
+
+def main(users, requests):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [
+            {'username': f'player{n}', 'username_lower': f'player{n}', 'email': f'player{n}@trivia.local'}
+            for n in range(users)
+        ])
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(users // 2))}'}
+        client = app.test_client()
+        cache = app.extensions['identity_cache']
+
+        print(f"{users:,} users")
+        print(f"{'request':<18} | {'uncached ms':>11} | {'SQL':>5} | {'cached ms':>9} | {'SQL':>5}")
+        for name, call in REQUESTS.items():
+            ttl, cache.ttl = cache.ttl, 0
+            uncached, uncached_sql = timed(lambda: call(client, headers), requests)
+            cache.ttl = ttl
+            cached, cached_sql = timed(lambda: call(client, headers), requests)
+            print(f"{name:<18} | {uncached:>11.2f} | {uncached_sql:>5.1f} | {cached:>9.2f} | {cached_sql:>5.1f}")
+        print(f"hit ratio {cache.stats()['hit_ratio']:.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+    main(args.users, args.requests)
@@ -0,0 +1,138 @@
+"""
+Read GET /api/leaderboard at 10M scores and compare with ranking the score table
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_leaderboard
+    python -m benchmarks.bench_leaderboard --size 1000000 --players 20000
+
+Scores are bulk inserted into a SQLite file (10M rows do not fit the
+in-memory test database comfortably) and the leaderboard is built once with
+rebuild_leaderboard and rebuild_leaderboard_buckets, with score dates
+ending now so the daily/weekly/monthly windows have data. "ranked from score" is the query the endpoint would
+need without the maintained table: best per player via GROUP BY, sorted.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.score import Score
+from app.services.leaderboard import rebuild_leaderboard, rebuild_leaderboard_buckets
+
+INSERT_BATCH = 100000
+CATEGORIES = ['General Knowledge', 'Science', 'History', 'Geography', 'Sports',
+              'Film', 'Music', 'Books', 'Art', 'Animals']
+
+
+def populate(size, players):
+    rng = random.Random(0)
+    start_date = datetime.utcnow() - timedelta(seconds=size)
+    for start in range(0, size, INSERT_BATCH):
+        rows = []
+        for i in range(start, min(size, start + INSERT_BATCH)):
+            player = rng.randrange(players)
+            rows.append({
+                "player_name": f"player{player}",
+                "normal_score": rng.randrange(1000),
+                "trivialer_score": rng.randrange(1000),
+                "score": 0,
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "difficulty": 1 + i % 3,
+                "questions_answered": 10,
+                "questions_correct": rng.randrange(11),
+                "date": start_date + timedelta(seconds=i),
+            })
+        db.session.execute(Score.__table__.insert(), rows)
+        db.session.commit()
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return percentiles(timings)
+
+
+def main(size, players, requests, database):
+    if os.path.exists(database):
+        os.remove(database)
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        started = time.perf_counter()
+        populate(size, players)
+        print(f"inserted {size:,} scores for {players:,} players in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            entries = rebuild_leaderboard(connection)
+        print(f"rebuilt {entries:,} leaderboard entries in {time.perf_counter() - started:.1f}s")
+        
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            buckets = rebuild_leaderboard_buckets(connection)
+        print(f"rebuilt {buckets:,} window buckets in {time.perf_counter() - started:.1f}s")
+
+        client = app.test_client()
+        rng = random.Random(1)
+        cases = {
+            'all, top 10': lambda: client.get('/api/leaderboard'),
+            'trivialer, top 100': lambda: client.get('/api/leaderboard?mode=trivialer&limit=100'),
+            'category + difficulty': lambda: client.get(
+                f"/api/leaderboard?category={rng.choice(CATEGORIES)}&difficulty={rng.randint(1, 3)}"
+            ),
+            'this week, top 10': lambda: client.get('/api/leaderboard?window=week'),
+            'today, category': lambda: client.get(
+                f"/api/leaderboard?window=day&category={rng.choice(CATEGORIES)}"
+            ),
+            'submit a score': lambda: client.post('/api/scores/legacy', json={
+                'player_name': f"player{rng.randrange(players)}", 'normal_score': rng.randrange(1000),
+                'category': rng.choice(CATEGORIES), 'difficulty': rng.randint(1, 3),
+            }),
+        }
+        print(f"{'case':<28} | {'p50 ms':>9} | {'p99 ms':>9}")
+        for name, call in cases.items():
+            p50, p99 = timed(call, requests)
+            print(f"{name:<28} | {p50:>9.2f} | {p99:>9.2f}")
+
+        best = func.max(Score.normal_score).label('best')
+        ranked = (
+            select(Score.player_name, best)
+            .group_by(Score.player_name)
+            .order_by(best.desc())
+            .limit(10)
+        )
+        p50, _ = timed(lambda: db.session.execute(ranked).all(), 3)
+        print(f"{'ranked from score (top 10)':<28} | {p50:>9.2f} | {'-':>9}")
+        
+        week = ranked.where(Score.date >= datetime.utcnow() - timedelta(days=7))
+        p50, _ = timed(lambda: db.session.execute(week).all(), 3)
+        print(f"{'ranked from score (7 days)':<28} | {p50:>9.2f} | {'-':>9}")
+
+    os.remove(database)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=10000000)
+    parser.add_argument('--players', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--database', default='/tmp/bench_leaderboard.db')
+    args = parser.parse_args()
+    main(args.size, args.players, args.requests, args.database)
@@ -0,0 +1,106 @@
+"""
+Measure GET /api/questions latency during a login storm, hashing inline vs in a process pool
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_login_storm
+    python -m benchmarks.bench_login_storm --login-threads 7 --seconds 10
+
+`--login-threads` request threads post to /api/auth/login for `--seconds`
+while one more thread polls /api/questions and records its latency (8
+threads, as many as the Procfile's 2 workers x 4 threads). "quiet" has no
+logins; "inline" hashes on the request threads as before; "pool" uses
+PASSWORD_HASH_WORKERS processes. Shed logins are the 503s of the
+admission limit.
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.user import User
+from benchmarks.bench_question_sampling import populate
+
+MODES = {
+    'quiet': {'PASSWORD_HASH_WORKERS': 0, 'logins': False},
+    'inline': {'PASSWORD_HASH_WORKERS': 0},
+    'pool, 1 process': {'PASSWORD_HASH_WORKERS': 1},
+    'pool, 2 processes': {'PASSWORD_HASH_WORKERS': 2},
+}
+QUESTIONS_URL = '/api/questions?category=Science&difficulty=2&amount=10'
+
+
+def percentile(timings, share):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+def run(mode, login_threads, seconds, method):
+    options = dict(MODES[mode])
+    logins = options.pop('logins', True)
+
+    class BenchConfig(TestingConfig):
+        PASSWORD_HASH_METHOD = method
+    for name, value in options.items():
+        setattr(BenchConfig, name, value)
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        populate(5000)
+        user = User(username='stormer', email='stormer@example.com')
+        user.set_password('Password123')
+        db.session.add(user)
+        db.session.commit()
+        hasher = app.extensions['password_hasher']
+        # Start the pool and load the question cache before timing
+        hasher.check(user.password_hash, 'Password123')
+    app.test_client().get(QUESTIONS_URL)
+
+    done = threading.Event()
+    statuses = []
+    timings = []
+
+    def login():
+        client = app.test_client()
+        while not done.is_set():
+            response = client.post('/api/auth/login', json={'username': 'stormer', 'password': 'Password123'})
+            statuses.append(response.status_code)
+
+    def poll():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            assert client.get(QUESTIONS_URL).status_code == 200
+            timings.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=poll)]
+    if logins:
+        threads += [threading.Thread(target=login) for _ in range(login_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    done.set()
+    for thread in threads:
+        thread.join()
+    hasher.close()
+    return (statistics.median(timings), percentile(timings, 0.99), len(timings),
+            statuses.count(200) / seconds, statuses.count(503))
+
+
+def main(login_threads, seconds, method):
+    print(f"{login_threads} login threads, {seconds}s per mode, {method}")
+    print(f"{'mode':<18} | {'p50 ms':>7} | {'p99 ms':>8} | {'reads':>6} | {'logins/s':>8} | {'shed':>5}")
+    for mode in MODES:
+        p50, p99, reads, logins, shed = run(mode, login_threads, seconds, method)
+        print(f"{mode:<18} | {p50:>7.2f} | {p99:>8.2f} | {reads:>6} | {logins:>8.1f} | {shed:>5}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--login-threads', type=int, default=7)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--method', default=TestingConfig.PASSWORD_HASH_METHOD)
+    args = parser.parse_args()
+    main(args.login_threads, args.seconds, args.method)
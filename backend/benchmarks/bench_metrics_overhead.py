@@ -0,0 +1,72 @@
+"""
+Measure the per-request cost of the /api/metrics instrumentation
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_metrics_overhead
+    python -m benchmarks.bench_metrics_overhead --requests 5000
+
+Each endpoint is timed with METRICS off and on, alternating request by
+request (the median of each), against BUDGET_PERCENT of added latency.
+The rows go from a cached question read to a score submission with about
+ten statements. Most of the cost is per SQL statement, as any cursor event
+listener takes SQLAlchemy off its no-events path.
+"""
+import argparse
+import contextlib
+import io
+import statistics
+import time
+
+from app import create_app, db
+from app.config import TestingConfig
+from benchmarks.bench_question_sampling import populate
+
+# Instrumentation may add at most this share to a request's latency
+BUDGET_PERCENT = 10
+REQUESTS = {
+    'GET /api/questions': lambda client: client.get('/api/questions?category=Science&amount=10'),
+    'GET /api/scores/stats': lambda client: client.get('/api/scores/stats?nickname=player1'),
+    'POST /api/scores/legacy': lambda client: client.post(
+        '/api/scores/legacy', json={'player_name': 'player1', 'normal_score': 50}),
+}
+
+
+def make_client(metrics):
+    class BenchConfig(TestingConfig):
+        METRICS = metrics
+        SCORE_CACHE_TTL = 0
+    app = create_app(BenchConfig)
+    with app.app_context():
+        populate(1000)
+    client = app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for call in REQUESTS.values():
+            call(client)
+    return client
+
+
+def main(requests):
+    clients = {False: make_client(False), True: make_client(True)}
+    print(f"{requests:,} requests per endpoint and mode, budget {BUDGET_PERCENT}%")
+    print(f"{'request':<24} | {'off us':>8} | {'on us':>8} | {'added us':>8} | {'added %':>7}")
+    for name, call in REQUESTS.items():
+        timings = {False: [], True: []}
+        # Interleaved request by request, so drift affects both modes alike;
+        # without the routes' print() output
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(requests):
+                for metrics, client in clients.items():
+                    start = time.perf_counter()
+                    call(client)
+                    timings[metrics].append((time.perf_counter() - start) * 1e6)
+        off = statistics.median(timings[False])
+        on = statistics.median(timings[True])
+        flag = '' if (on - off) / off * 100 <= BUDGET_PERCENT else '  over budget'
+        print(f"{name:<24} | {off:>8.1f} | {on:>8.1f} | {on - off:>8.1f} | {(on - off) / off:>7.1%}{flag}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+    main(args.requests)
@@ -0,0 +1,104 @@
+"""
+Time nickname availability checks at 5M users: ilike scan, username_lower index, Bloom filter
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_nickname_check
+    python -m benchmarks.bench_nickname_check --users 1000000
+
+Users are bulk inserted into a SQLite file. "ilike" is the query
+check-nickname used before (a scan: the unique username index cannot serve
+a case-insensitive match); "username_lower" is the indexed lookup it does
+when the filter cannot rule a name out; the endpoint rows go through
+POST /api/auth/check-nickname with the filter loaded.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from sqlalchemy import select
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.user import User
+from app.services.nickname_filter import NicknameFilter
+
+INSERT_BATCH = 100000
+
+
+def populate(users):
+    for start in range(0, users, INSERT_BATCH):
+        rows = [{'username': f'Player{i}', 'username_lower': f'player{i}'}
+                for i in range(start, min(users, start + INSERT_BATCH))]
+        db.session.execute(User.__table__.insert(), rows)
+        db.session.commit()
+
+
+def timed(call, names):
+    timings = []
+    for name in names:
+        start = time.perf_counter()
+        call(name)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(users, requests, database):
+    if os.path.exists(database):
+        os.remove(database)
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        started = time.perf_counter()
+        populate(users)
+        print(f"inserted {users:,} users in {time.perf_counter() - started:.1f}s")
+
+        nickname_filter = NicknameFilter(app, refresh_interval=3600)
+        started = time.perf_counter()
+        nickname_filter.build()
+        stats = nickname_filter.stats()
+        print(f"loaded the filter in {time.perf_counter() - started:.1f}s: {stats['bytes'] / 2**20:.1f} MiB, "
+              f"{stats['hashes']} hashes")
+        app.extensions['nickname_filter'] = nickname_filter
+
+        free = [f'Newcomer{i}' for i in range(requests)]
+        taken = [f'PLAYER{i * 7919 % users}' for i in range(requests)]
+        client = app.test_client()
+
+        def check(name):
+            return client.post('/api/auth/check-nickname', json={'nickname': name})
+
+        def ilike(name):
+            return db.session.execute(select(User.id).where(User.username.ilike(name)).limit(1)).first()
+
+        def lower(name):
+            return db.session.execute(
+                select(User.id).where(User.username_lower == name.lower()).limit(1)
+            ).first()
+
+        print(f"{'check':<32} | {'p50 ms':>9}")
+        for label, call, names in [
+            ('ilike, free name (3 runs)', ilike, free[:3]),
+            ('username_lower, free name', lower, free),
+            ('username_lower, taken name', lower, taken),
+            ('filter only, free name', lambda name: nickname_filter.is_available(name.lower()), free),
+            ('endpoint, free name', check, free),
+            ('endpoint, taken name', check, taken),
+        ]:
+            print(f"{label:<32} | {timed(call, names):>9.3f}")
+        unsure = sum(nickname_filter.is_available(name.lower()) is None for name in free)
+        print(f"free names the filter could not rule out: {unsure}/{requests}")
+
+    os.remove(database)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=5000000)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--database', default='/tmp/bench_nickname_check.db')
+    args = parser.parse_args()
+    main(args.users, args.requests, args.database)
@@ -0,0 +1,75 @@
+"""
+Benchmark GET /api/questions against question banks of increasing size
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_question_sampling
+    python -m benchmarks.bench_question_sampling --sizes 1000 100000 --requests 500
+
+For every bank size the first request pays the one-off pool load, after that
+each quiz start should cost the same no matter how many questions exist.
+"""
+import argparse
+import statistics
+import time
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.question import Question
+
+CATEGORIES = ["Science", "History", "Geography", "Music", "Movies"]
+INSERT_BATCH = 50000
+
+
+def populate(total):
+    rows = []
+    for i in range(total):
+        rows.append({
+            "text": f"Benchmark question #{i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "difficulty": 1 + i % 3,
+            "correct_answer": f"Answer {i}",
+            "incorrect_answers": ["Wrong 1", "Wrong 2", "Wrong 3"],
+        })
+        if len(rows) == INSERT_BATCH:
+            db.session.execute(Question.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(Question.__table__.insert(), rows)
+    db.session.commit()
+
+
+def time_requests(client, url, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    return timings
+
+
+def run(size, requests):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        populate(size)
+        client = app.test_client()
+        url = '/api/questions?category=Science&difficulty=2&amount=10'
+
+        cold = time_requests(client, url, 1)[0]
+        warm = sorted(time_requests(client, url, requests))
+        p99 = warm[min(len(warm) - 1, int(len(warm) * 0.99))]
+        print(f"{size:>10,} | {cold:>9.2f} | {statistics.median(warm):>9.3f} | {p99:>9.3f}")
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'questions':>10} | {'cold ms':>9} | {'p50 ms':>9} | {'p99 ms':>9}")
+    for size in args.sizes:
+        run(size, args.requests)
@@ -0,0 +1,81 @@
+"""
+Benchmark GET /api/questions/search and the importer's near-duplicate check
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_question_search
+    python -m benchmarks.bench_question_search --size 100000 --requests 100
+
+Each question mixes two words from a tiny vocabulary (each in ~10% of the
+bank, the worst case for ranking) with two from a larger one.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.question import Question
+from app.services.question_search import find_near_duplicates
+
+INSERT_BATCH = 50000
+WORDS = ("planet ocean river mountain king queen war treaty element atom "
+         "painter novel composer film team league capital island desert volcano").split()
+RARE_WORDS = [f"{word}{suffix}" for word in WORDS for suffix in
+              "abcdefghijklmnopqrstuvwxyz"]
+
+
+def make_text(rng, number):
+    return f"Which {' '.join(rng.sample(WORDS, 2) + rng.sample(RARE_WORDS, 2))} is number {number}?"
+
+
+def populate(size):
+    rng = random.Random(0)
+    for start in range(0, size, INSERT_BATCH):
+        rows = [{
+            "text": make_text(rng, i),
+            "category": "Science",
+            "difficulty": 1,
+            "correct_answer": "A",
+            "incorrect_answers": ["B", "C", "D"],
+        } for i in range(start, min(size, start + INSERT_BATCH))]
+        db.session.execute(Question.__table__.insert(), rows)
+    db.session.commit()
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+
+def main(size, requests):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        started = time.perf_counter()
+        populate(size)
+        print(f"inserted {size:,} questions (index kept in sync) in {time.perf_counter() - started:.1f}s")
+
+        client = app.test_client()
+        rng = random.Random(1)
+        cases = {
+            'search, 2 common words': lambda: client.get(f"/api/questions/search?q={' '.join(rng.sample(WORDS, 2))}"),
+            'search, rare number': lambda: client.get(f"/api/questions/search?q={rng.randrange(size)}"),
+            'near-duplicate check': lambda: find_near_duplicates(make_text(rng, rng.randrange(size))),
+        }
+        print(f"{'case':<24} | {'p50 ms':>8} | {'p99 ms':>8}")
+        for name, call in cases.items():
+            timings = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - start) * 1000)
+            p50, p99 = percentiles(timings)
+            print(f"{name:<24} | {p50:>8.2f} | {p99:>8.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=1000000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+    main(args.size, args.requests)
@@ -0,0 +1,95 @@
+"""
+Compare score submissions per second: commit per request vs the write-behind queue
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_score_ingestion
+    python -m benchmarks.bench_score_ingestion --threads 8 --seconds 5
+
+Each mode gets a fresh SQLite file database and `--threads` request threads
+(gunicorn's 2 workers x 4 threads in the Procfile) posting to
+/api/scores/legacy for `--seconds`. "committed/s" counts until every accepted
+score is in the database, so the write-behind queue's drain is included.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.score import Score
+from app.services.score_queue import get_score_queue
+
+MODES = {
+    'sync (commit per request)': {'SCORE_WRITE_BEHIND': False},
+    'write-behind': {'SCORE_WRITE_BEHIND': True},
+    'write-behind, ?wait=1': {'SCORE_WRITE_BEHIND': True, 'wait': True},
+}
+
+
+def run(mode, threads, seconds, directory):
+    options = dict(MODES[mode])
+    wait = options.pop('wait', False)
+    database = os.path.join(directory, f"{mode.split()[0].strip(',')}-{int(wait)}.db")
+
+    class BenchConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+        SCORE_QUEUE_PUT_TIMEOUT = 5.0
+    for name, value in options.items():
+        setattr(BenchConfig, name, value)
+
+    app = create_app(BenchConfig)
+    url = '/api/scores/legacy?wait=1' if wait else '/api/scores/legacy'
+    accepted = [0] * threads
+    errors = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        client = app.test_client()
+        i = 0
+        while time.perf_counter() < deadline:
+            response = client.post(url, json={
+                'player_name': f'player{index}-{i % 50}', 'normal_score': i % 100,
+                'category': 'Science', 'difficulty': 1 + i % 3,
+                'questions_answered': 10, 'questions_correct': i % 11,
+            })
+            if response.status_code in (201, 202):
+                accepted[index] += 1
+            else:
+                errors[index] += 1
+            i += 1
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    submitted = time.perf_counter() - started
+
+    with app.app_context():
+        score_queue = get_score_queue()
+        if score_queue is not None:
+            score_queue.close()
+        committed = time.perf_counter() - started
+        stored = Score.query.count()
+        batches = score_queue.stats()['batches'] if score_queue else stored
+    assert stored == sum(accepted), (stored, sum(accepted))
+    return sum(accepted) / submitted, stored / committed, sum(errors), batches
+
+
+def main(threads, seconds):
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'mode':<28} | {'accepted/s':>10} | {'committed/s':>11} | {'errors':>6} | {'commits':>7}")
+        for mode in MODES:
+            accepted, committed, errors, batches = run(mode, threads, seconds, directory)
+            print(f"{mode:<28} | {accepted:>10.0f} | {committed:>11.0f} | {errors:>6} | {batches:>7}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    main(args.threads, args.seconds)
@@ -0,0 +1,66 @@
+"""
+Time polled score reads: uncached, cached repeat, and If-None-Match (304)
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_score_reads
+    python -m benchmarks.bench_score_reads --size 1000000 --requests 200
+
+Scores are bulk inserted into the in-memory test database and the player
+stats rollup rebuilt. "uncached" turns the read cache off (SCORE_CACHE_TTL
+0, so each read also looks up its change marker); the other rows use the
+default TTL, as the mobile stats screen does when it polls.
+"""
+import argparse
+import statistics
+import time
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.services.player_stats import rebuild_player_stats
+from benchmarks.bench_score_stats import add_scores
+
+URLS = {
+    'global stats': '/api/scores/stats',
+    'player stats': '/api/scores/stats?nickname=player7',
+    'global feed': '/api/scores',
+    'player history page': '/api/scores?nickname=player7&limit=50',
+}
+
+
+def timed(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main(size, requests):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        db.create_all()
+        add_scores(0, size)
+        with db.engine.begin() as connection:
+            rebuild_player_stats(connection)
+        client = app.test_client()
+        cache = app.extensions['score_read_cache']
+
+        print(f"{size:,} scores")
+        print(f"{'read':<22} | {'uncached ms':>11} | {'cached ms':>9} | {'304 ms':>7}")
+        for name, url in URLS.items():
+            ttl, cache.ttl = cache.ttl, 0
+            uncached = timed(lambda: client.get(url), requests)
+            cache.ttl = ttl
+            etag = client.get(url).headers['ETag']
+            cached = timed(lambda: client.get(url), requests)
+            not_modified = timed(lambda: client.get(url, headers={'If-None-Match': etag}), requests)
+            print(f"{name:<22} | {uncached:>11.2f} | {cached:>9.2f} | {not_modified:>7.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=100)
+    args = parser.parse_args()
+    main(args.size, args.requests)
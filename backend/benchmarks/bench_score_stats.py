@@ -0,0 +1,98 @@
+"""
+Compare GET /api/scores/stats against the old load-every-row computation
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_score_stats
+    python -m benchmarks.bench_score_stats --size 100000 --legacy-max 100000
+
+The table grows in steps up to --size. At each step the endpoint is called
+and its Python heap peak measured with tracemalloc; "before" repeats the old
+Score.query.all() path, up to --legacy-max rows (it holds every row).
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.score import Score
+
+INSERT_BATCH = 50000
+
+
+def add_scores(start, stop):
+    now = datetime.utcnow()
+    for batch_start in range(start, stop, INSERT_BATCH):
+        rows = [{
+            "player_name": f"player{i % 1000}",
+            "normal_score": i % 7 and i % 500,
+            "trivialer_score": i % 300,
+            "score": i % 500,
+            "category": "Science",
+            "difficulty": 1 + i % 3,
+            "questions_answered": 10,
+            "questions_correct": i % 11,
+            "date": now - timedelta(seconds=i),
+        } for i in range(batch_start, min(stop, batch_start + INSERT_BATCH))]
+        db.session.execute(Score.__table__.insert(), rows)
+    db.session.commit()
+
+
+def legacy_stats():
+    # The computation /stats did before, for the global case
+    scores = Score.query.all()
+    total_games = len(scores)
+    normal_scores = [s.normal_score or s.score or 0 for s in scores]
+    trivialer_scores = [s.trivialer_score or s.score or 0 for s in scores]
+    result = {
+        'total_games': total_games,
+        'average_normal_score': sum(normal_scores) / total_games,
+        'average_trivialer_score': sum(trivialer_scores) / total_games,
+        'highest_normal_score': max(normal_scores),
+        'highest_trivialer_score': max(trivialer_scores),
+        'total_questions': sum(s.questions_answered or 0 for s in scores),
+        'correct_answers': sum(s.questions_correct or 0 for s in scores),
+    }
+    db.session.expunge_all()
+    return result
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024
+
+
+def main(size, legacy_max):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        client = app.test_client()
+        steps = [step for step in (10000, 100000, 1000000, 10000000) if step < size] + [size]
+        print(f"{'scores':>10} | {'after ms':>9} | {'after KiB':>10} | {'before ms':>10} | {'before KiB':>11}")
+        stored = 0
+        for step in steps:
+            add_scores(stored, step)
+            stored = step
+            response, after_ms, after_kib = measure(lambda: client.get('/api/scores/stats'))
+            stats = response.get_json()
+            assert stats['total_games'] == step
+            before = f"{'-':>10} | {'-':>11}"
+            if step <= legacy_max:
+                legacy, before_ms, before_kib = measure(legacy_stats)
+                assert legacy['highest_normal_score'] == stats['highest_normal_score']
+                assert legacy['correct_answers'] == stats['correct_answers']
+                before = f"{before_ms:>10.1f} | {before_kib:>11,.0f}"
+            print(f"{step:>10,} | {after_ms:>9.1f} | {after_kib:>10,.0f} | {before}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size', type=int, default=1000000)
+    parser.add_argument('--legacy-max', type=int, default=1000000)
+    args = parser.parse_args()
+    main(args.size, args.legacy_max)
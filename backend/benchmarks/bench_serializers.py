@@ -0,0 +1,104 @@
+"""
+Compare marshmallow dumps with the compiled serializers per endpoint
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serializers
+    python -m benchmarks.bench_serializers --seconds 2
+
+For each endpoint the payload it serializes is dumped both ways in a loop,
+then the endpoint itself is called through the test client.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.question import Question
+from app.models.score import Score
+from app.models.user import User
+from app.routes.scores import select_score_rows
+from app.schemas.question import QuestionSchema, question_serializer
+from app.schemas.score import ScoreSchema, score_serializer
+from app.schemas.user import UserSchema, user_serializer
+
+
+def throughput(func, seconds):
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        func()
+        calls += 1
+    return calls / seconds
+
+
+def populate():
+    user = User(username='bench', email='bench@trivia.local')
+    db.session.add(user)
+    db.session.flush()
+    now = datetime.utcnow()
+    db.session.add_all(
+        Score(user_id=user.id if i % 2 else None, player_name=None if i % 2 else f'guest{i}',
+              normal_score=i, trivialer_score=i * 2, score=i, category='Science',
+              difficulty=1 + i % 3, questions_answered=10, questions_correct=i % 10,
+              date=now - timedelta(minutes=i))
+        for i in range(200)
+    )
+    db.session.add_all(
+        Question(text=f"Question {i}", category='Science', difficulty=1 + i % 3,
+                 correct_answer='A', incorrect_answers='B|C|D')
+        for i in range(200)
+    )
+    db.session.commit()
+    return user
+
+
+def main(seconds):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        user = populate()
+        client = app.test_client()
+        token = create_access_token(identity=str(user.id))
+
+        questions = Question.query.limit(10).all()
+        question_rows = db.session.execute(
+            db.select(*question_serializer.columns).limit(10)
+        ).all()
+        scores = Score.query.order_by(Score.date.desc()).limit(50).all()
+        score_rows = select_score_rows(limit=50)
+
+        def marshmallow_scores():
+            result = ScoreSchema(many=True).dump(scores)
+            for score_data, score_obj in zip(result, scores):
+                score_data['username'] = score_obj.player_name or (score_obj.user.username if score_obj.user else None)
+
+        cases = [
+            ('GET /api/questions (10)',
+             lambda: QuestionSchema(many=True).dump(questions),
+             lambda: question_serializer.dump_rows(question_rows),
+             lambda: client.get('/api/questions?amount=10')),
+            ('GET /api/scores (50)',
+             marshmallow_scores,
+             lambda: score_serializer.dump_rows(score_rows),
+             lambda: client.get('/api/scores')),
+            ('GET /api/auth/me',
+             lambda: UserSchema().dump(user),
+             lambda: user_serializer.dump_obj(user),
+             lambda: client.get('/api/auth/me', headers={'Authorization': f'Bearer {token}'})),
+        ]
+
+        print(f"{'endpoint':<26} | {'marshmallow/s':>13} | {'compiled/s':>11} | {'speedup':>7} | {'requests/s':>10}")
+        for name, slow, fast, request in cases:
+            slow_rate = throughput(slow, seconds)
+            fast_rate = throughput(fast, seconds)
+            request_rate = throughput(request, seconds)
+            print(f"{name:<26} | {slow_rate:>13,.0f} | {fast_rate:>11,.0f} | {fast_rate / slow_rate:>6.1f}x | {request_rate:>10,.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=1.0)
+    args = parser.parse_args()
+    main(args.seconds)
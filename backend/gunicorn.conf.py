@@ -0,0 +1,8 @@
+# Read by gunicorn from the working directory (see the Procfile)
+import os
+
+
+def on_starting(server):
+    # Runs in the master before the workers are forked, so they all inherit
+    # it and aggregate their /api/metrics in one directory
+    os.environ.setdefault('METRICS_SERVER_ID', str(os.getpid()))
@@ -51,6 +51,24 @@ def get_metadata():
     return target_db.metadata
 
 
+# The question full-text index is created with raw SQL (an FTS5 table and
+# its shadow tables on SQLite, a tsvector column and GIN index on
+# PostgreSQL) and has no model, so autogenerate must not see it as drift
+FULL_TEXT_TABLE_PREFIX = 'question_fts'
+FULL_TEXT_COLUMN = 'search_vector'
+FULL_TEXT_INDEX = 'ix_question_search_vector'
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table':
+        return not name.startswith(FULL_TEXT_TABLE_PREFIX)
+    if type_ == 'column':
+        return not (object.table.name == 'question' and name == FULL_TEXT_COLUMN)
+    if type_ == 'index':
+        return name != FULL_TEXT_INDEX
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +83,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +112,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
@@ -0,0 +1,67 @@
+"""add question full-text index (FTS5 on SQLite, tsvector/GIN on PostgreSQL)
+
+Revision ID: 0a6d3b8e5c21
+Revises: f3c8a1e5b726
+Create Date: 2026-10-18 15:30:00.000000
+
+"""
+from alembic import op
+from sqlalchemy.exc import OperationalError
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6d3b8e5c21'
+down_revision = 'f3c8a1e5b726'
+branch_labels = None
+depends_on = None
+
+# Copied from app.services.question_search as of this revision, so the
+# migration does not change along with the app code
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS question_fts USING fts5("
+    "text, content='question', content_rowid='id', tokenize='unicode61 remove_diacritics 0')",
+    "CREATE TRIGGER IF NOT EXISTS question_fts_ai AFTER INSERT ON question BEGIN "
+    "INSERT INTO question_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS question_fts_ad AFTER DELETE ON question BEGIN "
+    "INSERT INTO question_fts(question_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS question_fts_au AFTER UPDATE OF text ON question BEGIN "
+    "INSERT INTO question_fts(question_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+    "INSERT INTO question_fts(rowid, text) VALUES (new.id, new.text); END",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS question_fts_au",
+    "DROP TRIGGER IF EXISTS question_fts_ad",
+    "DROP TRIGGER IF EXISTS question_fts_ai",
+    "DROP TABLE IF EXISTS question_fts",
+]
+POSTGRES_FTS_DDL = [
+    "ALTER TABLE question ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_question_search_vector ON question USING GIN (search_vector)",
+]
+
+
+def upgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == 'sqlite':
+        try:
+            for statement in SQLITE_FTS_DDL:
+                connection.exec_driver_sql(statement)
+        except OperationalError:
+            # SQLite built without FTS5, searches fall back to LIKE
+            return
+        # Index the questions that existed before the triggers
+        connection.exec_driver_sql("INSERT INTO question_fts(question_fts) VALUES ('rebuild')")
+    elif connection.dialect.name == 'postgresql':
+        for statement in POSTGRES_FTS_DDL:
+            connection.exec_driver_sql(statement)
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == 'sqlite':
+        for statement in SQLITE_FTS_DROP:
+            connection.exec_driver_sql(statement)
+    elif connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql("DROP INDEX IF EXISTS ix_question_search_vector")
+        connection.exec_driver_sql("ALTER TABLE question DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,34 @@
+"""add per-category/difficulty question count aggregate
+
+Revision ID: 1b7e4d9a3f60
+Revises: 0a6d3b8e5c21
+Create Date: 2026-10-18 17:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b7e4d9a3f60'
+down_revision = '0a6d3b8e5c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('question_count',
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('difficulty', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('category', 'difficulty')
+    )
+    # One GROUP BY now; the app keeps the counts current from here on
+    op.execute(
+        "INSERT INTO question_count (category, difficulty, count) "
+        "SELECT category, difficulty, count(*) FROM question GROUP BY category, difficulty"
+    )
+
+
+def downgrade():
+    op.drop_table('question_count')
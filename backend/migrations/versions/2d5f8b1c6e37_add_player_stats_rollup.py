@@ -0,0 +1,54 @@
+"""add player_stats rollup
+
+Revision ID: 2d5f8b1c6e37
+Revises: 1b7e4d9a3f60
+Create Date: 2026-10-18 18:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d5f8b1c6e37'
+down_revision = '1b7e4d9a3f60'
+branch_labels = None
+depends_on = None
+
+# Same totals as app.services.player_stats.rebuild_player_stats, frozen here
+BACKFILL = (
+    "INSERT INTO player_stats ({key}, games, normal_score_sum, normal_score_max, "
+    "trivialer_score_sum, trivialer_score_max, questions_answered, questions_correct) "
+    "SELECT {key}, count(id), "
+    "sum(coalesce(nullif(normal_score, 0), nullif(score, 0), 0)), "
+    "max(coalesce(nullif(normal_score, 0), nullif(score, 0), 0)), "
+    "sum(coalesce(nullif(trivialer_score, 0), nullif(score, 0), 0)), "
+    "max(coalesce(nullif(trivialer_score, 0), nullif(score, 0), 0)), "
+    "sum(coalesce(questions_answered, 0)), sum(coalesce(questions_correct, 0)) "
+    "FROM score WHERE {key} IS NOT NULL GROUP BY {key}"
+)
+
+
+def upgrade():
+    op.create_table('player_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('player_name', sa.String(length=120), nullable=True),
+    sa.Column('games', sa.Integer(), nullable=False),
+    sa.Column('normal_score_sum', sa.BigInteger(), nullable=False),
+    sa.Column('normal_score_max', sa.Integer(), nullable=False),
+    sa.Column('trivialer_score_sum', sa.BigInteger(), nullable=False),
+    sa.Column('trivialer_score_max', sa.Integer(), nullable=False),
+    sa.Column('questions_answered', sa.BigInteger(), nullable=False),
+    sa.Column('questions_correct', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('player_name'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.execute(BACKFILL.format(key='user_id'))
+    op.execute(BACKFILL.format(key='player_name'))
+
+
+def downgrade():
+    op.drop_table('player_stats')
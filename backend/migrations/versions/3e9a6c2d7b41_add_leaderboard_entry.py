@@ -0,0 +1,80 @@
+"""add leaderboard_entry best-score table
+
+Revision ID: 3e9a6c2d7b41
+Revises: 2d5f8b1c6e37
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9a6c2d7b41'
+down_revision = '2d5f8b1c6e37'
+branch_labels = None
+depends_on = None
+
+PLAYER_KEY = (
+    "CASE WHEN user_id IS NOT NULL THEN 'user:' || CAST(user_id AS VARCHAR) "
+    "ELSE 'name:' || player_name END"
+)
+
+# Best score per player for one mode and scope, as app.services.leaderboard
+# ranks them (score, then earliest); frozen here
+BACKFILL = (
+    "INSERT INTO leaderboard_entry (mode, category, difficulty, player_key, user_id, "
+    "player_name, score, score_id, achieved_at) "
+    "SELECT mode, category, difficulty, player_key, user_id, player_name, score, score_id, "
+    "achieved_at FROM ("
+    "SELECT '{mode}' AS mode, {category} AS category, {difficulty} AS difficulty, "
+    "{player_key} AS player_key, user_id, player_name, {score} AS score, id AS score_id, "
+    "date AS achieved_at, row_number() OVER ("
+    "PARTITION BY {player_key}, {category}, {difficulty} "
+    "ORDER BY {score} DESC, date, id) AS position "
+    "FROM score WHERE (user_id IS NOT NULL OR player_name IS NOT NULL) AND {included}"
+    ") ranked WHERE position = 1"
+)
+
+SCOPES = [
+    # category, difficulty, rows included
+    ("''", "0", "1 = 1"),
+    ("category", "0", "category IS NOT NULL AND category <> ''"),
+    ("''", "difficulty", "difficulty IS NOT NULL AND difficulty <> 0"),
+    ("category", "difficulty",
+     "category IS NOT NULL AND category <> '' AND difficulty IS NOT NULL AND difficulty <> 0"),
+]
+
+
+def upgrade():
+    op.create_table('leaderboard_entry',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('mode', sa.String(length=10), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('difficulty', sa.Integer(), nullable=False),
+    sa.Column('player_key', sa.String(length=140), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('player_name', sa.String(length=120), nullable=True),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('score_id', sa.Integer(), nullable=False),
+    sa.Column('achieved_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('player_key', 'mode', 'category', 'difficulty', name='uq_leaderboard_entry_player')
+    )
+    op.create_index('ix_leaderboard_entry_rank', 'leaderboard_entry',
+                    ['mode', 'category', 'difficulty', sa.text('score DESC'), 'achieved_at', 'score_id'],
+                    unique=False)
+
+    for mode in ('normal', 'trivialer'):
+        score = f"coalesce(nullif({mode}_score, 0), nullif(score, 0), 0)"
+        for category, difficulty, included in SCOPES:
+            op.execute(BACKFILL.format(
+                mode=mode, category=category, difficulty=difficulty, included=included,
+                player_key=PLAYER_KEY, score=score
+            ))
+
+
+def downgrade():
+    op.drop_index('ix_leaderboard_entry_rank', table_name='leaderboard_entry')
+    op.drop_table('leaderboard_entry')
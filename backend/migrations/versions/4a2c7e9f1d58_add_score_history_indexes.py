@@ -0,0 +1,30 @@
+"""add score history indexes
+
+Revision ID: 4a2c7e9f1d58
+Revises: 3e9a6c2d7b41
+Create Date: 2026-10-18 21:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a2c7e9f1d58'
+down_revision = '3e9a6c2d7b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('score', schema=None) as batch_op:
+        batch_op.create_index('ix_score_user_id_date', ['user_id', 'date', 'id'], unique=False)
+        batch_op.create_index('ix_score_player_name_date', ['player_name', 'date', 'id'], unique=False)
+        batch_op.create_index('ix_score_date', ['date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('score', schema=None) as batch_op:
+        batch_op.drop_index('ix_score_date')
+        batch_op.drop_index('ix_score_player_name_date')
+        batch_op.drop_index('ix_score_user_id_date')
@@ -0,0 +1,26 @@
+"""add question category/difficulty index
+
+Revision ID: 4c1d8e2a7b90
+Revises: 2bf35c61a693
+Create Date: 2026-10-18 09:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1d8e2a7b90'
+down_revision = '2bf35c61a693'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.create_index('ix_question_category_difficulty', ['category', 'difficulty'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_index('ix_question_category_difficulty')
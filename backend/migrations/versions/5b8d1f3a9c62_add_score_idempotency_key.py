@@ -0,0 +1,28 @@
+"""add score idempotency_key for batch submission
+
+Revision ID: 5b8d1f3a9c62
+Revises: 4a2c7e9f1d58
+Create Date: 2026-10-18 22:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8d1f3a9c62'
+down_revision = '4a2c7e9f1d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('score', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_score_idempotency_key', ['idempotency_key'])
+
+
+def downgrade():
+    with op.batch_alter_table('score', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_score_idempotency_key', type_='unique')
+        batch_op.drop_column('idempotency_key')
@@ -0,0 +1,47 @@
+"""add leaderboard_bucket for daily/weekly/monthly leaderboards
+
+Revision ID: 6c3e9a1f4b27
+Revises: 5b8d1f3a9c62
+Create Date: 2026-10-18 23:40:00.000000
+
+Period boundaries depend on LEADERBOARD_TIMEZONE, so the table is not
+backfilled here; run `flask rebuild-leaderboard` after upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c3e9a1f4b27'
+down_revision = '5b8d1f3a9c62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leaderboard_bucket',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('period', sa.String(length=5), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False),
+    sa.Column('mode', sa.String(length=10), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('player_key', sa.String(length=140), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('player_name', sa.String(length=120), nullable=True),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('score_id', sa.Integer(), nullable=False),
+    sa.Column('achieved_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('player_key', 'period', 'period_start', 'mode', 'category',
+                        name='uq_leaderboard_bucket_player')
+    )
+    op.create_index('ix_leaderboard_bucket_rank', 'leaderboard_bucket',
+                    ['period', 'period_start', 'mode', 'category', sa.text('score DESC'),
+                     'achieved_at', 'score_id'],
+                    unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_leaderboard_bucket_rank', table_name='leaderboard_bucket')
+    op.drop_table('leaderboard_bucket')
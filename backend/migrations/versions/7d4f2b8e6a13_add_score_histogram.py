@@ -0,0 +1,72 @@
+"""add score_histogram for percentile lookups
+
+Revision ID: 7d4f2b8e6a13
+Revises: 6c3e9a1f4b27
+Create Date: 2026-10-19 00:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4f2b8e6a13'
+down_revision = '6c3e9a1f4b27'
+branch_labels = None
+depends_on = None
+
+# Games per (category, difficulty, effective score) for one mode
+GROUPED = (
+    "SELECT category, difficulty, coalesce(nullif({mode}_score, 0), nullif(score, 0), 0), count(*) "
+    "FROM score GROUP BY 1, 2, 3"
+)
+
+
+def bucket(value):
+    # app.services.score_histogram.histogram_bucket, frozen here
+    value = max(int(value or 0), 0)
+    if value < 256:
+        return value
+    octave = value.bit_length() - 9
+    low = 256 << octave
+    return 256 + octave * 16 + (value - low) * 16 // low
+
+
+def scopes(category, difficulty):
+    result = [('', 0)]
+    if category:
+        result.append((category, 0))
+    if difficulty:
+        result.append(('', difficulty))
+    if category and difficulty:
+        result.append((category, difficulty))
+    return result
+
+
+def upgrade():
+    histogram = op.create_table('score_histogram',
+    sa.Column('mode', sa.String(length=10), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('difficulty', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('mode', 'category', 'difficulty', 'bucket')
+    )
+
+    connection = op.get_bind()
+    counts = {}
+    for mode in ('normal', 'trivialer'):
+        for category, difficulty, score, count in connection.execute(sa.text(GROUPED.format(mode=mode))):
+            for scope in scopes(category, difficulty):
+                key = (mode, *scope, bucket(score))
+                counts[key] = counts.get(key, 0) + count
+    if counts:
+        op.bulk_insert(histogram, [
+            {'mode': mode, 'category': category, 'difficulty': difficulty, 'bucket': number,
+             'count': count}
+            for (mode, category, difficulty, number), count in counts.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('score_histogram')
@@ -0,0 +1,55 @@
+"""add user username_lower for indexed case-insensitive lookups
+
+Revision ID: 8e5a3c7d9f24
+Revises: 7d4f2b8e6a13
+Create Date: 2026-10-19 01:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e5a3c7d9f24'
+down_revision = '7d4f2b8e6a13'
+branch_labels = None
+depends_on = None
+
+
+def normalize_username(username):
+    # Copied from app.models.user as of this revision
+    return username.lower()
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('username_lower', sa.String(length=80), nullable=True))
+
+    # Usernames were only unique with case; the oldest account keeps the
+    # normalized name and later ones differing only in case stay NULL.
+    # Normalized in Python as the app does, not with the database's lower()
+    # (SQLite's folds ASCII letters only).
+    connection = op.get_bind()
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('username', sa.String),
+                    sa.column('username_lower', sa.String))
+    seen = set()
+    rows = []
+    for user_id, username in connection.execute(sa.select(user.c.id, user.c.username).order_by(user.c.id)):
+        lower = normalize_username(username)
+        if lower not in seen:
+            seen.add(lower)
+            rows.append({'row_id': user_id, 'lower': lower})
+    if rows:
+        connection.execute(
+            user.update().where(user.c.id == sa.bindparam('row_id')).values(username_lower=sa.bindparam('lower')),
+            rows
+        )
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_user_username_lower', ['username_lower'])
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_user_username_lower', type_='unique')
+        batch_op.drop_column('username_lower')
@@ -0,0 +1,26 @@
+"""add quiz_deck created_at index for expiry pruning
+
+Revision ID: 9a1c5e7b3d46
+Revises: 8e5a3c7d9f24
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a1c5e7b3d46'
+down_revision = '8e5a3c7d9f24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quiz_deck', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_quiz_deck_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_deck', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_quiz_deck_created_at'))
@@ -0,0 +1,29 @@
+"""add question_bank version table
+
+Revision ID: a83f5c0e9d12
+Revises: 4c1d8e2a7b90
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83f5c0e9d12'
+down_revision = '4c1d8e2a7b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    question_bank = op.create_table('question_bank',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(question_bank, [{'id': 1, 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('question_bank')
@@ -0,0 +1,27 @@
+"""add question_tombstone category for category-scoped delta sync
+
+Revision ID: ab2d6f8c4e57
+Revises: 9a1c5e7b3d46
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ab2d6f8c4e57'
+down_revision = '9a1c5e7b3d46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing tombstones keep NULL and are sent to every category's sync
+    with op.batch_alter_table('question_tombstone', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('question_tombstone', schema=None) as batch_op:
+        batch_op.drop_column('category')
@@ -0,0 +1,40 @@
+"""order score history indexes date DESC NULLS LAST on PostgreSQL
+
+Revision ID: bc3e7a9d5f68
+Revises: ab2d6f8c4e57
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bc3e7a9d5f68'
+down_revision = 'ab2d6f8c4e57'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_score_user_id_date', ['user_id', 'date', 'id']),
+    ('ix_score_player_name_date', ['player_name', 'date', 'id']),
+    ('ix_score_date', ['date', 'id']),
+)
+NEWEST_FIRST = {'date': 'DESC NULLS LAST', 'id': 'DESC'}
+
+
+def _recreate_indexes(postgresql_ops):
+    # SQLite already reads its ascending indexes backwards with NULLs last
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, columns in INDEXES:
+        op.drop_index(name, table_name='score')
+        op.create_index(name, 'score', columns, unique=False, postgresql_ops=postgresql_ops)
+
+
+def upgrade():
+    _recreate_indexes(NEWEST_FIRST)
+
+
+def downgrade():
+    _recreate_indexes({})
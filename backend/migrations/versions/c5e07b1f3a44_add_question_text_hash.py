@@ -0,0 +1,49 @@
+"""add question text_hash for import dedup
+
+Revision ID: c5e07b1f3a44
+Revises: a83f5c0e9d12
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+import hashlib
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e07b1f3a44'
+down_revision = 'a83f5c0e9d12'
+branch_labels = None
+depends_on = None
+
+
+# Copied from app.models.question as of this revision
+def question_text_hash(text):
+    text = unicodedata.normalize('NFKC', text).casefold()
+    text = ' '.join(re.sub(r'[^\w\s]', '', text).split())
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def upgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('text_hash', sa.String(length=40), nullable=True))
+        batch_op.create_index(batch_op.f('ix_question_text_hash'), ['text_hash'], unique=False)
+
+    # Backfill hashes for questions that already exist
+    connection = op.get_bind()
+    question = sa.table('question', sa.column('id', sa.Integer), sa.column('text', sa.String), sa.column('text_hash', sa.String))
+    rows = connection.execute(sa.select(question.c.id, question.c.text)).all()
+    if rows:
+        connection.execute(
+            question.update().where(question.c.id == sa.bindparam('row_id')).values(text_hash=sa.bindparam('hash')),
+            [{'row_id': row.id, 'hash': question_text_hash(row.text)} for row in rows]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_question_text_hash'))
+        batch_op.drop_column('text_hash')
@@ -0,0 +1,33 @@
+"""widen user password_hash to fit scrypt hashes
+
+Revision ID: cd4f8b1e6a79
+Revises: bc3e7a9d5f68
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cd4f8b1e6a79'
+down_revision = 'bc3e7a9d5f68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=128),
+               type_=sa.String(length=256),
+               existing_nullable=True)
+
+
+def downgrade():
+    # Fails on PostgreSQL while hashes longer than 128 characters are stored
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=256),
+               type_=sa.String(length=128),
+               existing_nullable=True)
@@ -0,0 +1,76 @@
+"""store question incorrect_answers as a JSON list
+
+Revision ID: d91a4f6c2e08
+Revises: c5e07b1f3a44
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd91a4f6c2e08'
+down_revision = 'c5e07b1f3a44'
+branch_labels = None
+depends_on = None
+
+json_type = sa.JSON().with_variant(postgresql.JSONB(), 'postgresql')
+
+
+def decode_answer_list(value):
+    # Copied from app.models.question as of this revision
+    if value.startswith('['):
+        return [str(answer) for answer in json.loads(value)]
+    return value.split('|')
+
+
+def _copy_answers(source, target, convert):
+    connection = op.get_bind()
+    question = sa.table('question', sa.column('id', sa.Integer), source, target)
+    rows = connection.execute(sa.select(question.c.id, source)).all()
+    if rows:
+        connection.execute(
+            question.update().where(question.c.id == sa.bindparam('row_id')).values({target.name: sa.bindparam('answers')}),
+            [{'row_id': row[0], 'answers': convert(row[1])} for row in rows]
+        )
+
+
+def upgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('incorrect_answers_list', json_type, nullable=True))
+
+    # Old rows hold either 'a|b|c' (QuestionSchema) or a JSON string (sample script)
+    _copy_answers(
+        sa.column('incorrect_answers', sa.String),
+        sa.column('incorrect_answers_list', json_type),
+        decode_answer_list
+    )
+
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_column('incorrect_answers')
+        batch_op.alter_column('incorrect_answers_list',
+               new_column_name='incorrect_answers',
+               existing_type=json_type,
+               nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('incorrect_answers_text', sa.String(length=600), nullable=True))
+
+    _copy_answers(
+        sa.column('incorrect_answers', json_type),
+        sa.column('incorrect_answers_text', sa.String),
+        '|'.join
+    )
+
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_column('incorrect_answers')
+        batch_op.alter_column('incorrect_answers_text',
+               new_column_name='incorrect_answers',
+               existing_type=sa.String(length=600),
+               nullable=False)
@@ -0,0 +1,33 @@
+"""add quiz_deck table
+
+Revision ID: e2b7c9d40f15
+Revises: d91a4f6c2e08
+Create Date: 2026-10-18 13:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c9d40f15'
+down_revision = 'd91a4f6c2e08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('quiz_deck',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('seed', sa.BigInteger(), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=True),
+    sa.Column('difficulty', sa.Integer(), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('page_size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('quiz_deck')
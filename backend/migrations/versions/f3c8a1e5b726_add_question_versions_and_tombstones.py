@@ -0,0 +1,42 @@
+"""add question row versions and tombstones for delta sync
+
+Revision ID: f3c8a1e5b726
+Revises: e2b7c9d40f15
+Create Date: 2026-10-18 14:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a1e5b726'
+down_revision = 'e2b7c9d40f15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows are all part of version 0, i.e. of any first snapshot
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index(batch_op.f('ix_question_version'), ['version'], unique=False)
+
+    op.create_table('question_tombstone',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('question_tombstone', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_question_tombstone_version'), ['version'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('question_tombstone', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_question_tombstone_version'))
+
+    op.drop_table('question_tombstone')
+    with op.batch_alter_table('question', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_question_version'))
+        batch_op.drop_column('version')
@@ -1,11 +1,12 @@
 import pytest
 from app import create_app, db
+from app.config import TestingConfig
 from app.models.user import User
 from app.models.question import Question
 
 @pytest.fixture
 def app():
-    app = create_app()
+    app = create_app(TestingConfig)
     app.config.update({
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
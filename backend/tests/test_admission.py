@@ -0,0 +1,95 @@
+import pytest
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.services.admission import ConcurrencyLimit, RateLimit
+
+class AdmissionConfig(TestingConfig):
+    ADMISSION_CONTROL = True
+    ADMISSION_LIMITS = {
+        'questions': {'concurrency': 1, 'queue': 0},
+        'questions.get_categories': {'concurrency': 5},
+    }
+    RATE_LIMITS = {
+        'auth.check_nickname_availability': {'rate': 0.001, 'burst': 2},
+    }
+
+@pytest.fixture
+def limited_app():
+    app = create_app(AdmissionConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def test_requests_beyond_a_blueprint_limit_are_shed(limited_app):
+    client = limited_app.test_client()
+    limit = limited_app.extensions['admission_control'].limits['questions']
+    # A slow question request holds the only slot
+    assert limit.acquire()
+
+    response = client.get('/api/questions?amount=1')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    # Routes with their own limit, and other blueprints, are unaffected
+    assert client.get('/api/questions/categories').status_code == 200
+    assert client.get('/api/leaderboard').status_code == 200
+
+    limit.release()
+    assert client.get('/api/questions?amount=1').status_code == 200
+    assert limit.stats() == {
+        'limit': 1, 'queue': 0, 'in_flight': 0, 'waiting': 0,
+        'admitted': 2, 'rejected': 1, 'timed_out': 0
+    }
+
+def test_abuse_prone_endpoints_are_rate_limited(limited_app):
+    client = limited_app.test_client()
+    for _ in range(2):
+        assert client.post('/api/auth/check-nickname', json={'nickname': 'Quizzer'}).status_code == 200
+
+    response = client.post('/api/auth/check-nickname', json={'nickname': 'Quizzer'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 1
+
+    stats = client.get('/api/admission').get_json()
+    assert stats['enabled']
+    assert stats['rate_limits']['auth.check_nickname_availability']['rejected'] == 1
+    assert stats['rate_limits']['auth.check_nickname_availability']['allowed'] == 2
+
+def test_rate_limits_key_on_the_forwarded_client_address(limited_app):
+    client = limited_app.test_client()
+    # Behind the router every request comes from its address
+    for address in ('203.0.113.1', '203.0.113.2'):
+        for _ in range(2):
+            response = client.post('/api/auth/check-nickname', json={'nickname': 'Quizzer'},
+                                   headers={'X-Forwarded-For': address})
+            assert response.status_code == 200
+    response = client.post('/api/auth/check-nickname', json={'nickname': 'Quizzer'},
+                           headers={'X-Forwarded-For': '203.0.113.1'})
+    assert response.status_code == 429
+
+def test_admission_control_is_off_in_testing(client):
+    assert client.get('/api/admission').get_json() == {'enabled': False}
+
+def test_queued_requests_wait_for_a_slot_then_time_out():
+    limit = ConcurrencyLimit('scores', 1, queue=1, timeout=0.01)
+    assert limit.acquire()
+    assert not limit.acquire()
+    assert limit.stats()['timed_out'] == 1 and limit.stats()['rejected'] == 0
+    limit.release()
+    assert limit.acquire()
+
+def test_token_buckets_refill_per_client(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr('app.services.admission.time.monotonic', lambda: clock[0])
+    rate_limit = RateLimit('auth.register_nickname', rate=0.5, burst=2, max_clients=2)
+    assert rate_limit.take('1.1.1.1') == 0
+    assert rate_limit.take('1.1.1.1') == 0
+    assert rate_limit.take('1.1.1.1') == pytest.approx(2.0)
+    assert rate_limit.take('2.2.2.2') == 0
+
+    clock[0] += 2
+    assert rate_limit.take('1.1.1.1') == 0
+    rate_limit.take('3.3.3.3')
+    assert rate_limit.stats()['clients'] == 2
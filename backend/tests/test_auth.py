@@ -1,3 +1,7 @@
+from app import db
+from app.models.user import User
+from app.services.nickname_filter import NicknameFilter
+
 def test_register(client):
     response = client.post('/api/auth/register', json={
         'username': 'newuser',
@@ -25,3 +29,37 @@ def test_login(client):
     assert 'access_token' in data
     assert 'user' in data
     assert data['user']['username'] == 'loginuser'
+
+def test_nicknames_are_unique_ignoring_case(client):
+    response = client.post('/api/auth/register-nickname', json={'nickname': 'Alice'})
+    assert response.status_code == 201
+    
+    assert client.post('/api/auth/check-nickname', json={'nickname': 'aLiCe'}).get_json()['available'] is False
+    assert client.post('/api/auth/check-nickname', json={'nickname': 'Bobby'}).get_json()['available'] is True
+    assert client.post('/api/auth/register-nickname', json={'nickname': 'ALICE'}).status_code == 400
+    response = client.post('/api/auth/register', json={
+        'username': 'alice', 'email': 'alice@example.com', 'password': 'password123'
+    })
+    assert response.get_json()['message'] == 'Username already exists'
+
+def test_register_with_a_stale_nickname_filter(app, client):
+    nickname_filter = NicknameFilter(app, refresh_interval=3600)
+    app.extensions['nickname_filter'] = nickname_filter
+    nickname_filter.build()
+    # Registered by another worker after this one's filter was loaded
+    with db.engine.begin() as connection:
+        connection.execute(User.__table__.insert(), {
+            'username': 'Elsewhere', 'username_lower': 'elsewhere', 'email': 'elsewhere@example.com'
+        })
+    
+    response = client.post('/api/auth/register', json={
+        'username': 'ELSEWHERE', 'email': 'other@example.com', 'password': 'password123'
+    })
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Username already exists'
+    
+    response = client.post('/api/auth/register', json={
+        'username': 'Somebody', 'email': 'elsewhere@example.com', 'password': 'password123'
+    })
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Email already exists'
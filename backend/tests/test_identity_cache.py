@@ -0,0 +1,106 @@
+import re
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+from app.models.user import User
+from app.services.identity_cache import IdentityCache, get_identity_cache
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def register(client, nickname):
+    response = client.post('/api/auth/register-nickname', json={'nickname': nickname})
+    assert response.status_code == 201
+    return response.get_json()
+
+def auth_headers(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def test_authenticated_score_submission_does_not_read_the_user(app):
+    client = app.test_client()
+    token = register(client, 'CachedPlayer')['access_token']
+    client.get('/api/auth/me', headers=auth_headers(token))
+
+    with count_queries(db.engine) as statements:
+        response = client.post('/api/scores', json={'normal_score': 80, 'trivialer_score': 40},
+                               headers=auth_headers(token))
+    assert response.status_code == 201
+    assert response.get_json()['score']['username'] == 'CachedPlayer'
+    # Nothing is read: the user comes from the cache, the rollups are
+    # upserts, and percentiles are only added on ?percentile=1
+    assert not [s for s in statements if re.match(r'\s*SELECT', s)]
+    assert len([s for s in statements if re.match(r'\s*INSERT INTO score \(', s)]) == 1
+    assert get_identity_cache().stats()['hits'] >= 1
+
+def test_me_is_served_from_the_cache(app):
+    client = app.test_client()
+    data = register(client, 'MePlayer')
+    headers = auth_headers(data['access_token'])
+    assert client.get('/api/auth/me', headers=headers).get_json() == {
+        'id': data['user']['id'], 'username': 'MePlayer', 'email': 'meplayer@trivia.local'
+    }
+
+    with count_queries(db.engine) as statements:
+        response = client.get('/api/auth/me', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['username'] == 'MePlayer'
+    assert statements == []
+
+    stats = client.get('/api/auth/identity-cache').get_json()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['hit_ratio'] == 0.5
+
+def test_user_changes_invalidate_the_cache(app):
+    client = app.test_client()
+    data = register(client, 'Renamed')
+    headers = auth_headers(data['access_token'])
+    client.get('/api/auth/me', headers=headers)
+
+    user = db.session.get(User, data['user']['id'])
+    user.username = 'NewName'
+    db.session.commit()
+    assert client.get('/api/auth/me', headers=headers).get_json()['username'] == 'NewName'
+
+    db.session.delete(db.session.get(User, data['user']['id']))
+    db.session.commit()
+    response = client.get('/api/auth/me', headers=headers)
+    assert response.status_code == 404
+    assert response.get_json() == {'message': 'User not found'}
+    assert client.post('/api/scores', json={'normal_score': 10},
+                       headers=headers).status_code == 404
+
+def test_entries_expire_and_least_recently_used_are_evicted(app, monkeypatch):
+    ids = [User(username=f'user{n}', email=f'user{n}@example.com') for n in range(3)]
+    db.session.add_all(ids)
+    db.session.commit()
+    ids = [user.id for user in ids]
+
+    clock = [1000.0]
+    monkeypatch.setattr('app.services.identity_cache.time.monotonic', lambda: clock[0])
+    cache = IdentityCache(ttl=60, max_items=2)
+    assert cache.get(str(ids[0])).username == 'user0'
+    cache.get(ids[1])
+    cache.get(ids[0])
+    cache.get(ids[2])
+    assert cache.stats()['evictions'] == 1
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    # ids[1] was the least recently used
+    cache.get(ids[0])
+    cache.get(ids[1])
+    assert (cache.hits, cache.misses) == (2, 4)
+
+    clock[0] += 61
+    cache.get(ids[1])
+    assert (cache.hits, cache.misses) == (2, 5)
+    assert cache.get(999999) is None and cache.get('not-an-id') is None
+    assert cache.stats()['size'] == 2
@@ -0,0 +1,66 @@
+import json
+from app import db
+from app.models.question import Question
+
+def test_import_questions_jsonl_and_csv(app, tmp_path):
+    db.session.add(Question(
+        text="What is the capital of France?",
+        category="Geography",
+        difficulty=1,
+        correct_answer="Paris",
+        incorrect_answers="London|Berlin|Madrid"
+    ))
+    db.session.commit()
+    
+    jsonl = tmp_path / 'questions.jsonl'
+    jsonl.write_text('\n'.join(json.dumps(record) for record in [
+        {'question': 'Who painted the Mona Lisa?', 'category': 'Art', 'difficulty': 'easy',
+         'correct_answer': 'Leonardo da Vinci', 'incorrect_answers': ['Picasso', 'Van Gogh', 'Monet']},
+        # Same text once normalized, and a question already in the bank
+        {'text': 'who painted the  mona lisa', 'category': 'Art', 'difficulty': 1,
+         'correct_answer': 'Leonardo', 'incorrect_answers': ['A', 'B', 'C']},
+        {'text': 'What is the capital of FRANCE', 'category': 'Geography', 'difficulty': 1,
+         'correct_answer': 'Paris', 'incorrect_answers': ['A', 'B', 'C']},
+        {'text': 'Missing answers', 'category': 'Art', 'difficulty': 1},
+    ]))
+    csv_file = tmp_path / 'questions.csv'
+    csv_file.write_text(
+        'text,category,difficulty,correct_answer,incorrect_answers\n'
+        'What is H2O?,Science,2,Water,Salt|Sugar|Sand\n'
+        'What is H2O?,Science,2,Water,Salt|Sugar|Sand\n'
+    )
+    
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['import-questions', str(jsonl), '--batch-size', '2'])
+    assert result.exit_code == 0, result.output
+    assert 'Imported 1 of 4 questions' in result.output
+    
+    result = runner.invoke(args=['import-questions', str(csv_file)])
+    assert result.exit_code == 0, result.output
+    assert 'Imported 1 of 2 questions' in result.output
+    
+    imported = Question.query.filter_by(category='Art').one()
+    assert imported.incorrect_answers == ['Picasso', 'Van Gogh', 'Monet']
+    assert imported.difficulty == 1
+    
+    response = app.test_client().get('/api/questions?category=Science')
+    assert response.get_json()['questions'][0]['incorrect_answers'] == ['Salt', 'Sugar', 'Sand']
+
+def test_import_questions_skips_bad_lines(app, tmp_path):
+    good = {'question': 'What is 2 + 2?', 'category': 'Math', 'difficulty': 'easy',
+            'correct_answer': '4', 'incorrect_answers': ['3', '5', '22']}
+    jsonl = tmp_path / 'mixed.jsonl'
+    jsonl.write_text('\n'.join([
+        json.dumps(good),
+        '{not json',
+        '[1, 2]',
+        json.dumps({'text': 'Broken answers', 'category': 'Math', 'difficulty': 1,
+                    'correct_answer': 'A', 'incorrect_answers': '[bad'}),
+        json.dumps({**good, 'question': 'What is 3 + 3?', 'correct_answer': '6'}),
+    ]))
+    
+    result = app.test_cli_runner().invoke(args=['import-questions', str(jsonl)])
+    assert result.exit_code == 0, result.output
+    assert 'Imported 2 of 5 questions' in result.output
+    assert '3 invalid' in result.output
+    assert Question.query.filter_by(category='Math').count() == 2
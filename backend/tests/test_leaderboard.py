@@ -0,0 +1,106 @@
+from app import db
+from app.models.score import LeaderboardEntry
+from app.services.leaderboard import rebuild_leaderboard
+
+def post_score(client, name, normal, trivialer=0, category='Science', difficulty=1):
+    response = client.post('/api/scores/legacy', json={
+        'player_name': name, 'normal_score': normal, 'trivialer_score': trivialer,
+        'category': category, 'difficulty': difficulty
+    })
+    assert response.status_code == 201
+
+def leaderboard(client, query=''):
+    response = client.get(f'/api/leaderboard{query}')
+    assert response.status_code == 200
+    return [(entry['username'], entry['score']) for entry in response.get_json()['leaderboard']]
+
+def test_leaderboard_best_score_per_player(app):
+    client = app.test_client()
+    post_score(client, 'Ann', 50, trivialer=90)
+    post_score(client, 'Bob', 70, category='History', difficulty=2)
+    post_score(client, 'Ann', 80, trivialer=10, category='History', difficulty=2)
+    post_score(client, 'Cid', 70)
+    post_score(client, 'Bob', 20, trivialer=30)
+    
+    assert leaderboard(client) == [('Ann', 80), ('Bob', 70), ('Cid', 70)]
+    assert leaderboard(client, '?mode=trivialer') == [('Ann', 90), ('Bob', 70), ('Cid', 70)]
+    assert leaderboard(client, '?category=Science') == [('Cid', 70), ('Ann', 50), ('Bob', 20)]
+    assert leaderboard(client, '?category=History&difficulty=2') == [('Ann', 80), ('Bob', 70)]
+    assert leaderboard(client, '?difficulty=1&limit=1') == [('Cid', 70)]
+    assert client.get('/api/leaderboard?mode=bogus').status_code == 400
+    
+    # Rebuilding from the score table gives the same boards
+    expected = {query: leaderboard(client, query) for query in
+                ('', '?mode=trivialer', '?category=Science', '?difficulty=2')}
+    entries = LeaderboardEntry.query.count()
+    assert entries == 2 * 18  # 2 modes x 7 scopes with 2-3 players each
+    with db.engine.begin() as connection:
+        assert rebuild_leaderboard(connection) == entries
+    assert {query: leaderboard(client, query) for query in expected} == expected
+
+def test_windowed_leaderboards(app):
+    from datetime import datetime
+    from app.models.score import LeaderboardBucket, Score
+    from app.services.leaderboard import (
+        prune_leaderboard_buckets, rebuild_leaderboard_buckets, top_scores
+    )
+    
+    # Midnight in Auckland (UTC+13 in January) is 11:00 UTC the day before
+    app.config['LEADERBOARD_TIMEZONE'] = 'Pacific/Auckland'
+    app.config['LEADERBOARD_WINDOW_RETENTION'] = {'day': 5000, 'week': 1000, 'month': 200}
+    now = datetime(2025, 1, 15, 12)  # Thursday Jan 16 01:00 in Auckland
+    for name, normal, date in [
+        ('Ann', 90, datetime(2025, 1, 14, 23)),   # Wed Jan 15 local
+        ('Bob', 40, datetime(2025, 1, 15, 11)),   # Thu Jan 16 local
+        ('Cid', 70, datetime(2025, 1, 15, 11, 30)),
+        ('Bob', 60, datetime(2025, 1, 12, 10)),   # Sun Jan 12 local: last week
+        ('Dee', 99, datetime(2024, 12, 1)),       # last month
+        ('Eve', 95, datetime(2024, 10, 1)),
+    ]:
+        db.session.add(Score(player_name=name, normal_score=normal, category='Science', date=date))
+    db.session.commit()
+    
+    def board(window, category=None):
+        return [(entry['username'], entry['score'])
+                for entry in top_scores('normal', category, window=window, now=now)]
+    
+    assert board('day') == [('Cid', 70), ('Bob', 40)]
+    assert board('week') == [('Ann', 90), ('Cid', 70), ('Bob', 40)]
+    assert board('month', 'Science') == [('Ann', 90), ('Cid', 70), ('Bob', 60)]
+    assert board('month', 'History') == []
+    assert [(entry['username'], entry['score']) for entry in
+            top_scores('normal', window='month', now=datetime(2024, 12, 2))] == [('Dee', 99)]
+    assert leaderboard(app.test_client())[0] == ('Dee', 99)
+    
+    # Rebuilding from the score table gives the same buckets
+    def buckets():
+        return sorted((b.period, b.period_start, b.mode, b.category, b.player_key, b.score)
+                      for b in LeaderboardBucket.query)
+    stored = buckets()
+    with db.engine.begin() as connection:
+        assert rebuild_leaderboard_buckets(connection, now=now) == len(stored)
+    assert buckets() == stored
+    
+    # Keeping two periods, a month later only January's month survives
+    app.config['LEADERBOARD_WINDOW_RETENTION'] = {'day': 2, 'week': 2, 'month': 2}
+    with db.engine.begin() as connection:
+        assert prune_leaderboard_buckets(connection, now=datetime(2025, 2, 20)) > 0
+    assert {(b.period, b.period_start.isoformat()) for b in LeaderboardBucket.query} == {
+        ('month', '2025-01-01')
+    }
+    
+    # Scores older than every kept period only reach the all-time boards
+    db.session.add(Score(player_name='Fay', normal_score=100, date=datetime(2020, 1, 1)))
+    db.session.commit()
+    assert LeaderboardBucket.query.filter_by(player_key='name:Fay').count() == 0
+    assert leaderboard(app.test_client())[0] == ('Fay', 100)
+
+def test_windowed_leaderboard_endpoint(app):
+    client = app.test_client()
+    post_score(client, 'Ann', 50, category='History', difficulty=2)
+    post_score(client, 'Bob', 70)
+    
+    assert leaderboard(client, '?window=day') == [('Bob', 70), ('Ann', 50)]
+    assert leaderboard(client, '?window=week&category=History') == [('Ann', 50)]
+    assert client.get('/api/leaderboard?window=year').status_code == 400
+    assert client.get('/api/leaderboard?window=day&difficulty=1').status_code == 400
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+from app.services.metrics import RequestMetrics, server_metrics_dir
+
+def metric(text, line_start):
+    values = [line.rsplit(' ', 1)[1] for line in text.splitlines() if line.startswith(line_start)]
+    assert len(values) == 1, (line_start, values)
+    return float(values[0])
+
+def test_requests_are_recorded_per_endpoint(client):
+    client.get('/api/questions?amount=1')
+    client.get('/api/questions?amount=1')
+    client.post('/api/scores/legacy', json={'player_name': 'Ann', 'normal_score': 50})
+    client.get('/api/no-such-route')
+
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+
+    questions = 'endpoint="questions.get_questions",method="GET"'
+    assert metric(text, f'trivia_http_requests_total{{{questions},status="200"}}') == 2
+    assert metric(text, f'trivia_http_request_duration_seconds_count{{{questions}}}') == 2
+    assert metric(text, f'trivia_http_request_duration_seconds_bucket{{{questions},le="+Inf"}}') == 2
+    assert metric(text, f'trivia_http_response_size_bytes_sum{{{questions}}}') > 0
+    assert metric(text, 'trivia_http_requests_total{endpoint="unmatched",method="GET",status="404"}') == 1
+
+    # The legacy submission inserts the score and its rollups
+    legacy = 'endpoint="scores.add_score_legacy",method="POST"'
+    assert metric(text, f'trivia_db_queries_per_request_sum{{{legacy}}}') >= 3
+    assert metric(text, f'trivia_db_queries_per_request_bucket{{{legacy},le="0"}}') == 0
+    assert metric(text, f'trivia_db_query_duration_seconds_total{{{legacy}}}') > 0
+
+def test_histogram_buckets_are_cumulative():
+    metrics = RequestMetrics()
+    for seconds in (0.0005, 0.003, 0.003, 20):
+        metrics.observe('scores.add_score', 'POST', '201', seconds, 10, 1, 0.001)
+    text = metrics.render()
+    labels = 'endpoint="scores.add_score",method="POST"'
+    assert metric(text, f'trivia_http_request_duration_seconds_bucket{{{labels},le="0.001"}}') == 1
+    assert metric(text, f'trivia_http_request_duration_seconds_bucket{{{labels},le="0.0025"}}') == 1
+    assert metric(text, f'trivia_http_request_duration_seconds_bucket{{{labels},le="0.005"}}') == 3
+    assert metric(text, f'trivia_http_request_duration_seconds_bucket{{{labels},le="10.0"}}') == 3
+    assert metric(text, f'trivia_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}') == 4
+    assert metric(text, f'trivia_http_request_duration_seconds_sum{{{labels}}}') == 20.0065
+
+def test_workers_sharing_a_directory_are_aggregated(tmp_path):
+    first = RequestMetrics(directory=str(tmp_path), worker=1)
+    second = RequestMetrics(directory=str(tmp_path), worker=2)
+    first.observe('questions.get_questions', 'GET', '200', 0.002, 500, 0, 0.0)
+    second.observe('questions.get_questions', 'GET', '200', 0.004, 700, 1, 0.001)
+    second.observe('questions.get_questions', 'GET', '503', 0.0001, 40, 0, 0.0)
+    first.flush()
+
+    text = second.render()
+    labels = 'endpoint="questions.get_questions",method="GET"'
+    assert metric(text, f'trivia_http_requests_total{{{labels},status="200"}}') == 2
+    assert metric(text, f'trivia_http_requests_total{{{labels},status="503"}}') == 1
+    assert metric(text, f'trivia_http_response_size_bytes_sum{{{labels}}}') == 1240
+    assert metric(text, f'trivia_db_queries_per_request_bucket{{{labels},le="0"}}') == 2
+    # Either worker reports the same totals
+    assert first.render() == text
+
+def test_server_metrics_dir_is_keyed_on_the_server_id(tmp_path):
+    root = str(tmp_path)
+    assert server_metrics_dir(root, 'web-1') == os.path.join(root, 'web-1')
+    # Without an id a process does not share its directory
+    assert server_metrics_dir(root) == os.path.join(root, str(os.getpid()))
+
+    # Directories of exited servers are pruned, named ones are left alone
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    exited = process.pid
+    for name in (str(exited), str(os.getpid()), 'web-1'):
+        os.makedirs(os.path.join(root, name), exist_ok=True)
+    server_metrics_dir(root, 'web-2')
+    assert sorted(os.listdir(root)) == sorted([str(os.getpid()), 'web-1'])
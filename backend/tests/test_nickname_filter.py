@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+from app.models.user import User
+from app.services.nickname_filter import BloomFilter, NicknameFilter
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def available(client, nickname):
+    return client.post('/api/auth/check-nickname', json={'nickname': nickname}).get_json()['available']
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter(10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f'player{i}')
+    assert all(f'player{i}' in bloom for i in range(10000))
+    false_positives = sum(f'other{i}' in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    # ~9.6 bits per name at 1%
+    assert bloom.nbytes < 10000 * 10 / 8 + 1
+
+def test_check_nickname_answers_from_the_filter(app):
+    client = app.test_client()
+    db.session.add_all(User(username=f'Player{i}') for i in range(50))
+    db.session.commit()
+    nickname_filter = NicknameFilter(app, refresh_interval=3600)
+    app.extensions['nickname_filter'] = nickname_filter
+    assert nickname_filter.build() == 50
+    
+    # Definitely available: no query at all
+    with count_queries(db.engine) as statements:
+        assert available(client, 'Newcomer') is True
+    assert statements == []
+    
+    # Possibly taken: confirmed by the username_lower index
+    with count_queries(db.engine) as statements:
+        assert available(client, 'PLAYER7') is False
+    assert len(statements) == 1 and 'username_lower' in statements[0]
+    
+    # This worker's registrations are in the filter at once
+    assert client.post('/api/auth/register-nickname', json={'nickname': 'Newcomer'}).status_code == 201
+    assert available(client, 'newcomer') is False
+    
+    # Other workers' registrations arrive with the next refresh
+    with db.engine.begin() as connection:
+        connection.execute(User.__table__.insert(), {'username': 'Elsewhere', 'username_lower': 'elsewhere'})
+    nickname_filter.refresh()
+    assert 'elsewhere' in nickname_filter._bloom
+    # The check and the registration's own pre-check for 'Newcomer'
+    assert nickname_filter.stats()['definitely_available'] == 2
@@ -0,0 +1,153 @@
+import base64
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.services.opentdb_mirror import get_opentdb_mirror, init_opentdb_mirror
+
+CATEGORIES = [{'id': 17, 'name': 'Science & Nature'}, {'id': 22, 'name': 'Geography'}]
+
+
+def b64(value):
+    return base64.b64encode(value.encode('utf-8')).decode('ascii')
+
+
+class StandInOpenTDB(BaseHTTPRequestHandler):
+    """Minimal Open Trivia DB: categories, session tokens and base64 questions"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.server.calls.append((url.path, params))
+
+        if url.path == '/api_category.php':
+            body = {'trivia_categories': CATEGORIES}
+        elif url.path == '/api_token.php':
+            body = {'response_code': 0, 'token': 'test-token'}
+        elif url.path == '/api.php' and self.server.rate_limited:
+            body = {'response_code': 5, 'results': []}
+        elif url.path == '/api.php':
+            names = {category['id']: category['name'] for category in CATEGORIES}
+            category = names[int(params.get('category', 17))]
+            difficulty = params.get('difficulty', 'easy')
+            body = {'response_code': 0, 'results': [{
+                'type': b64('multiple'),
+                'difficulty': b64(difficulty),
+                'category': b64(category),
+                'question': b64(f'{category} question {i} é?'),
+                'correct_answer': b64('Right'),
+                'incorrect_answers': [b64('Wrong 1'), b64('Wrong 2'), b64('Wrong 3')],
+            } for i in range(int(params['amount']))]}
+        else:
+            self.send_error(404)
+            return
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInOpenTDB)
+    server.calls = []
+    server.rate_limited = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mirror(app, upstream):
+    app.config.update({
+        'OPENTDB_MIRROR_URL': f'http://127.0.0.1:{upstream.server_port}',
+        'OPENTDB_MIRROR_BATCH_SIZE': 5,
+        'OPENTDB_MIRROR_MIN_POOL': 3,
+        'OPENTDB_MIRROR_MIN_INTERVAL': 0,
+    })
+    init_opentdb_mirror(app)
+    yield get_opentdb_mirror()
+    get_opentdb_mirror().shutdown()
+
+
+def test_mirror_refills_in_background(client, mirror, upstream):
+    # The first request does not wait on the upstream
+    response = client.get('/api/questions?category=Geography&difficulty=2')
+    assert response.status_code == 200
+    assert response.get_json()['questions'] == []
+
+    mirror.wait(timeout=10)
+    response = client.get('/api/questions?category=Geography&difficulty=2&amount=10')
+    questions = response.get_json()['questions']
+    assert len(questions) == 5
+    assert {q['category'] for q in questions} == {'Geography'}
+    assert {q['difficulty'] for q in questions} == {2}
+    assert questions[0]['incorrect_answers'] == ['Wrong 1', 'Wrong 2', 'Wrong 3']
+    assert ('/api.php', {'amount': '5', 'encode': 'base64', 'category': '22',
+                         'difficulty': 'medium', 'token': 'test-token'}) in upstream.calls
+
+    # The pool is above the low-water mark now, so no further fetches
+    calls = len(upstream.calls)
+    client.get('/api/questions?category=Geography&difficulty=2')
+    mirror.wait(timeout=10)
+    assert len(upstream.calls) == calls
+
+    # A refetch of the same questions is deduplicated by the importer
+    assert mirror.request_refill('Geography', 2)
+    mirror.wait(timeout=10)
+    assert mirror.stats()['fetched'] == 10
+    assert mirror.stats()['inserted'] == 5
+
+    # Having added nothing, the filter backs off rather than refetching
+    assert mirror.stats()['exhausted'] == 1
+    assert mirror.stats()['backing_off'] == 1
+    assert not mirror.request_refill('Geography', 2)
+
+
+def test_mirror_backs_off_after_upstream_errors(app, mirror, upstream):
+    upstream.rate_limited = True
+    assert mirror.request_refill('Geography', 1)
+    mirror.wait(timeout=10)
+    assert mirror.stats()['errors'] == 1
+    assert mirror.stats()['backing_off'] == 1
+
+    # While backing off the filter is not retried, other filters still are
+    assert not mirror.request_refill('Geography', 1)
+    assert mirror.request_refill('Geography', 3)
+    mirror.wait(timeout=10)
+
+    # Unknown upstream categories fail without calling api.php
+    upstream.rate_limited = False
+    assert mirror.request_refill('Not A Category')
+    mirror.wait(timeout=10)
+    assert mirror.stats()['errors'] == 3
+
+
+def test_mirror_shares_one_session_token(mirror, upstream):
+    with ThreadPoolExecutor(4) as executor:
+        sessions = list(executor.map(lambda _: mirror._session_token(), range(8)))
+    assert sessions == [('test-token', 0)] * 8
+
+    # Refills rejected together with the same token reset it once
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda _: mirror._renew_token(0, reset=True), range(8)))
+    token_calls = [params['command'] for path, params in upstream.calls if path == '/api_token.php']
+    assert token_calls == ['request', 'reset']
+    assert mirror._session_token() == ('test-token', 1)
+
+
+def test_mirror_disabled_without_url(app):
+    init_opentdb_mirror(app)
+    assert get_opentdb_mirror() is None
@@ -0,0 +1,58 @@
+import pytest
+
+from app import db
+from app.models.user import User
+from app.services.password_hashing import DEFAULT_METHOD, HashingBusy, PasswordHasher
+
+def test_passwords_hash_in_the_process_pool():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1)
+    try:
+        password_hash = hasher.hash('s3cret-pass')
+        assert password_hash.startswith('pbkdf2:sha256:1000$')
+        assert hasher.check(password_hash, 's3cret-pass')
+        assert not hasher.check(password_hash, 'wrong')
+        assert hasher.stats()['hashed'] == 1 and hasher.stats()['checked'] == 2
+    finally:
+        hasher.close()
+
+def test_configured_method_is_used_for_new_passwords(app):
+    app.extensions['password_hasher'] = PasswordHasher(method='pbkdf2:sha256:1000', workers=0)
+    client = app.test_client()
+    response = client.post('/api/auth/register', json={
+        'username': 'hasher', 'email': 'hasher@example.com', 'password': 'Password123'
+    })
+    assert response.status_code == 201
+    assert User.query.filter_by(username='hasher').one().password_hash.startswith('pbkdf2:sha256:1000$')
+    assert client.post('/api/auth/login', json={'username': 'hasher', 'password': 'Password123'}).status_code == 200
+
+def test_default_method_hashes_fit_the_column():
+    password_hash = PasswordHasher(workers=0).hash('s3cret-pass')
+    assert password_hash.startswith(DEFAULT_METHOD + '$')
+    assert len(password_hash) <= User.__table__.c.password_hash.type.length
+
+def test_logins_beyond_the_admission_limit_are_shed(app):
+    user = User(username='busy', email='busy@example.com')
+    user.set_password('Password123')
+    db.session.add(user)
+    db.session.commit()
+
+    hasher = PasswordHasher(workers=0, max_pending=0, admission_timeout=0.01)
+    app.extensions['password_hasher'] = hasher
+    # Every slot taken by logins in flight
+    hasher._slots.acquire()
+    response = app.test_client().post('/api/auth/login', json={'username': 'busy', 'password': 'Password123'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert hasher.stats()['rejected'] == 1
+
+    hasher._slots.release()
+    response = app.test_client().post('/api/auth/login', json={'username': 'busy', 'password': 'Password123'})
+    assert response.status_code == 200
+
+def test_hashing_busy_is_raised_without_a_slot():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=0, max_pending=0, admission_timeout=0)
+    hasher._slots.acquire()
+    with pytest.raises(HashingBusy):
+        hasher.hash('Password123')
+    hasher._slots.release()
+    assert hasher.hash('Password123')
@@ -0,0 +1,48 @@
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.score import PlayerStats
+from app.models.user import User
+
+def test_player_stats_rollup_rebuild_and_check(app):
+    client = app.test_client()
+    user = User(username='Ann', email='ann@example.com')
+    db.session.add(user)
+    db.session.commit()
+    token = create_access_token(identity=str(user.id))
+    
+    client.post('/api/scores', json={'normal_score': 50, 'trivialer_score': 20,
+                                     'questions_answered': 10, 'questions_correct': 6},
+                headers={'Authorization': f'Bearer {token}'})
+    client.post('/api/scores/legacy', json={'player_name': 'Ann', 'normal_score': 70,
+                                            'questions_answered': 10, 'questions_correct': 9})
+    client.post('/api/scores/legacy', json={'player_name': 'Bob', 'normal_score': 10})
+    
+    by_user = PlayerStats.query.filter_by(user_id=user.id).one()
+    assert (by_user.games, by_user.normal_score_sum, by_user.trivialer_score_max) == (1, 50, 20)
+    # Nickname rows include the signed-in player's games, like the old filter did
+    by_name = PlayerStats.query.filter_by(player_name='Ann').one()
+    assert (by_name.games, by_name.normal_score_sum, by_name.normal_score_max) == (2, 120, 70)
+    
+    data = client.get('/api/scores/stats?nickname=Ann').get_json()
+    assert data['total_games'] == 2
+    assert data['average_normal_score'] == 60
+    assert data['highest_score'] == 70
+    assert data['accuracy'] == 75.0
+    data = client.get('/api/scores/stats', headers={'Authorization': f'Bearer {token}'}).get_json()
+    assert data['total_games'] == 1
+    assert data['average_trivialer_score'] == 20
+    
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['check-player-stats'])
+    assert result.exit_code == 0, result.output
+    
+    by_name.games = 5
+    db.session.delete(PlayerStats.query.filter_by(player_name='Bob').one())
+    db.session.commit()
+    result = runner.invoke(args=['check-player-stats'])
+    assert result.exit_code == 1
+    assert '2 player stats rows out of date' in result.output
+    
+    result = runner.invoke(args=['rebuild-player-stats'])
+    assert 'Rebuilt 3 player stats rows' in result.output
+    assert runner.invoke(args=['check-player-stats']).exit_code == 0
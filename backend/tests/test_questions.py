@@ -1,3 +1,4 @@
+import gzip
 import json
 from app import db
 from app.models.question import Question
@@ -34,3 +35,225 @@ def test_get_questions(client):
     data = response.get_json()
     assert len(data['questions']) == 1
     assert data['questions'][0]['text'] == "What is the capital of France?"
+
+def test_get_questions_samples_amount(client):
+    with client.application.app_context():
+        db.session.add_all([
+            Question(
+                text=f"Science question {i}",
+                category="Science",
+                difficulty=1 + i % 3,
+                correct_answer="Yes",
+                incorrect_answers="No|Maybe|Never"
+            )
+            for i in range(30)
+        ])
+        db.session.commit()
+    
+    response = client.get('/api/questions?category=Science&difficulty=2&amount=5')
+    assert response.status_code == 200
+    questions = response.get_json()['questions']
+    assert len(questions) == 5
+    assert len({q['id'] for q in questions}) == 5
+    assert all(q['difficulty'] == 2 for q in questions)
+    assert questions[0]['incorrect_answers'] == ["No", "Maybe", "Never"]
+    
+    # New questions are visible to the next draw
+    with client.application.app_context():
+        db.session.add(Question(
+            text="Fresh question",
+            category="Music",
+            difficulty=1,
+            correct_answer="A",
+            incorrect_answers="B|C|D"
+        ))
+        db.session.commit()
+    
+    response = client.get('/api/questions?category=Music')
+    assert [q['text'] for q in response.get_json()['questions']] == ["Fresh question"]
+
+def test_question_cache_hits_and_invalidation(client):
+    with client.application.app_context():
+        question = Question(
+            text="What is 2 + 2?",
+            category="Math",
+            difficulty=1,
+            correct_answer="4",
+            incorrect_answers="3|5|22"
+        )
+        db.session.add(question)
+        db.session.commit()
+        question_id = question.id
+    
+    client.get('/api/questions?category=Math')
+    client.get('/api/questions?category=Math')
+    stats = client.get('/api/questions/cache').get_json()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    assert stats['size'] == 1
+    
+    # Updating a question bumps the bank version and drops cached payloads
+    with client.application.app_context():
+        db.session.get(Question, question_id).correct_answer = "Four"
+        db.session.commit()
+    
+    response = client.get('/api/questions?category=Math')
+    assert response.get_json()['questions'][0]['correct_answer'] == "Four"
+    stats = client.get('/api/questions/cache').get_json()
+    assert stats['version'] == 2
+    assert stats['misses'] == 2
+
+def test_question_snapshot_and_changes(client):
+    with client.application.app_context():
+        db.session.add(Question(
+            text="Largest planet?",
+            category="Science",
+            difficulty=1,
+            correct_answer="Jupiter",
+            incorrect_answers=["Mars", "Venus", "Earth"]
+        ))
+        db.session.commit()
+    
+    response = client.get('/api/questions/snapshot', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    snapshot = json.loads(gzip.decompress(response.data))
+    assert [q['text'] for q in snapshot['questions']] == ["Largest planet?"]
+    etag = response.headers['ETag']
+    
+    response = client.get('/api/questions/snapshot', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': etag
+    })
+    assert response.status_code == 304
+    assert client.application.extensions['question_snapshots'].builds == 1
+    
+    with client.application.app_context():
+        question = Question.query.first()
+        question.correct_answer = "Jupiter!"
+        db.session.add(Question(
+            text="Smallest planet?",
+            category="Science",
+            difficulty=1,
+            correct_answer="Mercury",
+            incorrect_answers=["Mars", "Venus", "Earth"]
+        ))
+        db.session.commit()
+        deleted = Question(text="Temp", category="Art", difficulty=1,
+                           correct_answer="A", incorrect_answers=["B"])
+        db.session.add(deleted)
+        db.session.commit()
+        deleted_id = deleted.id
+        db.session.delete(deleted)
+        db.session.commit()
+    
+    response = client.get(f"/api/questions/changes?since={snapshot['version']}")
+    data = response.get_json()
+    assert sorted(q['text'] for q in data['questions']) == ["Largest planet?", "Smallest planet?"]
+    assert data['deleted'] == [deleted_id]
+    assert data['version'] > snapshot['version']
+    
+    response = client.get('/api/questions/snapshot', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+def test_changes_list_questions_moved_out_of_a_category(client):
+    with client.application.app_context():
+        question = Question(text="Moved?", category="Science", difficulty=1,
+                            correct_answer="A", incorrect_answers=["B"])
+        db.session.add(question)
+        db.session.commit()
+        question_id = question.id
+    since = client.get('/api/questions/changes?since=0').get_json()['version']
+    
+    with client.application.app_context():
+        db.session.get(Question, question_id).category = "History"
+        db.session.commit()
+    
+    science = client.get(f"/api/questions/changes?since={since}&category=Science").get_json()
+    assert science['questions'] == [] and science['deleted'] == [question_id]
+    history = client.get(f"/api/questions/changes?since={since}&category=History").get_json()
+    assert [q['id'] for q in history['questions']] == [question_id] and history['deleted'] == []
+    # A whole-bank sync drops it, then upserts it again
+    everything = client.get(f"/api/questions/changes?since={since}").get_json()
+    assert [q['id'] for q in everything['questions']] == [question_id]
+
+def test_search_questions_and_near_duplicates(client):
+    with client.application.app_context():
+        db.session.add_all([
+            Question(text="Which planet is known as the Red Planet?", category="Science",
+                     difficulty=1, correct_answer="Mars", incorrect_answers=["Venus"]),
+            Question(text="Which ocean is the largest?", category="Geography",
+                     difficulty=1, correct_answer="Pacific", incorrect_answers=["Atlantic"]),
+        ])
+        db.session.commit()
+        
+        # The index follows updates made after insert
+        ocean = Question.query.filter_by(category="Geography").one()
+        ocean.text = "Which ocean is the deepest?"
+        db.session.commit()
+        
+        from app.services.question_search import find_near_duplicates
+        matches = find_near_duplicates("which planet is known as the red planet")
+        assert [m['text'] for m in matches] == ["Which planet is known as the Red Planet?"]
+        assert find_near_duplicates("Which planet has rings?") == []
+    
+    response = client.get('/api/questions/search?q=red planet')
+    results = response.get_json()['results']
+    assert [r['text'] for r in results] == ["Which planet is known as the Red Planet?"]
+    assert results[0]['score'] > 0
+    
+    response = client.get('/api/questions/search?q=largest')
+    assert response.get_json()['results'] == []
+    response = client.get('/api/questions/search?q=deepest ocean')
+    assert len(response.get_json()['results']) == 1
+
+def test_like_search_fallback_escapes_wildcards(client):
+    with client.application.app_context():
+        db.session.add_all([
+            Question(text="What does snake_case look like?", category="Computers",
+                     difficulty=1, correct_answer="a_b", incorrect_answers=["aB"]),
+            Question(text="What does snakeXcase look like?", category="Computers",
+                     difficulty=1, correct_answer="aXb", incorrect_answers=["aB"]),
+        ])
+        db.session.commit()
+        
+        # As on a database without a full-text index
+        client.application.extensions['question_search_backend'] = 'like'
+        from app.services.question_search import search_questions
+        results = search_questions("snake_case")
+        assert [r['text'] for r in results] == ["What does snake_case look like?"]
+
+def test_categories_counts_and_etag(client):
+    with client.application.app_context():
+        db.session.add_all([
+            Question(text=f"Geography question {i}?", category="Geography", difficulty=1 + i % 2,
+                     correct_answer="A", incorrect_answers="B|C|D")
+            for i in range(3)
+        ] + [
+            Question(text="Who wrote Hamlet?", category="Literature", difficulty=2,
+                     correct_answer="William Shakespeare", incorrect_answers="B|C|D")
+        ])
+        db.session.commit()
+    
+    response = client.get('/api/questions/categories')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['categories'] == [
+        {'name': 'Geography', 'total': 3, 'difficulties': {'1': 2, '2': 1}},
+        {'name': 'Literature', 'total': 1, 'difficulties': {'2': 1}},
+    ]
+    etag = response.headers['ETag']
+    assert client.get('/api/questions/categories', headers={'If-None-Match': etag}).status_code == 304
+    
+    # Moving a question between buckets and deleting one keep the counts exact
+    with client.application.app_context():
+        hamlet = Question.query.filter_by(category="Literature").one()
+        hamlet.category = "Drama"
+        db.session.delete(Question.query.filter_by(category="Geography", difficulty=2).one())
+        db.session.commit()
+    
+    response = client.get('/api/questions/categories', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['categories'] == [
+        {'name': 'Drama', 'total': 1, 'difficulties': {'2': 1}},
+        {'name': 'Geography', 'total': 2, 'difficulties': {'1': 2}},
+    ]
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.question import Question
+from app.models.quiz import QuizDeck
+from app.services.quiz_deck import prune_quiz_decks
+
+def add_questions(count, category="History"):
+    db.session.add_all([
+        Question(
+            text=f"{category} question {i}",
+            category=category,
+            difficulty=1,
+            correct_answer="A",
+            incorrect_answers=["B", "C", "D"]
+        )
+        for i in range(count)
+    ])
+    db.session.commit()
+
+def test_quiz_deck_pages_without_repeats(app):
+    add_questions(25)
+    add_questions(5, category="Art")
+    client = app.test_client()
+    
+    response = client.post('/api/quizzes', json={'category': 'History', 'page_size': 10})
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['quiz']['size'] == 25
+    quiz_id = data['quiz']['id']
+    seen = [q['id'] for q in data['questions']]
+    
+    # Questions added mid-game do not reshuffle the deck
+    add_questions(3)
+    
+    while data['next_cursor']:
+        response = client.get(f"/api/quizzes/{quiz_id}/questions?cursor={data['next_cursor']}")
+        assert response.status_code == 200
+        data = response.get_json()
+        seen.extend(q['id'] for q in data['questions'])
+    
+    assert len(seen) == 25
+    assert len(set(seen)) == 25
+    assert {q.id for q in Question.query.filter_by(category='History').limit(25)} == set(seen)
+    
+    response = client.get(f"/api/quizzes/{quiz_id}/questions?cursor=forged")
+    assert response.status_code == 400
+
+def test_expired_quiz_decks_are_hidden_and_pruned(app):
+    add_questions(5)
+    client = app.test_client()
+    old_id = client.post('/api/quizzes', json={}).get_json()['quiz']['id']
+    new_id = client.post('/api/quizzes', json={}).get_json()['quiz']['id']
+    db.session.get(QuizDeck, old_id).created_at = datetime.utcnow() - app.config['QUIZ_DECK_TTL'] - timedelta(hours=1)
+    db.session.commit()
+    
+    assert client.get(f'/api/quizzes/{old_id}/questions').status_code == 404
+    assert client.get(f'/api/quizzes/{new_id}/questions').status_code == 200
+    
+    with db.engine.begin() as connection:
+        assert prune_quiz_decks(connection) == 1
+    assert db.session.get(QuizDeck, old_id) is None
+    assert db.session.get(QuizDeck, new_id) is not None
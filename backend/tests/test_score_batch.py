@@ -0,0 +1,58 @@
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.score import PlayerStats, Score
+from app.models.user import User
+
+def test_batch_scores_are_idempotent(client):
+    batch = {'player_name': 'Ann', 'games': [
+        {'idempotency_key': 'game-1', 'normal_score': 50, 'category': 'Science', 'difficulty': 1,
+         'questions_answered': 10, 'questions_correct': 5, 'date': '2024-01-01T10:00:00'},
+        {'idempotency_key': 'game-2', 'normal_score': 80, 'trivialer_score': 20},
+        {'idempotency_key': 'game-2', 'normal_score': 80},
+        {'idempotency_key': 'game-3', 'normal_score': 'lots'},
+        {'normal_score': 10},
+    ]}
+    response = client.post('/api/scores/batch', json=batch)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['created'] == 2
+    statuses = [result['status'] for result in data['results']]
+    assert statuses == ['created', 'created', 'duplicate', 'invalid', 'invalid']
+    assert data['results'][2]['score_id'] == data['results'][1]['score_id']
+    assert 'normal_score' in data['results'][3]['errors']
+    
+    # A retried request stores nothing new and points at the stored scores
+    replay = client.post('/api/scores/batch', json=batch).get_json()
+    assert replay['created'] == 0
+    assert [r.get('score_id') for r in replay['results']][:3] == \
+        [r.get('score_id') for r in data['results']][:3]
+    
+    with client.application.app_context():
+        assert Score.query.count() == 2
+        first = db.session.get(Score, data['results'][0]['score_id'])
+        assert (first.player_name, first.score, first.date.year) == ('Ann', 50, 2024)
+        stats = PlayerStats.query.filter_by(player_name='Ann').one()
+        assert (stats.games, stats.normal_score_sum, stats.questions_correct) == (2, 130, 5)
+    
+    board = client.get('/api/leaderboard').get_json()['leaderboard']
+    assert [(entry['username'], entry['score']) for entry in board] == [('Ann', 80)]
+
+def test_batch_scores_authenticated_and_limits(client):
+    with client.application.app_context():
+        user = User(username='Bob', email='bob@example.com')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        user_id = user.id
+    
+    response = client.post('/api/scores/batch', headers={'Authorization': f'Bearer {token}'},
+                           json={'player_name': 'Spoofed', 'games': [
+                               {'idempotency_key': 'bob-1', 'normal_score': 30}]})
+    assert response.get_json()['created'] == 1
+    with client.application.app_context():
+        score = Score.query.one()
+        assert (score.user_id, score.player_name) == (user_id, 'Bob')
+    
+    assert client.post('/api/scores/batch', json={'games': []}).status_code == 400
+    too_many = [{'idempotency_key': f'k{i}'} for i in range(101)]
+    assert client.post('/api/scores/batch', json={'games': too_many}).status_code == 400
@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import db
+from app.models.score import Score
+from app.services.player_stats import rebuild_player_stats
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def post_score(client, name, normal):
+    response = client.post('/api/scores/legacy', json={'player_name': name, 'normal_score': normal})
+    assert response.status_code == 201
+
+def test_not_modified_score_reads_issue_no_sql(app):
+    client = app.test_client()
+    post_score(client, 'Ann', 50)
+    
+    for url in ('/api/scores?nickname=Ann', '/api/scores/stats?nickname=Ann', '/api/scores/stats'):
+        first = client.get(url)
+        assert first.status_code == 200 and first.headers['ETag']
+        
+        with count_queries(db.engine) as statements:
+            revalidated = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+            repeated = client.get(url)
+        assert revalidated.status_code == 304
+        assert revalidated.headers['ETag'] == first.headers['ETag']
+        assert repeated.status_code == 200 and repeated.get_data() == first.get_data()
+        assert statements == []
+
+def test_score_writes_change_the_etag(app):
+    client = app.test_client()
+    post_score(client, 'Ann', 50)
+    ann = client.get('/api/scores/stats?nickname=Ann')
+    bob = client.get('/api/scores/stats?nickname=Bob')
+    everyone = client.get('/api/scores')
+    
+    post_score(client, 'Ann', 70)
+    response = client.get('/api/scores/stats?nickname=Ann', headers={'If-None-Match': ann.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()['highest_normal_score'] == 70
+    assert response.headers['ETag'] != ann.headers['ETag']
+    assert len(client.get('/api/scores', headers={'If-None-Match': everyone.headers['ETag']})
+               .get_json()['scores']) == 2
+    # Other players' scopes are untouched
+    assert client.get('/api/scores/stats?nickname=Bob',
+                      headers={'If-None-Match': bob.headers['ETag']}).status_code == 304
+
+def test_other_workers_writes_show_after_the_ttl(app):
+    client = app.test_client()
+    post_score(client, 'Ann', 50)
+    before = client.get('/api/scores?nickname=Ann')
+    
+    # A write this worker's session never saw, as from another worker
+    with db.engine.begin() as connection:
+        connection.execute(Score.__table__.insert(), {
+            'player_name': 'Ann', 'normal_score': 60, 'trivialer_score': 0, 'score': 60
+        })
+    with db.engine.begin() as connection:
+        rebuild_player_stats(connection)
+    assert client.get('/api/scores?nickname=Ann').get_data() == before.get_data()
+    
+    app.extensions['score_read_cache'].ttl = 0
+    assert len(client.get('/api/scores?nickname=Ann').get_json()['scores']) == 2
@@ -0,0 +1,74 @@
+import random
+
+from app import db
+from app.models.score import ScoreHistogram
+from app.services.score_batch import insert_score_rows
+from app.services.score_histogram import (
+    EXACT_LIMIT, MAX_BUCKETS, SUB_BUCKETS, bucket_bounds, histogram_bucket,
+    rebuild_score_histograms
+)
+
+def test_histogram_buckets_are_bounded():
+    assert histogram_bucket(2 ** 31 - 1) == MAX_BUCKETS - 1 == 623
+    assert [histogram_bucket(value) for value in (0, 1, EXACT_LIMIT - 1)] == [0, 1, EXACT_LIMIT - 1]
+    for bucket in range(MAX_BUCKETS):
+        low, high = bucket_bounds(bucket)
+        assert histogram_bucket(low) == histogram_bucket(high) == bucket
+        assert high - low + 1 <= max(1, low // SUB_BUCKETS)
+        if bucket + 1 < MAX_BUCKETS:
+            assert bucket_bounds(bucket + 1)[0] == high + 1
+
+def test_percentile_of_submitted_scores(app):
+    client = app.test_client()
+    for name, normal, trivialer, category in [
+        ('Ann', 3, 300, 'Science'), ('Bob', 5, 500, 'Science'), ('Cid', 7, 700, 'Science'),
+        ('Dee', 9, 900, 'History'),
+    ]:
+        response = client.post('/api/scores/legacy?percentile=1', json={
+            'player_name': name, 'normal_score': normal, 'trivialer_score': trivialer,
+            'category': category, 'difficulty': 1
+        })
+        assert response.status_code == 201
+    # Dee's is the only History game, so it beats none
+    assert response.get_json()['percentile'] == {'category': 'History', 'normal': 0.0, 'trivialer': 0.0}
+    
+    def percentile(query):
+        response = client.get(f'/api/scores/percentile?{query}')
+        assert response.status_code == 200
+        return response.get_json()
+    
+    # 7 beats Ann's 3 and Bob's 5 of the three Science games
+    body = percentile('score=7&category=Science')
+    assert (body['percentile'], body['below'], body['total'], body['max_error']) == (66.67, 2, 3, 0.0)
+    assert percentile('score=100')['percentile'] == 100.0
+    assert percentile('score=600&mode=trivialer&difficulty=1')['below'] == 2
+    assert percentile('score=1&category=Art')['percentile'] is None
+    assert client.get('/api/scores/percentile').status_code == 400
+    assert client.get('/api/scores/percentile?score=1&mode=bogus').status_code == 400
+
+def test_percentile_error_bound_and_rebuild(app):
+    rng = random.Random(7)
+    values = [rng.randrange(100000) for _ in range(2000)]
+    with db.engine.begin() as connection:
+        insert_score_rows(connection, [
+            {'player_name': f'p{i % 50}', 'normal_score': value, 'trivialer_score': 0, 'score': value,
+             'category': 'Science', 'difficulty': 1 + i % 3}
+            for i, value in enumerate(values)
+        ])
+    client = app.test_client()
+    for probe in [0, 100, 255, 256, 1000, 12345, 50000, 99999, 200000]:
+        body = client.get(f'/api/scores/percentile?score={probe}&category=Science').get_json()
+        exact = 100.0 * sum(value < probe for value in values) / len(values)
+        assert body['total'] == len(values)
+        assert body['percentile'] <= exact + 0.01
+        assert exact <= body['percentile'] + body['max_error'] + 0.01
+    
+    # Bounded memory: one row per bucket used, per scope
+    rows = ScoreHistogram.query.filter_by(mode='normal', category='Science', difficulty=0).count()
+    assert rows <= MAX_BUCKETS
+    
+    stored = sorted((h.mode, h.category, h.difficulty, h.bucket, h.count) for h in ScoreHistogram.query)
+    with db.engine.begin() as connection:
+        assert rebuild_score_histograms(connection) == len(stored)
+    assert sorted((h.mode, h.category, h.difficulty, h.bucket, h.count)
+                  for h in ScoreHistogram.query) == stored
@@ -0,0 +1,88 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+
+from app import db
+from app.models.score import Score
+from app.models.user import User
+from app.routes.scores import score_rows_query
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def explain(connection, stmt):
+    compiled = stmt.compile(dialect=connection.dialect)
+    if connection.dialect.name == 'sqlite':
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params)
+        return '\n'.join(row[-1] for row in rows)
+    rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', compiled.params)
+    return '\n'.join(row[0] for row in rows)
+
+HISTORY_QUERIES = [
+    ('ix_score_player_name_date', lambda: score_rows_query(Score.player_name == 'Ann')),
+    ('ix_score_user_id_date', lambda: score_rows_query(Score.user_id == 1, limit=11)),
+    ('ix_score_date', lambda: score_rows_query(limit=50)),
+    ('ix_score_player_name_date', lambda: score_rows_query(
+        Score.player_name == 'Ann', limit=11, after=(datetime(2024, 1, 1), 10))),
+    ('ix_score_player_name_date', lambda: score_rows_query(
+        Score.player_name == 'Ann', limit=11, after=(None, 10))),
+]
+
+def test_score_history_is_one_query(app):
+    users = [User(username=f'user{i}', email=f'user{i}@example.com') for i in range(5)]
+    db.session.add_all(users)
+    db.session.flush()
+    db.session.add_all(Score(user_id=user.id, normal_score=i) for i, user in enumerate(users))
+    db.session.add_all(Score(player_name='Ann', normal_score=i) for i in range(5))
+    db.session.commit()
+    db.session.expunge_all()
+    client = app.test_client()
+    
+    # Usernames come from the join, not a lazy User load per row; the
+    # other statement is the read cache's change marker lookup
+    with count_queries(db.engine) as statements:
+        data = client.get('/api/scores').get_json()
+    assert len(data['scores']) == 10
+    assert {score['username'] for score in data['scores']} >= {'user0', 'Ann'}
+    assert len(statements) == 2
+    assert 'max(score.id)' in statements[0]
+    
+    with count_queries(db.engine) as statements:
+        client.get('/api/scores?nickname=Ann&limit=2')
+    assert len(statements) == 2
+    assert 'player_stats' in statements[0]
+
+def test_score_history_plans_sqlite(app):
+    connection = db.session.connection()
+    for index, query in HISTORY_QUERIES:
+        plan = explain(connection, query())
+        assert index in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'),
+                    reason='set TEST_POSTGRES_URL (a scratch database) to check PostgreSQL plans')
+def test_score_history_plans_postgresql(app):
+    engine = create_engine(os.environ['TEST_POSTGRES_URL'])
+    db.metadata.create_all(engine, tables=[User.__table__, Score.__table__])
+    try:
+        with engine.begin() as connection:
+            # Tiny test tables would otherwise be sequentially scanned
+            connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+            for index, query in HISTORY_QUERIES:
+                plan = explain(connection, query())
+                assert index in plan, plan
+                assert 'Sort Key' not in plan, plan
+    finally:
+        db.metadata.drop_all(engine, tables=[User.__table__, Score.__table__])
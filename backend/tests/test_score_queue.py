@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from app import create_app, db
+from app.config import TestingConfig
+from app.models.score import PlayerStats, Score
+from app.services.score_queue import get_score_queue
+
+@pytest.fixture
+def queued_app(tmp_path):
+    # A file database: the writer thread uses its own connection
+    class WriteBehindConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'scores.db'}"
+        SCORE_WRITE_BEHIND = True
+        SCORE_QUEUE_MAX_SIZE = 2
+        SCORE_QUEUE_PUT_TIMEOUT = 0.05
+    
+    app = create_app(WriteBehindConfig)
+    with app.app_context():
+        yield app
+        get_score_queue().close()
+        db.session.remove()
+        db.drop_all()
+
+def test_write_behind_scores_are_batched_and_drained(queued_app):
+    client = queued_app.test_client()
+    score_queue = get_score_queue()
+    
+    response = client.post('/api/scores/legacy?wait=1', json={'player_name': 'Ann', 'normal_score': 40})
+    assert response.status_code == 201
+    assert response.get_json()['score']['id'] is not None
+    # Read-your-writes: committed before the response
+    assert client.get('/api/scores?nickname=Ann').get_json()['scores'][0]['score'] == 40
+    
+    for points in (10, 20):
+        response = client.post('/api/scores/legacy', json={'player_name': 'Ann', 'normal_score': points})
+        assert response.status_code == 202
+        assert response.get_json()['queued'] is True
+    
+    score_queue.close()
+    assert Score.query.filter_by(player_name='Ann').count() == 3
+    assert PlayerStats.query.filter_by(player_name='Ann').one().normal_score_sum == 70
+    assert score_queue.stats()['written'] == 3
+
+def test_write_behind_backpressure(queued_app):
+    client = queued_app.test_client()
+    score_queue = get_score_queue()
+    
+    # Stall the writer on its first score so the queue (2 slots) fills up
+    score_queue.batch_size = 1
+    release = threading.Event()
+    flush = score_queue._flush
+    score_queue._flush = lambda batch: (release.wait(5), flush(batch))
+    
+    statuses = [
+        client.post('/api/scores/legacy', json={'player_name': 'Bob', 'normal_score': i}).status_code
+        for i in range(5)
+    ]
+    assert statuses == [202, 202, 202, 503, 503]
+    response = client.post('/api/scores/legacy', json={'player_name': 'Bob', 'normal_score': 1})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    
+    release.set()
+    score_queue.close()
+    assert Score.query.filter_by(player_name='Bob').count() == statuses.count(202)
+
+def test_close_drains_puts_already_in_progress(queued_app):
+    client = queued_app.test_client()
+    score_queue = get_score_queue()
+    
+    # A submit that got past the closed check, but whose put lands only
+    # after close() has been called
+    put = score_queue._queue.put
+    def late_put(item, timeout):
+        score_queue._closed.wait(5)
+        time.sleep(0.2)
+        put(item, timeout=timeout)
+    score_queue._queue.put = late_put
+    
+    responses = []
+    submitting = threading.Thread(target=lambda: responses.append(client.post(
+        '/api/scores/legacy', json={'player_name': 'Cid', 'normal_score': 3}).status_code))
+    submitting.start()
+    while not score_queue._submitting:
+        time.sleep(0.001)
+    score_queue.close()
+    submitting.join()
+    
+    # Written before close() returned; later scores are turned away
+    assert responses == [202]
+    assert Score.query.filter_by(player_name='Cid').count() == 1
+    assert client.post('/api/scores/legacy', json={'player_name': 'Cid', 'normal_score': 4}).status_code == 503
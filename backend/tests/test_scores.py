@@ -56,3 +56,98 @@ def test_get_user_stats(client):
     assert data['total_questions'] == 10
     assert data['correct_answers'] == 8
     assert data['accuracy'] == 80.0
+
+def test_stats_aggregate_matches_python_fallbacks(client):
+    from app import db
+    from app.models.score import Score
+    
+    with client.application.app_context():
+        scores = [
+            Score(player_name='Ann', normal_score=50, trivialer_score=0, score=40,
+                  questions_answered=10, questions_correct=5),
+            Score(player_name='Ann', normal_score=0, trivialer_score=70, score=30,
+                  questions_answered=None, questions_correct=None),
+            Score(player_name='Ann', normal_score=0, trivialer_score=0, score=0,
+                  questions_answered=5, questions_correct=5),
+            Score(player_name='Bob', normal_score=90, trivialer_score=10, score=90,
+                  questions_answered=10, questions_correct=9),
+        ]
+        db.session.add_all(scores)
+        db.session.commit()
+    
+    response = client.get('/api/scores/stats?nickname=Ann')
+    data = response.get_json()
+    # normal: 50, 30 (falls back to score), 0; trivialer: 40, 70, 0
+    assert data['total_games'] == 3
+    assert data['average_normal_score'] == 80 / 3
+    assert data['average_trivialer_score'] == 110 / 3
+    assert data['highest_normal_score'] == 50
+    assert data['highest_trivialer_score'] == 70
+    assert data['average_score'] == data['average_normal_score']
+    assert data['highest_score'] == 50
+    assert data['total_questions'] == 15
+    assert data['correct_answers'] == 10
+    assert data['accuracy'] == 10 / 15 * 100
+    
+    assert client.get('/api/scores/stats').get_json()['total_games'] == 4
+    assert client.get('/api/scores/stats?nickname=Nobody').get_json()['total_games'] == 0
+
+def test_score_history_keyset_pages(client):
+    from datetime import datetime
+    from app import db
+    from app.models.score import Score
+    
+    with client.application.app_context():
+        # Two scores share a date, so the id tie-break matters
+        dates = [datetime(2024, 1, day) for day in (1, 2, 2, 3, 4)]
+        db.session.add_all(Score(player_name='Ann', normal_score=i, score=i, date=date)
+                           for i, date in enumerate(dates))
+        db.session.commit()
+    
+    seen = []
+    cursor = None
+    while True:
+        query = '/api/scores?nickname=Ann&limit=2' + (f'&cursor={cursor}' if cursor else '')
+        data = client.get(query).get_json()
+        assert len(data['scores']) <= 2
+        seen += [score['score'] for score in data['scores']]
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+    assert seen == [4, 3, 2, 1, 0]
+    
+    # Unpaged requests keep the old shape
+    data = client.get('/api/scores?nickname=Ann').get_json()
+    assert [score['score'] for score in data['scores']] == [4, 3, 2, 1, 0]
+    assert 'next_cursor' not in data
+    
+    assert client.get('/api/scores?cursor=forged').status_code == 400
+
+def test_score_history_pages_through_undated_scores(client):
+    from datetime import datetime
+    from app import db
+    from app.models.score import Score
+    
+    with client.application.app_context():
+        db.session.add_all(Score(player_name='Ann', normal_score=i, score=i, date=date) for i, date in
+                           enumerate([datetime(2024, 1, 1), datetime(2024, 1, 2)]))
+        db.session.flush()
+        # Legacy rows stored before scores were dated
+        db.session.execute(Score.__table__.insert(), [
+            {'player_name': 'Ann', 'normal_score': i, 'score': i, 'date': None} for i in (10, 11, 12)
+        ])
+        db.session.commit()
+    
+    seen = []
+    cursor = None
+    while True:
+        query = '/api/scores?nickname=Ann&limit=2' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(query)
+        assert response.status_code == 200
+        data = response.get_json()
+        seen += [score['score'] for score in data['scores']]
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+    # Dated scores newest first, then the undated ones newest id first
+    assert seen == [1, 0, 12, 11, 10]
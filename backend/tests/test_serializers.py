@@ -0,0 +1,44 @@
+from datetime import datetime
+from app import db
+from app.models.question import Question
+from app.models.score import Score
+from app.models.user import User
+from app.routes.scores import select_score_rows
+from app.schemas.question import QuestionSchema, question_serializer
+from app.schemas.score import ScoreSchema, score_serializer
+from app.schemas.user import UserSchema, user_serializer
+
+def test_compiled_serializers_match_marshmallow(app):
+    user = User(username='parity', email='parity@trivia.local')
+    question = Question(
+        text="What is the capital of Peru?",
+        category="Geography",
+        difficulty=2,
+        correct_answer="Lima",
+        incorrect_answers="Cusco|Arequipa|Quito"
+    )
+    db.session.add_all([user, question])
+    db.session.commit()
+    
+    linked = Score(user_id=user.id, normal_score=70, trivialer_score=90, score=70,
+                   category='Science', difficulty=1, questions_answered=10,
+                   questions_correct=7, date=datetime(2025, 1, 2, 3, 4, 5, 678))
+    guest = Score(player_name='Guest', normal_score=10, score=10)
+    db.session.add_all([linked, guest])
+    db.session.commit()
+    
+    assert question_serializer.dump_obj(question) == QuestionSchema().dump(question)
+    row = db.session.execute(
+        db.select(*question_serializer.columns).where(Question.id == question.id)
+    ).one()
+    assert question_serializer.dump_row(row) == QuestionSchema().dump(question)
+    
+    assert user_serializer.dump_obj(user) == UserSchema().dump(user)
+    
+    for score in (linked, guest):
+        assert score_serializer.dump_obj(score) == ScoreSchema().dump(score)
+    
+    # Row path also fills username from player_name or the linked user
+    by_id = {row.id: score_serializer.dump_row(row) for row in select_score_rows()}
+    assert by_id[linked.id] == dict(ScoreSchema().dump(linked), username='parity')
+    assert by_id[guest.id] == dict(ScoreSchema().dump(guest), username='Guest')
@@ -1,4 +1,3 @@
-import json
 import random
 from app import create_app, db
 from app.models.question import Question
@@ -35,7 +34,7 @@ def try_questions():
             
             # Prepare answer options
             correct_answer = question.correct_answer
-            incorrect_answers = json.loads(question.incorrect_answers)
+            incorrect_answers = question.incorrect_answers
             all_options = [correct_answer] + incorrect_answers
             random.shuffle(all_options)
             
@@ -14,6 +14,7 @@ export default function Results() {
   const total = Number(params.total);
   const category = params.category as string;
   const difficulty = params.difficulty ? Number(params.difficulty) : undefined;
+  const percentile = params.percentile !== undefined ? Number(params.percentile) : undefined;
   
   const percentage = total > 0 ? Math.round((normalScore / total) * 10) : 0;
 
@@ -83,6 +84,14 @@ export default function Results() {
             <Text style={styles.percentageValue}>{percentage}%</Text>
           </View>
           
+          {percentile !== undefined && !isNaN(percentile) && (
+            <View style={styles.scoreSection}>
+              <Text style={styles.terminalLabel}>
+                YOU BEAT {Math.round(percentile)}% OF FLIGHTS TO {category.toUpperCase()}
+              </Text>
+            </View>
+          )}
+          
           <View style={styles.detailsSection}>
             <View style={styles.detailRow}>
               <Text style={styles.detailLabel}>DESTINATION:</Text>
@@ -152,14 +152,17 @@ const QuizScreen: React.FC<QuizScreenProps> = ({ category, difficulty }) => {
     // Ensure score doesn't go below 0. miles penality takes 10s and time penality takes units of 1s
     const finalScore = Math.max(0, (answersCorrect * QUIZ_CONFIG.POINTS_PER_CORRECT_ANSWER) - (milesUsed * QUIZ_CONFIG.MILES_PENALTY_RATE) - (QUIZ_CONFIG.INITIAL_TIME - secondsAtEnd) ); 
     try {
-      await submitScore({
+      const submitted = await submitScore({
         normal_score: answersCorrect,
         trivialer_score: finalScore,
         category,
         difficulty,
         questions_answered: questions.length,
         questions_correct: answersCorrect / 10 // Convert back to number of correct answers
-      });
+      }, true); // the results screen shows the percentile
+      
+      // Share of games in this category the trivialer score beat, if known
+      const beaten = submitted?.percentile?.trivialer;
       
       router.push({
         pathname: '/results',
@@ -168,7 +171,8 @@ const QuizScreen: React.FC<QuizScreenProps> = ({ category, difficulty }) => {
           trivialer_score: finalScore,
           total: questions.length,
           category,
-          difficulty
+          difficulty,
+          ...(beaten != null ? { percentile: beaten } : {})
         }
       });
     } catch (error) {
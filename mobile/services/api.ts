@@ -273,14 +273,16 @@ export const validatePlayerName = async (playerName: string): Promise<boolean> =
  * 3. Backend verifies token and links score to authenticated user
  * 4. Score is saved with user_id, ensuring data integrity
  */
-export const submitScore = async (scoreData: ScoreData): Promise<any> => {
+// withPercentile: also ask for "you beat N%" (costs the server a histogram read)
+export const submitScore = async (scoreData: ScoreData, withPercentile: boolean = false): Promise<any> => {
+  const config = withPercentile ? { params: { percentile: 1 } } : undefined;
   try {
     // Check if user is authenticated
     const token = await getToken();
     
     if (token) {
       // Authenticated submission - token automatically added by interceptor
-      const response = await api.post('/api/scores', scoreData);
+      const response = await api.post('/api/scores', scoreData, config);
       return response.data;
     } else {
       // Fallback to legacy submission for users without accounts
@@ -289,7 +291,7 @@ export const submitScore = async (scoreData: ScoreData): Promise<any> => {
         player_name: nickname || 'Guest',
         ...scoreData,
       };
-      const response = await api.post('/api/scores/legacy', payload);
+      const response = await api.post('/api/scores/legacy', payload, config);
       return response.data;
     }
   } catch (error) {